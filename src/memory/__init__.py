@@ -19,6 +19,11 @@ from src.memory.entity_mapper import (
 )
 
 # Core components
+from src.memory.embedding_provider import (
+    CachedEmbeddingProvider,
+    EmbeddingProvider,
+    HashEmbeddingProvider,
+)
 from src.memory.memory_graph import MemoryGraph, MemoryNode, MemoryRelationship, get_memory_graph
 from src.memory.memory_persistence import MemoryPersistence, get_memory_persistence
 from src.memory.vector_store import MemoryManager, VectorStore, get_memory_manager, recall, remember
@@ -35,6 +40,10 @@ __all__ = [
     "get_memory_manager",
     "remember",
     "recall",
+    # Embeddings
+    "EmbeddingProvider",
+    "HashEmbeddingProvider",
+    "CachedEmbeddingProvider",
     # Conversation Tracking
     "ConversationContextTracker",
     "ConversationSession",
@@ -3,10 +3,12 @@ Conversation Context Tracker
 Maintains conversational memory and context awareness
 """
 
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from src.core.logger import setup_logger
+from src.memory.ingestion import IngestionQueue
 from src.memory.memory_graph import MemoryNode, MemoryRelationship, get_memory_graph
 from src.memory.vector_store import get_memory_manager
 
@@ -38,19 +40,70 @@ class ConversationTurn:
             "metadata": self.metadata,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationTurn":
+        """Create from dictionary"""
+        return cls(
+            turn_id=data["turn_id"],
+            speaker=data["speaker"],
+            content=data["content"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            metadata=data.get("metadata", {}),
+        )
+
 
 class ConversationSession:
-    """A conversation session with multiple turns"""
+    """A conversation session with multiple turns
+
+    Turns of a saved session can be unloaded; they are read back from
+    storage on the next access, while the session details stay in memory.
+    """
 
     def __init__(self, session_id: str, topic: str = None):
         self.session_id = session_id
         self.topic = topic or "General"
-        self.turns: List[ConversationTurn] = []
         self.started_at = datetime.now()
         self.ended_at: Optional[datetime] = None
         self.summary: Optional[str] = None
         self.key_facts: List[str] = []
 
+        self._turns: Optional[List[ConversationTurn]] = []  # None while unloaded
+        self._turn_count = 0  # Turn count while unloaded
+        self._read_turns: Optional[Callable[[], List[ConversationTurn]]] = None
+
+    @property
+    def turns(self) -> List[ConversationTurn]:
+        """Conversation turns, read from storage if unloaded"""
+        return self.load_turns()
+
+    @turns.setter
+    def turns(self, value: List[ConversationTurn]):
+        self._turns = value
+
+    def load_turns(self) -> List[ConversationTurn]:
+        """Read turns back from storage if they were unloaded"""
+        if self._turns is None:
+            self._turns = self._read_turns()
+        return self._turns
+
+    @property
+    def turns_loaded(self) -> bool:
+        """Check if turns are in memory"""
+        return self._turns is not None
+
+    @property
+    def turn_count(self) -> int:
+        """Number of turns, without loading them"""
+        return len(self._turns) if self._turns is not None else self._turn_count
+
+    def unload_turns(
+        self, read_turns: Callable[[], List[ConversationTurn]], turn_count: Optional[int] = None
+    ):
+        """Drop turns from memory, reading them with read_turns on next access"""
+        self._turn_count = self.turn_count if turn_count is None else turn_count
+        self._read_turns = read_turns
+        self._turns = None
+
     def add_turn(self, turn: ConversationTurn):
         """Add conversation turn"""
         self.turns.append(turn)
@@ -65,24 +118,41 @@ class ConversationSession:
         end = self.ended_at or datetime.now()
         return end - self.started_at
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary"""
-        return {
+    def to_dict(self, include_turns: bool = True) -> Dict[str, Any]:
+        """Convert to dictionary (without turns, unloaded turns stay unread)"""
+        data = {
             "session_id": self.session_id,
             "topic": self.topic,
-            "turns": [turn.to_dict() for turn in self.turns],
             "started_at": self.started_at.isoformat(),
             "ended_at": self.ended_at.isoformat() if self.ended_at else None,
             "duration_seconds": self.get_duration().total_seconds(),
             "summary": self.summary,
             "key_facts": self.key_facts,
+            "turn_count": self.turn_count,
         }
+        if include_turns:
+            data["turns"] = [turn.to_dict() for turn in self.turns]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationSession":
+        """Create from dictionary (turns are optional)"""
+        session = cls(data["session_id"], data["topic"])
+        session.started_at = datetime.fromisoformat(data["started_at"])
+        if data.get("ended_at"):
+            session.ended_at = datetime.fromisoformat(data["ended_at"])
+        session.summary = data.get("summary")
+        session.key_facts = data.get("key_facts", [])
+
+        for turn_data in data.get("turns", []):
+            session.add_turn(ConversationTurn.from_dict(turn_data))
+        return session
 
 
 class ConversationContextTracker:
     """Tracks conversation context and manages conversational memory"""
 
-    def __init__(self):
+    def __init__(self, max_loaded_sessions: int = 20, background_ingestion: bool = True):
         self.logger = setup_logger("memory.conversation")
         self.memory_manager = get_memory_manager()
         self.graph = get_memory_graph()
@@ -97,6 +167,20 @@ class ConversationContextTracker:
         self.context_window: List[ConversationTurn] = []
         self.context_window_size = 10
 
+        # Sessions changed and turns added since the last pop_dirty
+        self._dirty_sessions: Set[str] = set()
+        self._new_turns: List[Tuple[str, ConversationTurn]] = []
+
+        # Sessions with turns in memory, least recently used first
+        self.max_loaded_sessions = max(1, max_loaded_sessions)
+        self._loaded_sessions: "OrderedDict[str, None]" = OrderedDict()
+        self._turn_reader: Optional[Callable[[str], List[ConversationTurn]]] = None
+
+        # Turns waiting to be stored in the memory graph and vector store
+        self.ingestion = IngestionQueue(
+            self._store_turns, background=background_ingestion, name="conversation_ingestion"
+        )
+
     def start_session(self, session_id: str = None, topic: str = None) -> str:
         """Start new conversation session"""
         if session_id is None:
@@ -104,6 +188,8 @@ class ConversationContextTracker:
 
         self.current_session = ConversationSession(session_id, topic)
         self.sessions[session_id] = self.current_session
+        self._dirty_sessions.add(session_id)
+        self._touch_session(session_id)
 
         self.logger.info(f"Started conversation session: {session_id}")
         return session_id
@@ -125,54 +211,61 @@ class ConversationContextTracker:
 
         self.current_session.add_turn(turn)
         self.context_window.append(turn)
+        self._new_turns.append((self.current_session.session_id, turn))
 
         # Maintain window size
         if len(self.context_window) > self.context_window_size:
             self.context_window.pop(0)
 
-        # Store in memory graph
-        self._store_turn_in_memory(turn)
+        # Store in memory graph and vector store off the caller's thread
+        turns = self.current_session.turns
+        previous_turn_id = turns[-2].turn_id if len(turns) > 1 else None
+        self.ingestion.put(
+            (self.current_session.session_id, self.current_session.topic, previous_turn_id, turn)
+        )
 
         self.logger.debug(f"Added turn: {speaker} - {content[:50]}...")
         return turn_id
 
-    def _store_turn_in_memory(self, turn: ConversationTurn):
-        """Store conversation turn in memory graph"""
+    def flush(self):
+        """Wait until all added turns are stored in the memory graph and vector store"""
+        self.ingestion.flush()
+
+    def _store_turns(self, items: List[Tuple[str, str, Optional[str], ConversationTurn]]):
+        """Store a batch of (session_id, topic, previous_turn_id, turn) in memory"""
+        vector_store = self.memory_manager.vector_store
+        embeddings = vector_store.create_embeddings([turn.content for _, _, _, turn in items])
+
+        documents = []
+        for (session_id, topic, previous_turn_id, turn), embedding in zip(items, embeddings):
+            # Create node
+            node = MemoryNode(
+                node_id=turn.turn_id,
+                node_type="conversation",
+                content=f"{turn.speaker}: {turn.content}",
+                metadata={
+                    "speaker": turn.speaker,
+                    "session_id": session_id,
+                    "topic": topic,
+                    **turn.metadata,
+                },
+            )
+            self.graph.add_node(node)
 
-        # Create node
-        node = MemoryNode(
-            node_id=turn.turn_id,
-            node_type="conversation",
-            content=f"{turn.speaker}: {turn.content}",
-            metadata={
-                "speaker": turn.speaker,
-                "session_id": self.current_session.session_id,
-                "topic": self.current_session.topic,
-                **turn.metadata,
-            },
-        )
-        self.graph.add_node(node)
+            # Link to previous turn
+            if previous_turn_id is not None:
+                rel = MemoryRelationship(
+                    from_node=previous_turn_id,
+                    to_node=turn.turn_id,
+                    rel_type="precedes",
+                    strength=1.0,
+                )
+                self.graph.add_relationship(rel)
 
-        # Link to previous turn
-        if len(self.current_session.turns) > 1:
-            prev_turn = self.current_session.turns[-2]
-            rel = MemoryRelationship(
-                from_node=prev_turn.turn_id,
-                to_node=turn.turn_id,
-                rel_type="precedes",
-                strength=1.0,
-            )
-            self.graph.add_relationship(rel)
+            documents.append((turn.turn_id, turn.content, embedding, node.metadata))
 
         # Store in vector database for semantic search
-        embedding = self.memory_manager.vector_store.create_embedding(turn.content)
-        self.memory_manager.vector_store.add_document(
-            doc_id=turn.turn_id,
-            content=turn.content,
-            embedding=embedding,
-            metadata=node.metadata,
-            collection="conversations",
-        )
+        vector_store.add_documents(documents, collection="conversations")
 
     def extract_facts(self, content: str) -> List[str]:
         """Extract key facts from conversation content"""
@@ -233,6 +326,7 @@ class ConversationContextTracker:
         # Add to session facts
         if self.current_session:
             self.current_session.key_facts.append(fact)
+            self._dirty_sessions.add(self.current_session.session_id)
 
         self.logger.info(f"Remembered fact: {fact[:50]}...")
 
@@ -249,12 +343,22 @@ class ConversationContextTracker:
             limit=limit,
         )
 
+    def search_conversation_history_many(
+        self, queries: List[str], limit: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """Search past conversations for several queries at once"""
+        return self.memory_manager.recall_many(
+            queries=queries,
+            memory_type="conversation",
+            limit=limit,
+        )
+
     def get_session_summary(self, session_id: str = None) -> Optional[Dict[str, Any]]:
         """Get summary of a conversation session"""
 
         session = None
         if session_id:
-            session = self.sessions.get(session_id)
+            session = self.get_session(session_id)
         else:
             session = self.current_session
 
@@ -262,7 +366,7 @@ class ConversationContextTracker:
             return None
 
         # Generate summary if not exists
-        if not session.summary and len(session.turns) > 0:
+        if not session.summary and session.turn_count > 0:
             # Simple summary generation
             turn_count = len(session.turns)
             user_turns = [t for t in session.turns if t.speaker == "user"]
@@ -272,12 +376,16 @@ class ConversationContextTracker:
                 f"Conversation about {session.topic} with {turn_count} turns "
                 f"({len(user_turns)} user, {len(assistant_turns)} assistant)"
             )
+            self._dirty_sessions.add(session.session_id)
 
         return session.to_dict()
 
     def end_current_session(self):
         """End current conversation session"""
         if self.current_session:
+            # Facts link to turn nodes, so those must be stored first
+            self.flush()
+
             # Extract facts from conversation
             for turn in self.current_session.turns:
                 facts = self.extract_facts(turn.content)
@@ -287,6 +395,7 @@ class ConversationContextTracker:
             # Generate summary
             summary = self.get_session_summary()
             self.current_session.end_session(summary=summary.get("summary") if summary else None)
+            self._dirty_sessions.add(self.current_session.session_id)
 
             self.logger.info(
                 f"Ended session: {self.current_session.session_id} "
@@ -295,6 +404,74 @@ class ConversationContextTracker:
 
             self.current_session = None
 
+    def get_session(self, session_id: str) -> Optional[ConversationSession]:
+        """Get a session with its turns loaded"""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            if session.turns_loaded:
+                self._touch_session(session_id)
+            session.load_turns()
+        return session
+
+    def add_stored_session(self, session: ConversationSession, turn_count: int):
+        """Add a saved session, leaving its turns in storage until they are needed"""
+        self.sessions[session.session_id] = session
+        session.unload_turns(self._turn_loader(session.session_id), turn_count)
+
+    def set_turn_reader(self, reader: Callable[[str], List[ConversationTurn]]):
+        """Set the function that reads the saved turns of a session"""
+        self._turn_reader = reader
+
+    def _turn_loader(self, session_id: str) -> Callable[[], List[ConversationTurn]]:
+        """Build the function an unloaded session calls to read its turns back"""
+
+        def load() -> List[ConversationTurn]:
+            self.logger.debug(f"Loading turns of session: {session_id}")
+            turns = self._turn_reader(session_id)
+            self._touch_session(session_id)
+            return turns
+
+        return load
+
+    def _touch_session(self, session_id: str):
+        """Mark a session's turns as recently used, unloading the least recently used"""
+        self._loaded_sessions[session_id] = None
+        self._loaded_sessions.move_to_end(session_id)
+        if len(self._loaded_sessions) <= self.max_loaded_sessions or self._turn_reader is None:
+            return
+
+        # Keep the current session and sessions with unsaved turns
+        pinned = {session_id for session_id, _ in self._new_turns}
+        if self.current_session is not None:
+            pinned.add(self.current_session.session_id)
+
+        for candidate in list(self._loaded_sessions):
+            if len(self._loaded_sessions) <= self.max_loaded_sessions:
+                break
+            if candidate in pinned or candidate == session_id:
+                continue
+
+            del self._loaded_sessions[candidate]
+            session = self.sessions.get(candidate)
+            if session is not None and session.turns_loaded:
+                session.unload_turns(self._turn_loader(candidate))
+
+    def pop_dirty(self) -> Tuple[Set[str], List[Tuple[str, ConversationTurn]]]:
+        """
+        Get and reset the changes since the last call
+
+        Returns:
+            IDs of sessions whose details changed, and (session_id, turn) of added turns
+        """
+        dirty = self._dirty_sessions, self._new_turns
+        self._dirty_sessions, self._new_turns = set(), []
+        return dirty
+
+    def mark_dirty(self, session_ids: Iterable[str], turns: List[Tuple[str, ConversationTurn]]):
+        """Mark sessions changed and turns added again, after a failed save of popped changes"""
+        self._dirty_sessions.update(session_ids)
+        self._new_turns = list(turns) + self._new_turns
+
     def get_related_memories(
         self, query: str, include_facts: bool = True
     ) -> Dict[str, List[Dict[str, Any]]]:
@@ -316,7 +493,7 @@ class ConversationContextTracker:
 
     def get_statistics(self) -> Dict[str, Any]:
         """Get conversation statistics"""
-        total_turns = sum(len(session.turns) for session in self.sessions.values())
+        total_turns = sum(session.turn_count for session in self.sessions.values())
         total_sessions = len(self.sessions)
 
         return {
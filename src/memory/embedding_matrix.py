@@ -0,0 +1,279 @@
+"""
+Embedding Matrix
+Contiguous, pre-normalized embedding storage with vectorized top-k search
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.memory.ivf_index import IVFIndex
+
+
+def normalize_rows(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Split vectors into unit rows and their norms (zero rows stay zero)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1).astype(np.float32)
+    safe_norms = np.where(norms > 0, norms, 1.0).astype(np.float32)
+    return vectors / safe_norms[..., None], norms
+
+
+def top_k_indices(scores: np.ndarray, k: int, threshold: float) -> np.ndarray:
+    """Get indices of the k highest scores at or above threshold, best first"""
+    candidates = np.flatnonzero((scores >= threshold) & (scores > -np.inf))
+    if k <= 0 or len(candidates) == 0:
+        return candidates[:0]
+
+    if len(candidates) > k:
+        partitioned = np.argpartition(-scores[candidates], k - 1)[:k]
+        candidates = candidates[partitioned]
+
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class EmbeddingMatrix:
+    """Row-normalized float32 embedding matrix for one collection
+
+    Rows are appended to a preallocated matrix and addressed by document ID.
+    Deleted rows are tombstoned and reclaimed by compaction once they make up
+    more than compact_ratio of the matrix. With ann_threshold set, searches
+    switch from exact scoring to an IVF index once the matrix holds that many
+    documents.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        capacity: int = 1024,
+        compact_ratio: float = 0.25,
+        ann_threshold: Optional[int] = None,
+        n_probe: int = 8,
+    ):
+        self.dim = dim
+        self.compact_ratio = compact_ratio
+        self.ann_threshold = ann_threshold
+        self.n_probe = n_probe
+        self._ann: Optional[IVFIndex] = None
+
+        self._capacity = capacity
+        self._vectors: Optional[np.ndarray] = None  # (capacity, dim) unit rows
+        self._norms = np.zeros(capacity, dtype=np.float32)  # Original row norms
+        self._searchable = np.zeros(capacity, dtype=bool)  # Live rows with non-zero norm
+
+        self._ids: List[Optional[str]] = []  # row -> doc_id (None for tombstones)
+        self._rows: Dict[str, int] = {}  # doc_id -> row
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    @property
+    def doc_ids(self) -> List[str]:
+        """Live document IDs in row order"""
+        return [doc_id for doc_id in self._ids if doc_id is not None]
+
+    @property
+    def size(self) -> int:
+        """Number of rows in use, including tombstones"""
+        return len(self._ids)
+
+    def add(self, doc_id: str, embedding: Sequence[float]) -> int:
+        """Add or replace the embedding of a document, returning its row"""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if self.dim is None:
+            self.dim = len(vector)
+        elif len(vector) != self.dim:
+            raise ValueError(f"Embedding has dimension {len(vector)}, expected {self.dim}")
+
+        unit, norm = normalize_rows(vector)
+
+        row = self._rows.get(doc_id)
+        if row is None:
+            row = len(self._ids)
+            self._ensure_capacity(row + 1)
+            self._ids.append(doc_id)
+            self._rows[doc_id] = row
+
+        self._vectors[row] = unit
+        self._norms[row] = norm
+        self._searchable[row] = norm > 0
+        self._index_rows(np.array([row]))
+        return row
+
+    def remove(self, doc_id: str) -> bool:
+        """Tombstone a document's row"""
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return False
+
+        self._ids[row] = None
+        self._searchable[row] = False
+        self._tombstones += 1
+
+        if self._tombstones > self.compact_ratio * max(len(self._ids), 1):
+            self.compact()
+        return True
+
+    def get(self, doc_id: str) -> Optional[np.ndarray]:
+        """Get the original (un-normalized) embedding of a document"""
+        row = self._rows.get(doc_id)
+        if row is None:
+            return None
+        return self._vectors[row] * self._norms[row]
+
+    def get_normalized(self, doc_id: str) -> Optional[Tuple[np.ndarray, float]]:
+        """Get the unit row and norm of a document's embedding"""
+        row = self._rows.get(doc_id)
+        if row is None:
+            return None
+        return self._vectors[row], float(self._norms[row])
+
+    def extend_normalized(
+        self, doc_ids: Sequence[str], unit_rows: np.ndarray, norms: Sequence[float]
+    ):
+        """Append already-normalized rows for new documents in one copy"""
+        unit_rows = np.asarray(unit_rows, dtype=np.float32)
+        if len(doc_ids) == 0:
+            return
+        if self.dim is None:
+            self.dim = unit_rows.shape[1]
+        elif unit_rows.shape[1] != self.dim:
+            raise ValueError(f"Embedding has dimension {unit_rows.shape[1]}, expected {self.dim}")
+
+        for doc_id in doc_ids:
+            self.remove(doc_id)
+
+        start = len(self._ids)
+        end = start + len(doc_ids)
+        self._ensure_capacity(end)
+
+        norms = np.asarray(norms, dtype=np.float32)
+        self._vectors[start:end] = unit_rows
+        self._norms[start:end] = norms
+        self._searchable[start:end] = norms > 0
+        self._ids.extend(doc_ids)
+        self._rows.update((doc_id, start + i) for i, doc_id in enumerate(doc_ids))
+        self._index_rows(np.arange(start, end))
+
+    def compact(self):
+        """Drop tombstoned rows"""
+        if not self._tombstones:
+            return
+
+        live = np.array([doc_id is not None for doc_id in self._ids], dtype=bool)
+        count = int(live.sum())
+        size = len(self._ids)
+
+        self._vectors[:count] = self._vectors[:size][live]
+        self._norms[:count] = self._norms[:size][live]
+        self._searchable[:count] = self._searchable[:size][live]
+        self._searchable[count:size] = False
+
+        self._ids = [doc_id for doc_id in self._ids if doc_id is not None]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._tombstones = 0
+
+        if self._ann is not None:
+            self._ann.remap(live)
+
+    @property
+    def uses_ann(self) -> bool:
+        """Check if searches go through the IVF index"""
+        return self._ann is not None and len(self) >= self.ann_threshold
+
+    def _index_rows(self, rows: np.ndarray):
+        """Add rows to the IVF index, (re)training it as the matrix grows"""
+        if self.ann_threshold is None:
+            return
+
+        if self._ann is None or len(self) > 4 * self._ann.trained_size:
+            if len(self) >= self.ann_threshold:
+                self._ann = IVFIndex(n_probe=self.n_probe)
+                self._ann.train(self._vectors[: len(self._ids)])
+            return
+
+        self._ann.add(rows, self._vectors[rows])
+
+    def scores(self, query_embedding: Sequence[float]) -> np.ndarray:
+        """Cosine similarity of every row to the query (-inf for unsearchable rows)"""
+        query, norm = normalize_rows(query_embedding)
+        size = len(self._ids)
+        if self._vectors is None or size == 0 or norm == 0:
+            return np.full(size, -np.inf, dtype=np.float32)
+
+        scores = self._vectors[:size] @ query
+        scores[~self._searchable[:size]] = -np.inf
+        return scores
+
+    def search(
+        self, query_embedding: Sequence[float], k: int, threshold: float = -np.inf
+    ) -> List[Tuple[str, float]]:
+        """Get the k most similar documents with similarity >= threshold"""
+        return self.search_batch([query_embedding], k, threshold)[0]
+
+    def search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        k: int,
+        threshold: float = -np.inf,
+        exact: bool = False,
+    ) -> List[List[Tuple[str, float]]]:
+        """Get the k most similar documents for each query with one matrix product"""
+        queries, norms = normalize_rows(np.atleast_2d(np.asarray(query_embeddings)))
+        size = len(self._ids)
+        if self._vectors is None or size == 0:
+            return [[] for _ in range(len(queries))]
+
+        if not exact and self.uses_ann:
+            return [
+                self._search_ann(query, k, threshold) if norm > 0 else []
+                for query, norm in zip(queries, norms)
+            ]
+
+        scores = queries @ self._vectors[:size].T
+        scores[:, ~self._searchable[:size]] = -np.inf
+        scores[norms == 0] = -np.inf
+
+        return [
+            [
+                (self._ids[row], float(row_scores[row]))
+                for row in top_k_indices(row_scores, k, threshold)
+            ]
+            for row_scores in scores
+        ]
+
+    def _search_ann(self, query: np.ndarray, k: int, threshold: float) -> List[Tuple[str, float]]:
+        """Score only the rows in the IVF lists closest to a unit query"""
+        candidates = self._ann.candidates(query)
+        candidates = candidates[self._searchable[candidates]]
+        scores = self._vectors[candidates] @ query
+        return [
+            (self._ids[candidates[i]], float(scores[i]))
+            for i in top_k_indices(scores, k, threshold)
+        ]
+
+    def _ensure_capacity(self, rows: int):
+        """Grow storage geometrically to hold rows"""
+        if self._vectors is None:
+            self._capacity = max(self._capacity, rows)
+            self._vectors = np.zeros((self._capacity, self.dim), dtype=np.float32)
+            self._norms = np.zeros(self._capacity, dtype=np.float32)
+            self._searchable = np.zeros(self._capacity, dtype=bool)
+            return
+
+        if rows <= self._capacity:
+            return
+
+        capacity = max(rows, self._capacity * 2)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[: self._capacity] = self._vectors
+        norms = np.zeros(capacity, dtype=np.float32)
+        norms[: self._capacity] = self._norms
+        searchable = np.zeros(capacity, dtype=bool)
+        searchable[: self._capacity] = self._searchable
+
+        self._vectors, self._norms, self._searchable = vectors, norms, searchable
+        self._capacity = capacity
@@ -0,0 +1,196 @@
+"""
+Embedding Provider
+Pluggable text embedding backends with batching and a persistent cache
+"""
+
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from src.core.logger import setup_logger
+
+
+class EmbeddingProvider(ABC):
+    """Abstract text embedding provider"""
+
+    def __init__(self, provider_name: str, dim: int):
+        self.provider_name = provider_name
+        self.dim = dim
+        self.logger = setup_logger(f"memory.embedding.{provider_name}")
+
+    @abstractmethod
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in one batch, returning a (len(texts), dim) float32 array"""
+        pass
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a single text"""
+        return self.embed_many([text])[0].tolist()
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """Deterministic MD5-based embeddings (placeholder, no model or network needed)"""
+
+    def __init__(self, dim: int = 384):
+        super().__init__("hash", dim)
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        # Repeat each 16-byte digest across the vector
+        digests = np.frombuffer(
+            b"".join(hashlib.md5(text.encode()).digest() for text in texts), dtype=np.uint8
+        ).reshape(len(texts), -1)
+        embeddings = digests[:, np.arange(self.dim) % digests.shape[1]] / 255.0
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return (embeddings / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """LRU cache keyed by content hash in front of another provider
+
+    Cache misses are embedded in one batch and appended to
+    <cache_dir>/<provider>.keys and <provider>.f32, which are reloaded on
+    start. The files are rewritten with the resident entries once they hold
+    twice the cache capacity.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        cache_dir: Optional[str] = None,
+        capacity: int = 10000,
+    ):
+        super().__init__(f"cached_{provider.provider_name}", provider.dim)
+        self.provider = provider
+        self.capacity = capacity
+
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()  # content hash -> vector
+
+        self._keys_file: Optional[Path] = None
+        self._vectors_file: Optional[Path] = None
+        self._stored = 0  # Entries in the cache files
+        if cache_dir is not None:
+            cache_path = Path(cache_dir)
+            cache_path.mkdir(parents=True, exist_ok=True)
+            self._keys_file = cache_path / f"{provider.provider_name}.keys"
+            self._vectors_file = cache_path / f"{provider.provider_name}.f32"
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Get the cache key of a text"""
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+
+        # Embed each distinct uncached text once
+        missing: "OrderedDict[str, List[int]]" = OrderedDict()
+        missing_texts: List[str] = []
+        for i, text in enumerate(texts):
+            key = self.content_hash(text)
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                embeddings[i] = vector
+                self.hits += 1
+            elif key in missing:
+                missing[key].append(i)
+                self.hits += 1
+            else:
+                missing[key] = [i]
+                missing_texts.append(text)
+                self.misses += 1
+
+        if missing:
+            vectors = np.asarray(self.provider.embed_many(missing_texts), dtype=np.float32)
+            for (key, positions), vector in zip(missing.items(), vectors):
+                embeddings[positions] = vector
+                self._put(key, vector)
+            self._append(list(missing), vectors)
+
+        return embeddings
+
+    def _put(self, key: str, vector: np.ndarray):
+        """Insert a vector, evicting the least recently used entries"""
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+
+    def _load(self):
+        """Load cached vectors from disk"""
+        if not self._keys_file.exists() or not self._vectors_file.exists():
+            return
+
+        try:
+            with open(self._keys_file, "r") as f:
+                keys = f.read().split()
+            vectors = np.fromfile(self._vectors_file, dtype=np.float32)
+
+            # Ignore entries past a torn write in either file
+            count = min(len(keys), len(vectors) // self.dim)
+            torn = count != len(keys) or count * self.dim != len(vectors)
+            vectors = vectors[: count * self.dim].reshape(count, self.dim)
+            for key, vector in zip(keys[:count], vectors):
+                self._put(key, vector)
+
+            self._stored = count
+            if torn:
+                self._rewrite()
+
+            self.logger.info(f"Loaded {len(self._cache)} cached embeddings")
+
+        except Exception as e:
+            self.logger.error(f"Error loading embedding cache: {e}")
+
+    def _append(self, keys: List[str], vectors: np.ndarray):
+        """Append new entries to the cache files"""
+        if self._keys_file is None:
+            return
+
+        try:
+            if self._stored + len(keys) > 2 * self.capacity:
+                self._rewrite()
+                return
+
+            with open(self._vectors_file, "ab") as f:
+                f.write(vectors.astype(np.float32).tobytes())
+            with open(self._keys_file, "a") as f:
+                f.write("".join(f"{key}\n" for key in keys))
+            self._stored += len(keys)
+
+        except Exception as e:
+            self.logger.error(f"Error saving embedding cache: {e}")
+
+    def _rewrite(self):
+        """Replace the cache files with the resident entries"""
+        keys = list(self._cache)
+        vectors = (
+            np.vstack(list(self._cache.values()))
+            if keys
+            else np.zeros((0, self.dim), dtype=np.float32)
+        )
+
+        tmp_vectors = self._vectors_file.with_suffix(".f32.tmp")
+        tmp_keys = self._keys_file.with_suffix(".keys.tmp")
+        vectors.astype(np.float32).tofile(tmp_vectors)
+        with open(tmp_keys, "w") as f:
+            f.write("".join(f"{key}\n" for key in keys))
+
+        os.replace(tmp_vectors, self._vectors_file)
+        os.replace(tmp_keys, self._keys_file)
+        self._stored = len(keys)
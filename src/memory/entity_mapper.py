@@ -6,7 +6,7 @@ Extracts and maps entities and their relationships from conversations and tasks
 import re
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from src.core.logger import setup_logger
 from src.memory.memory_graph import MemoryNode, MemoryRelationship, get_memory_graph
@@ -72,6 +72,20 @@ class Entity:
             "mention_count": self.mention_count,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Entity":
+        """Create from dictionary"""
+        entity = cls(
+            entity_id=data["entity_id"],
+            name=data["name"],
+            entity_type=EntityType(data["type"]),
+            attributes=data.get("attributes", {}),
+        )
+        entity.first_seen = datetime.fromisoformat(data["first_seen"])
+        entity.last_seen = datetime.fromisoformat(data["last_seen"])
+        entity.mention_count = data.get("mention_count", 1)
+        return entity
+
 
 class EntityRelationshipMapper:
     """Maps entities and their relationships"""
@@ -84,6 +98,9 @@ class EntityRelationshipMapper:
         self.entities: Dict[str, Entity] = {}
         self.entity_name_index: Dict[str, str] = {}  # name -> entity_id
 
+        # Entities changed or removed since the last pop_dirty
+        self._dirty_entities: Set[str] = set()
+
         # Common patterns
         self.person_patterns = [
             r"\b[A-Z][a-z]+ [A-Z][a-z]+\b",  # John Doe
@@ -97,47 +114,76 @@ class EntityRelationshipMapper:
 
         self.email_pattern = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
 
+        # Capitalized multi-word phrases
+        self.project_pattern = r"\b(?:Project|Initiative) [A-Z][a-zA-Z ]{2,15}\b"
+
+        self.work_patterns = [
+            (re.compile(r"(\w+) works (?:for|at) (\w+)", re.IGNORECASE), RelationType.WORKS_FOR),
+            (re.compile(r"(\w+) manages (\w+)", re.IGNORECASE), RelationType.MANAGES),
+            (re.compile(r"(\w+) and (\w+) collaborate", re.IGNORECASE), RelationType.WORKS_WITH),
+        ]
+
+        self._patterns = self._compile_patterns()
+
+    def _compile_patterns(self) -> List[Tuple[str, re.Pattern, EntityType]]:
+        """Compile each entity pattern once, as (kind, pattern, type), most specific first"""
+        patterns = [
+            ("email", self.email_pattern, EntityType.PERSON),
+            ("project", self.project_pattern, EntityType.PROJECT),
+        ]
+        patterns += [
+            ("organization", pattern, EntityType.ORGANIZATION)
+            for pattern in self.organization_patterns
+        ]
+        patterns += [("person", pattern, EntityType.PERSON) for pattern in self.person_patterns]
+
+        return [(kind, re.compile(pattern), entity_type) for kind, pattern, entity_type in patterns]
+
+    def _scan(self, text: str) -> List[Tuple[str, EntityType, Optional[Dict[str, Any]]]]:
+        """
+        Find entity mentions, as (name, type, attributes) in text order
+
+        Each pattern is scanned separately, so mentions of different kinds may
+        overlap ("Ask Acme Corp" is both a person and an organization). Only a
+        person match lying within an email, project or organization match is
+        dropped, as it names the same thing. Separate scans beat one combined
+        pattern of lookaheads here: re skips ahead by each pattern's literal
+        prefix, which a combined pattern loses.
+        """
+        matches = []
+        specific_spans = []
+        for priority, (kind, pattern, entity_type) in enumerate(self._patterns):
+            for match in pattern.finditer(text):
+                start, end = match.span()
+                if kind == "person" and any(s <= start and end <= e for s, e in specific_spans):
+                    continue
+                if kind != "person":
+                    specific_spans.append((start, end))
+                matches.append((start, priority, kind, match.group(0), entity_type))
+
+        mentions = []
+        for _, _, kind, value, entity_type in sorted(matches):
+            if kind == "email":
+                # Create person entity from email
+                name = value.split("@")[0].replace(".", " ").title()
+                mentions.append((name.strip(), EntityType.PERSON, {"email": value}))
+            else:
+                mentions.append((value.strip(), entity_type, None))
+        return mentions
+
     def extract_entities(self, text: str) -> List[Entity]:
         """Extract entities from text"""
-        entities = []
-
-        # Extract people
-        for pattern in self.person_patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                name = match.group(0)
-                entity = self._get_or_create_entity(name, EntityType.PERSON)
-                entities.append(entity)
-
-        # Extract organizations
-        for pattern in self.organization_patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                name = match.group(0)
-                entity = self._get_or_create_entity(name, EntityType.ORGANIZATION)
-                entities.append(entity)
-
-        # Extract emails
-        emails = re.finditer(self.email_pattern, text)
-        for match in emails:
-            email = match.group(0)
-            # Create person entity from email
-            name = email.split("@")[0].replace(".", " ").title()
-            entity = self._get_or_create_entity(name, EntityType.PERSON, {"email": email})
-            entities.append(entity)
-
-        # Extract projects (capitalized multi-word phrases)
-        project_pattern = r"\b(?:Project|Initiative) [A-Z][a-zA-Z ]{2,15}\b"
-        projects = re.finditer(project_pattern, text)
-        for match in projects:
-            name = match.group(0)
-            entity = self._get_or_create_entity(name, EntityType.PROJECT)
-            entities.append(entity)
-
-        return entities
+        return [
+            self._get_or_create_entity(name, entity_type, attributes)
+            for name, entity_type, attributes in self._scan(text)
+        ]
 
     def _get_or_create_entity(
-        self, name: str, entity_type: EntityType, attributes: Dict[str, Any] = None
+        self,
+        name: str,
+        entity_type: EntityType,
+        attributes: Dict[str, Any] = None,
+        mentions: int = 1,
     ) -> Entity:
         """Get existing entity or create new one"""
 
@@ -149,7 +195,8 @@ class EntityRelationshipMapper:
             entity_id = self.entity_name_index[normalized_name]
             entity = self.entities[entity_id]
             entity.last_seen = datetime.now()
-            entity.mention_count += 1
+            entity.mention_count += mentions
+            self._dirty_entities.add(entity_id)
 
             # Update attributes
             if attributes:
@@ -160,9 +207,11 @@ class EntityRelationshipMapper:
         # Create new entity
         entity_id = f"{entity_type.value}_{len(self.entities)}"
         entity = Entity(entity_id, normalized_name, entity_type, attributes)
+        entity.mention_count = mentions
 
         self.entities[entity_id] = entity
         self.entity_name_index[normalized_name] = entity_id
+        self._dirty_entities.add(entity_id)
 
         # Add to graph
         node = MemoryNode(
@@ -205,6 +254,45 @@ class EntityRelationshipMapper:
         # Extract entities
         entities = self.extract_entities(text)
 
+        return self._relate_entities(text, entities, source_id)
+
+    def analyze_many(
+        self, texts: List[str], source_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several texts, creating or updating each distinct entity once
+
+        Mention counts and co-occurrence relationships match calling
+        analyze_text on each text in turn, but each new entity is created and
+        added to the graph once, and each existing one updated once.
+        """
+        source_ids = source_ids or [None] * len(texts)
+        mentions = [self._scan(text) for text in texts]
+
+        # Merge mentions of the same name across the batch, in first-seen order
+        merged: Dict[str, Tuple[EntityType, Dict[str, Any], int]] = {}
+        for name, entity_type, attributes in (
+            m for text_mentions in mentions for m in text_mentions
+        ):
+            first_type, merged_attributes, count = merged.get(name, (entity_type, {}, 0))
+            merged_attributes.update(attributes or {})
+            merged[name] = (first_type, merged_attributes, count + 1)
+
+        entities = {
+            name: self._get_or_create_entity(name, entity_type, attributes, count)
+            for name, (entity_type, attributes, count) in merged.items()
+        }
+
+        return [
+            self._relate_entities(text, [entities[name] for name, _, _ in text_mentions], source_id)
+            for text, text_mentions, source_id in zip(texts, mentions, source_ids)
+        ]
+
+    def _relate_entities(
+        self, text: str, entities: List[Entity], source_id: Optional[str]
+    ) -> Dict[str, Any]:
+        """Create relationships between the entities found in a text"""
+
         # Infer relationships (co-occurrence)
         relationships = []
         for i, entity1 in enumerate(entities):
@@ -227,15 +315,8 @@ class EntityRelationshipMapper:
                 )
 
         # Detect work relationships
-        work_patterns = [
-            (r"(\w+) works (?:for|at) (\w+)", RelationType.WORKS_FOR),
-            (r"(\w+) manages (\w+)", RelationType.MANAGES),
-            (r"(\w+) and (\w+) collaborate", RelationType.WORKS_WITH),
-        ]
-
-        for pattern, rel_type in work_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for pattern, rel_type in self.work_patterns:
+            for match in pattern.finditer(text):
                 name1, name2 = match.group(1), match.group(2)
 
                 # Find entities
@@ -372,10 +453,21 @@ class EntityRelationshipMapper:
 
         # Remove entity2
         del self.entities[entity2_id]
+        self._dirty_entities.update((entity1_id, entity2_id))
 
         self.logger.info(f"Merged entities: {entity2.name} -> {entity1.name}")
         return True
 
+    def pop_dirty(self) -> Set[str]:
+        """Get and reset the IDs of entities changed or removed since the last call"""
+        dirty = self._dirty_entities
+        self._dirty_entities = set()
+        return dirty
+
+    def mark_dirty(self, entity_ids: Iterable[str]):
+        """Mark entities changed again, after a failed save of popped changes"""
+        self._dirty_entities.update(entity_ids)
+
     def get_statistics(self) -> Dict[str, Any]:
         """Get entity statistics"""
         entity_counts = {}
@@ -0,0 +1,190 @@
+"""
+Graph Storage
+Columnar relationship storage for the memory graph
+"""
+
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Edge key: (from_node, to_node, rel_type)
+EdgeKey = Tuple[str, str, str]
+
+
+class RelationshipTable:
+    """Relationships stored as columns, addressed by edge key
+
+    Strength is a float32 column and timestamps are float64 epoch-second
+    columns, so bulk updates run as NumPy operations. Properties are only
+    stored for edges that have any. Removed rows are tombstoned and
+    reclaimed by compaction; rows are renumbered then, so callers hold on to
+    edge keys, not rows.
+    """
+
+    _COLUMNS = ("live", "strength", "created_at", "idle_since", "source_hash")
+
+    def __init__(self, capacity: int = 1024, compact_ratio: float = 0.25):
+        self.compact_ratio = compact_ratio
+
+        self._capacity = capacity
+        self.live = np.zeros(capacity, dtype=bool)  # Rows holding an edge
+        self.strength = np.zeros(capacity, dtype=np.float32)
+        self.created_at = np.zeros(capacity, dtype=np.float64)
+        self.idle_since = np.zeros(capacity, dtype=np.float64)  # Last access or decay
+        self.source_hash = np.zeros(capacity, dtype=np.uint32)  # Stable hash of from_node
+
+        self._keys: List[Optional[EdgeKey]] = []  # row -> key (None for tombstones)
+        self._rows: Dict[EdgeKey, int] = {}  # key -> row
+        self._properties: Dict[EdgeKey, Dict[str, Any]] = {}  # key -> non-empty properties
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: EdgeKey) -> bool:
+        return key in self._rows
+
+    def __iter__(self) -> Iterator[EdgeKey]:
+        """Live keys in insertion order"""
+        return iter(self._rows)
+
+    @property
+    def size(self) -> int:
+        """Number of rows in use, including tombstones"""
+        return len(self._keys)
+
+    def row(self, key: EdgeKey) -> Optional[int]:
+        """Get the current row of an edge"""
+        return self._rows.get(key)
+
+    def key_at(self, row: int) -> Optional[EdgeKey]:
+        """Get the key stored in a row (None for tombstones)"""
+        return self._keys[row]
+
+    def add(
+        self,
+        key: EdgeKey,
+        strength: float,
+        created_at: float,
+        properties: Optional[Dict[str, Any]] = None,
+        idle_since: Optional[float] = None,
+    ) -> int:
+        """Add an edge, or overwrite it in place if the key exists"""
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            self._ensure_capacity(row + 1)
+            self._keys.append(key)
+            self._rows[key] = row
+
+        self.live[row] = True
+        self.strength[row] = strength
+        self.created_at[row] = created_at
+        self.idle_since[row] = created_at if idle_since is None else idle_since
+        self.source_hash[row] = zlib.crc32(key[0].encode())
+
+        if properties:
+            self._properties[key] = properties
+        else:
+            self._properties.pop(key, None)
+        return row
+
+    def remove(self, key: EdgeKey) -> bool:
+        """Tombstone an edge"""
+        return bool(self.remove_many([key]))
+
+    def remove_many(self, keys: Iterable[EdgeKey]) -> List[EdgeKey]:
+        """Tombstone edges, compacting at most once, and return the removed keys"""
+        removed = []
+        for key in keys:
+            row = self._rows.pop(key, None)
+            if row is None:
+                continue
+
+            self._keys[row] = None
+            self.live[row] = False
+            self._properties.pop(key, None)
+            removed.append(key)
+
+        self._tombstones += len(removed)
+        if self._tombstones > self.compact_ratio * max(len(self._keys), 1):
+            self.compact()
+        return removed
+
+    def touch(self, key: EdgeKey, now: float):
+        """Record an access to an edge"""
+        row = self._rows.get(key)
+        if row is not None:
+            self.idle_since[row] = now
+
+    def shard_rows(self, shard: int = 0, num_shards: int = 1) -> np.ndarray:
+        """Get live rows whose source node falls in a shard"""
+        size = len(self._keys)
+        mask = self.live_rows()
+        if num_shards > 1:
+            mask &= self.source_hash[:size] % num_shards == shard
+        return np.flatnonzero(mask)
+
+    def decay(self, rows: np.ndarray, half_life: float, now: float):
+        """
+        Apply exponential decay to rows for the time they sat idle
+
+        Idle time runs from the last access or the last decay, whichever is
+        later, so repeated calls compound to the same result as a single call.
+        """
+        idle = np.maximum(now - self.idle_since[rows], 0.0)
+        self.strength[rows] *= np.exp2(-idle / half_life).astype(np.float32)
+        self.idle_since[rows] = now
+
+    def get_properties(self, key: EdgeKey) -> Dict[str, Any]:
+        """Get the properties of an edge, creating an empty dict on first use"""
+        properties = self._properties.get(key)
+        if properties is None:
+            properties = {}
+            if key in self._rows:
+                self._properties[key] = properties
+        return properties
+
+    def set_properties(self, key: EdgeKey, properties: Dict[str, Any]):
+        """Replace the properties of an edge"""
+        if key in self._rows:
+            self._properties[key] = properties
+
+    def live_rows(self) -> np.ndarray:
+        """Mask of rows holding an edge"""
+        return self.live[: len(self._keys)].copy()
+
+    def compact(self):
+        """Drop tombstoned rows"""
+        if not self._tombstones:
+            return
+
+        live = self.live_rows()
+        count = int(live.sum())
+        size = len(self._keys)
+
+        for column in self._columns():
+            column[:count] = column[:size][live]
+        self.live[count:size] = False
+
+        self._keys = [key for key in self._keys if key is not None]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._tombstones = 0
+
+    def _ensure_capacity(self, rows: int):
+        """Grow columns geometrically to hold rows"""
+        if rows <= self._capacity:
+            return
+
+        capacity = max(rows, self._capacity * 2)
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self._capacity] = column
+            setattr(self, name, grown)
+        self._capacity = capacity
+
+    def _columns(self) -> List[np.ndarray]:
+        """Get all row-aligned columns"""
+        return [getattr(self, name) for name in self._COLUMNS]
@@ -0,0 +1,91 @@
+"""
+Ingestion Queue
+Bounded background queue that stores items in memory in batches
+"""
+
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+from src.core.logger import setup_logger
+
+
+class IngestionQueue:
+    """Bounded queue drained in batches by a background worker
+
+    put() returns once an item is queued. The worker takes every item that
+    is waiting, up to batch_size, and passes them to the handler in one call,
+    so batches grow on their own when items arrive faster than they are
+    stored. A full queue makes put() wait for the worker (backpressure).
+    With background=False the handler runs on the caller's thread instead.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], None],
+        max_size: int = 1000,
+        batch_size: int = 64,
+        background: bool = True,
+        name: str = "ingestion",
+    ):
+        self.logger = setup_logger(f"memory.{name}")
+        self.handler = handler
+        self.batch_size = batch_size
+        self.background = background
+        self.name = name
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.batches = 0  # Handler calls made by the worker
+        self.failed = 0  # Items in batches whose handler call raised
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def put(self, item: Any):
+        """Queue an item, waiting for space if the queue is full"""
+        if not self.background:
+            self._handle([item])
+            return
+
+        self._ensure_worker()
+        self._queue.put(item)
+
+    def flush(self):
+        """Wait until every queued item has been handled"""
+        if self._worker is not None:
+            self._queue.join()
+
+    def _ensure_worker(self):
+        """Start the worker thread if it is not running"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        """Worker loop: block for one item, then take what else is waiting"""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._handle(batch)
+                self.batches += 1
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _handle(self, batch: List[Any]):
+        """Pass a batch to the handler, logging failures"""
+        try:
+            self.handler(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            self.logger.error(f"Error ingesting batch of {len(batch)} items: {e}")
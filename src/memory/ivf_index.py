@@ -0,0 +1,166 @@
+"""
+IVF Index
+Inverted-file approximate nearest-neighbour index over unit-normalized rows
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+# Rows scored per block when assigning to centroids
+_ASSIGN_BLOCK = 8192
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0
+) -> np.ndarray:
+    """Cluster unit rows by cosine similarity, returning k unit centroids"""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = _nearest(vectors, centroids)
+
+        # Sum members per centroid with one sort instead of a Python loop
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=k)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        non_empty = counts > 0
+        sums = np.add.reduceat(vectors[order], starts[non_empty], axis=0)
+
+        updated = centroids.copy()
+        updated[non_empty] = sums
+
+        # Re-seed empty clusters with random rows
+        empty = np.flatnonzero(~non_empty)
+        if len(empty):
+            updated[empty] = vectors[rng.choice(len(vectors), size=len(empty))]
+
+        norms = np.linalg.norm(updated, axis=1, keepdims=True)
+        centroids = updated / np.where(norms > 0, norms, 1.0)
+
+    return centroids.astype(np.float32)
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for each row"""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK):
+        block = vectors[start : start + _ASSIGN_BLOCK]
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+class IVFIndex:
+    """Inverted lists of matrix rows grouped by nearest k-means centroid
+
+    A query scores the centroids, then only rows in the n_probe closest lists.
+    Raising n_probe trades latency for recall; n_probe == n_lists is exact.
+    Rows are assigned to existing centroids on insert, so the index should be
+    retrained once the corpus has grown well past its training size.
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        iterations: int = 10,
+        sample_size: int = 65536,
+        seed: int = 0,
+    ):
+        self.n_lists = n_lists  # Defaults to sqrt(rows) at training time
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.sample_size = sample_size
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+
+        self._assignments = np.zeros(0, dtype=np.int64)  # row -> list, -1 if unassigned
+        self._lists: List[np.ndarray] = []  # list -> rows (may hold stale rows)
+        self._pending: List[List[int]] = []  # list -> rows not yet merged into _lists
+
+    @property
+    def trained(self) -> bool:
+        """Check if centroids have been computed"""
+        return self.centroids is not None
+
+    def train(self, vectors: np.ndarray):
+        """Compute centroids from unit rows and index all of them"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+
+        sample = vectors
+        if len(vectors) > self.sample_size:
+            rng = np.random.default_rng(self.seed)
+            sample = vectors[rng.choice(len(vectors), size=self.sample_size, replace=False)]
+
+        self.centroids = spherical_kmeans(sample, n_lists, self.iterations, self.seed)
+        self.trained_size = len(vectors)
+
+        self._assignments = np.full(0, -1, dtype=np.int64)
+        self._lists = [np.zeros(0, dtype=np.int64) for _ in range(len(self.centroids))]
+        self._pending = [[] for _ in range(len(self.centroids))]
+        self.add(np.arange(len(vectors)), vectors)
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray):
+        """Assign rows (new or updated) to their nearest lists"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if not self.trained or len(rows) == 0:
+            return
+
+        if rows.max() >= len(self._assignments):
+            grown = np.full(max(rows.max() + 1, 2 * len(self._assignments)), -1, dtype=np.int64)
+            grown[: len(self._assignments)] = self._assignments
+            self._assignments = grown
+
+        labels = _nearest(np.atleast_2d(np.asarray(vectors, dtype=np.float32)), self.centroids)
+        for row, label in zip(rows.tolist(), labels.tolist()):
+            # A moved row stays in its old list until that list is next merged
+            if self._assignments[row] != label:
+                self._pending[label].append(row)
+            self._assignments[row] = label
+
+    def remap(self, live: np.ndarray):
+        """Renumber rows after the matrix dropped rows where live is False"""
+        if not self.trained:
+            return
+
+        size = len(live)
+        assignments = np.full(size, -1, dtype=np.int64)
+        count = min(size, len(self._assignments))
+        assignments[:count] = self._assignments[:count]
+        self._assignments = assignments[live]
+
+        order = np.argsort(self._assignments, kind="stable")
+        counts = np.bincount(self._assignments[self._assignments >= 0], minlength=len(self._lists))
+        offset = int((self._assignments < 0).sum())
+        for label, list_count in enumerate(counts.tolist()):
+            self._lists[label] = order[offset : offset + list_count]
+            self._pending[label] = []
+            offset += list_count
+
+    def candidates(self, query: np.ndarray, n_probe: Optional[int] = None) -> np.ndarray:
+        """Get rows in the lists closest to a unit query"""
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        if n_probe < len(centroid_scores):
+            probed = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        else:
+            probed = np.arange(len(centroid_scores))
+
+        return np.concatenate([self._list_rows(label) for label in probed.tolist()])
+
+    def _list_rows(self, label: int) -> np.ndarray:
+        """Get the current rows of a list, merging pending inserts"""
+        rows = self._lists[label]
+        if self._pending[label]:
+            rows = np.unique(np.concatenate((rows, self._pending[label])).astype(np.int64))
+            self._pending[label] = []
+
+        # Drop rows that moved to another list
+        current = rows[self._assignments[rows] == label]
+        self._lists[label] = current
+        return current
@@ -4,14 +4,36 @@ Neo4j-based knowledge graph for contextual memory and relationships
 """
 
 import json
+import sys
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
 
 from src.core.logger import setup_logger
+from src.memory.graph_storage import EdgeKey, RelationshipTable
 
 
 class MemoryNode:
-    """Node in the memory graph"""
+    """Node in the memory graph
+
+    Timestamps are stored as epoch seconds and the embedding as a float32
+    array; the datetime, list and metadata values are built on access.
+    """
+
+    __slots__ = (
+        "node_id",
+        "node_type",
+        "content",
+        "accessed_count",
+        "created_ts",
+        "last_accessed_ts",
+        "_metadata",
+        "_embedding",
+    )
 
     def __init__(
         self,
@@ -22,14 +44,56 @@ class MemoryNode:
         embedding: List[float] = None,
         created_at: datetime = None,
     ):
-        self.node_id = node_id
-        self.node_type = node_type  # person, task, event, fact, conversation, etc.
+        self.node_id = sys.intern(node_id)
+        self.node_type = sys.intern(node_type)  # person, task, event, fact, conversation, etc.
         self.content = content
-        self.metadata = metadata or {}
-        self.embedding = embedding or []
-        self.created_at = created_at or datetime.now()
+        self.metadata = metadata
+        self.embedding = embedding
+        self.created_ts = created_at.timestamp() if created_at else time.time()
         self.accessed_count = 0
-        self.last_accessed = None
+        self.last_accessed_ts: Optional[float] = None
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Node metadata (created on first access)"""
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Optional[Dict[str, Any]]):
+        self._metadata = value or None
+
+    @property
+    def embedding(self) -> List[float]:
+        """Embedding as a list of floats"""
+        return self._embedding.tolist() if self._embedding is not None else []
+
+    @embedding.setter
+    def embedding(self, value: Optional[List[float]]):
+        self._embedding = (
+            np.asarray(value, dtype=np.float32) if value is not None and len(value) else None
+        )
+
+    @property
+    def created_at(self) -> datetime:
+        """Creation time"""
+        return datetime.fromtimestamp(self.created_ts)
+
+    @created_at.setter
+    def created_at(self, value: datetime):
+        self.created_ts = value.timestamp()
+
+    @property
+    def last_accessed(self) -> Optional[datetime]:
+        """Last access time"""
+        if self.last_accessed_ts is None:
+            return None
+        return datetime.fromtimestamp(self.last_accessed_ts)
+
+    @last_accessed.setter
+    def last_accessed(self, value: Optional[datetime]):
+        self.last_accessed_ts = value.timestamp() if value else None
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -44,9 +108,40 @@ class MemoryNode:
             "last_accessed": self.last_accessed.isoformat() if self.last_accessed else None,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MemoryNode":
+        """Create from dictionary"""
+        node = cls(
+            node_id=data["node_id"],
+            node_type=data["node_type"],
+            content=data["content"],
+            metadata=data.get("metadata", {}),
+            embedding=data.get("embedding", []),
+            created_at=datetime.fromisoformat(data["created_at"]),
+        )
+        node.accessed_count = data.get("accessed_count", 0)
+        if data.get("last_accessed"):
+            node.last_accessed = datetime.fromisoformat(data["last_accessed"])
+        return node
+
 
 class MemoryRelationship:
-    """Relationship between nodes"""
+    """Relationship between nodes
+
+    Once added to a graph, strength, properties and created_at are read from
+    and written to the graph's relationship table.
+    """
+
+    __slots__ = (
+        "from_node",
+        "to_node",
+        "rel_type",
+        "_strength",
+        "_properties",
+        "_created_ts",
+        "_idle_ts",
+        "_table",
+    )
 
     def __init__(
         self,
@@ -56,12 +151,98 @@ class MemoryRelationship:
         properties: Dict[str, Any] = None,
         strength: float = 1.0,
     ):
-        self.from_node = from_node
-        self.to_node = to_node
-        self.rel_type = rel_type  # related_to, mentioned_in, precedes, causes, etc.
-        self.properties = properties or {}
-        self.strength = strength  # 0-1 relationship strength
-        self.created_at = datetime.now()
+        self.from_node = sys.intern(from_node)
+        self.to_node = sys.intern(to_node)
+        self.rel_type = sys.intern(rel_type)  # related_to, mentioned_in, precedes, causes, etc.
+        self._properties = properties or {}
+        self._strength = strength  # 0-1 relationship strength
+        self._created_ts = time.time()
+        self._idle_ts: Optional[float] = None  # None until accessed or decayed
+        self._table: Optional[RelationshipTable] = None
+
+    @classmethod
+    def view(cls, table: RelationshipTable, key: EdgeKey) -> "MemoryRelationship":
+        """Build a relationship bound to a table row"""
+        rel = cls.__new__(cls)
+        rel.from_node, rel.to_node, rel.rel_type = key
+        rel._table = table
+
+        # Snapshot, used if the edge is removed later
+        row = table.row(key)
+        rel._strength = float(table.strength[row])
+        rel._created_ts = float(table.created_at[row])
+        rel._idle_ts = float(table.idle_since[row])
+        rel._properties = None
+        return rel
+
+    def bind(self, table: RelationshipTable):
+        """Store this relationship in a table and read through to it from now on"""
+        table.add(self.key, self._strength, self._created_ts, self._properties, self._idle_ts)
+        self._table = table
+        self._properties = None
+
+    def _row(self) -> Optional[int]:
+        """Get the table row of this relationship (None if not stored)"""
+        return self._table.row(self.key) if self._table is not None else None
+
+    @property
+    def strength(self) -> float:
+        """Relationship strength (0-1)"""
+        row = self._row()
+        return self._strength if row is None else float(self._table.strength[row])
+
+    @strength.setter
+    def strength(self, value: float):
+        self._strength = value
+        row = self._row()
+        if row is not None:
+            self._table.strength[row] = value
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """Relationship properties"""
+        if self._row() is not None:
+            return self._table.get_properties(self.key)
+        if self._properties is None:
+            self._properties = {}
+        return self._properties
+
+    @properties.setter
+    def properties(self, value: Dict[str, Any]):
+        self._properties = value
+        if self._row() is not None:
+            self._table.set_properties(self.key, value)
+
+    @property
+    def created_at(self) -> datetime:
+        """Creation time"""
+        row = self._row()
+        ts = self._created_ts if row is None else float(self._table.created_at[row])
+        return datetime.fromtimestamp(ts)
+
+    @created_at.setter
+    def created_at(self, value: datetime):
+        self._created_ts = value.timestamp()
+        row = self._row()
+        if row is not None:
+            self._table.created_at[row] = self._created_ts
+
+    @property
+    def idle_since(self) -> datetime:
+        """Time of the last access or decay, the point decay resumes from"""
+        row = self._row()
+        if row is not None:
+            return datetime.fromtimestamp(float(self._table.idle_since[row]))
+        return datetime.fromtimestamp(
+            self._idle_ts if self._idle_ts is not None else self._created_ts
+        )
+
+    @idle_since.setter
+    def idle_since(self, value: datetime):
+        self._idle_ts = value.timestamp()
+        row = self._row()
+        if row is not None:
+            self._table.idle_since[row] = self._idle_ts
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -70,32 +251,75 @@ class MemoryRelationship:
             "to_node": self.to_node,
             "rel_type": self.rel_type,
             "properties": self.properties,
-            "strength": self.strength,
+            "strength": round(self.strength, 6),  # float32 in the table
             "created_at": self.created_at.isoformat(),
+            "idle_since": self.idle_since.isoformat(),
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MemoryRelationship":
+        """Create from dictionary"""
+        rel = cls(
+            from_node=data["from_node"],
+            to_node=data["to_node"],
+            rel_type=data["rel_type"],
+            properties=data.get("properties", {}),
+            strength=data.get("strength", 1.0),
+        )
+        rel.created_at = datetime.fromisoformat(data["created_at"])
+        if data.get("idle_since"):
+            rel.idle_since = datetime.fromisoformat(data["idle_since"])
+        return rel
+
+    @property
+    def key(self) -> EdgeKey:
+        """Get the edge key of this relationship"""
+        return (self.from_node, self.to_node, self.rel_type)
+
 
 class MemoryGraph:
-    """In-memory knowledge graph (Neo4j-compatible structure)"""
+    """In-memory knowledge graph (Neo4j-compatible structure)
+
+    Changes to nodes and relationships hold a graph-wide lock, so background
+    ingestion can add turns while other threads write to the graph.
+    """
 
     def __init__(self):
         self.logger = setup_logger("memory.graph")
         self.nodes: Dict[str, MemoryNode] = {}
-        self.relationships: List[MemoryRelationship] = []
+        self.edges = RelationshipTable()
 
         # Indexes for fast lookup
         self.nodes_by_type: Dict[str, List[str]] = {}
-        self.relationships_index: Dict[str, List[MemoryRelationship]] = {}
+        self.outgoing: Dict[str, List[EdgeKey]] = {}
+        self.incoming: Dict[str, List[EdgeKey]] = {}
+
+        # Next shard for decay_next_shard
+        self._decay_cursor = 0
+
+        # Nodes and edges changed or removed since the last pop_dirty
+        self._dirty_nodes: Set[str] = set()
+        self._dirty_edges: Set[EdgeKey] = set()
+
+        # Guards nodes, edges, indexes and dirty sets (reentrant: writes nest)
+        self._lock = threading.RLock()
+
+    @property
+    def relationships(self) -> List[MemoryRelationship]:
+        """All relationships in insertion order"""
+        return [MemoryRelationship.view(self.edges, key) for key in self.edges]
 
     def add_node(self, node: MemoryNode) -> bool:
         """Add node to graph"""
         try:
-            self.nodes[node.node_id] = node
+            with self._lock:
+                self.nodes[node.node_id] = node
 
-            # Update type index
-            if node.node_type not in self.nodes_by_type:
-                self.nodes_by_type[node.node_type] = []
-            self.nodes_by_type[node.node_type].append(node.node_id)
+                # Update type index
+                if node.node_type not in self.nodes_by_type:
+                    self.nodes_by_type[node.node_type] = []
+                self.nodes_by_type[node.node_type].append(node.node_id)
+                self._dirty_nodes.add(node.node_id)
 
             self.logger.debug(f"Added node: {node.node_id} ({node.node_type})")
             return True
@@ -106,17 +330,19 @@ class MemoryGraph:
     def add_relationship(self, rel: MemoryRelationship) -> bool:
         """Add relationship to graph"""
         try:
-            # Verify nodes exist
-            if rel.from_node not in self.nodes or rel.to_node not in self.nodes:
-                self.logger.error("Cannot add relationship: nodes don't exist")
-                return False
-
-            self.relationships.append(rel)
-
-            # Update relationship index
-            if rel.from_node not in self.relationships_index:
-                self.relationships_index[rel.from_node] = []
-            self.relationships_index[rel.from_node].append(rel)
+            with self._lock:
+                # Verify nodes exist
+                if rel.from_node not in self.nodes or rel.to_node not in self.nodes:
+                    self.logger.error("Cannot add relationship: nodes don't exist")
+                    return False
+
+                # An edge with the same endpoints and type is replaced
+                key = rel.key
+                if key not in self.edges:
+                    self.outgoing.setdefault(rel.from_node, []).append(key)
+                    self.incoming.setdefault(rel.to_node, []).append(key)
+                rel.bind(self.edges)
+                self._dirty_edges.add(key)
 
             self.logger.debug(
                 f"Added relationship: {rel.from_node} -[{rel.rel_type}]-> {rel.to_node}"
@@ -128,10 +354,12 @@ class MemoryGraph:
 
     def get_node(self, node_id: str) -> Optional[MemoryNode]:
         """Get node by ID"""
-        node = self.nodes.get(node_id)
-        if node:
-            node.accessed_count += 1
-            node.last_accessed = datetime.now()
+        with self._lock:
+            node = self.nodes.get(node_id)
+            if node:
+                node.accessed_count += 1
+                node.last_accessed_ts = time.time()
+                self._dirty_nodes.add(node_id)
         return node
 
     def get_nodes_by_type(self, node_type: str) -> List[MemoryNode]:
@@ -144,13 +372,46 @@ class MemoryGraph:
     ) -> List[MemoryRelationship]:
         """Get relationships for a node"""
         if direction == "outgoing":
-            return self.relationships_index.get(node_id, [])
+            keys = self.outgoing.get(node_id, [])
         elif direction == "incoming":
-            return [r for r in self.relationships if r.to_node == node_id]
+            keys = self.incoming.get(node_id, [])
         else:  # both
-            outgoing = self.relationships_index.get(node_id, [])
-            incoming = [r for r in self.relationships if r.to_node == node_id]
-            return outgoing + incoming
+            keys = self.outgoing.get(node_id, []) + self.incoming.get(node_id, [])
+        return [MemoryRelationship.view(self.edges, key) for key in keys]
+
+    def get_relationship(
+        self, from_node: str, to_node: str, rel_type: Optional[str] = None
+    ) -> Optional[MemoryRelationship]:
+        """Get the relationship between two nodes (the first one if rel_type is None)"""
+        if rel_type is not None:
+            key = (from_node, to_node, rel_type)
+            return MemoryRelationship.view(self.edges, key) if key in self.edges else None
+
+        for key in self.outgoing.get(from_node, []):
+            if key[1] == to_node:
+                return MemoryRelationship.view(self.edges, key)
+        return None
+
+    def remove_relationship(self, rel: MemoryRelationship) -> bool:
+        """Remove a relationship from the graph"""
+        return self._remove_edges([rel.key]) == 1
+
+    def _remove_edges(self, keys: List[EdgeKey]) -> int:
+        """Remove edges, filtering each affected adjacency list once"""
+        with self._lock:
+            removed = set(self.edges.remove_many(keys))
+            if not removed:
+                return 0
+            self._dirty_edges.update(removed)
+
+            for index, position in ((self.outgoing, 0), (self.incoming, 1)):
+                for node_id in {key[position] for key in removed}:
+                    node_edges = [key for key in index[node_id] if key not in removed]
+                    if node_edges:
+                        index[node_id] = node_edges
+                    else:
+                        del index[node_id]
+            return len(removed)
 
     def find_path(self, from_node: str, to_node: str, max_depth: int = 3) -> Optional[List[str]]:
         """Find shortest path between two nodes (BFS)"""
@@ -160,30 +421,29 @@ class MemoryGraph:
         if from_node == to_node:
             return [from_node]
 
-        visited = set()
-        queue = [(from_node, [from_node])]
+        # Parent pointers instead of copying the path into every queue entry
+        parents: Dict[str, Optional[str]] = {from_node: None}
+        queue = deque([(from_node, 1)])
 
         while queue:
-            current, path = queue.pop(0)
+            current, length = queue.popleft()
 
-            if len(path) > max_depth:
+            if length > max_depth:
                 continue
 
-            if current in visited:
-                continue
-
-            visited.add(current)
-
             # Get neighboring nodes
-            rels = self.get_relationships(current, "outgoing")
-            for rel in rels:
-                neighbor = rel.to_node
+            for _, neighbor, _ in self.outgoing.get(current, []):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = current
 
                 if neighbor == to_node:
-                    return path + [neighbor]
+                    path = [neighbor]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    return path[::-1]
 
-                if neighbor not in visited:
-                    queue.append((neighbor, path + [neighbor]))
+                queue.append((neighbor, length + 1))
 
         return None
 
@@ -194,32 +454,30 @@ class MemoryGraph:
         if node_id not in self.nodes:
             return [], []
 
-        visited_nodes = set([node_id])
-        visited_rels = []
+        visited_nodes = {node_id: None}
+        visited_rels: Dict[EdgeKey, None] = {}
 
-        queue = [(node_id, 0)]
+        queue = deque([(node_id, 0)])
 
         while queue:
-            current, depth = queue.pop(0)
+            current, depth = queue.popleft()
 
             if depth >= max_depth:
                 continue
 
             # Get relationships
-            rels = self.get_relationships(current, "both")
+            for index in (self.outgoing, self.incoming):
+                for key in index.get(current, []):
+                    visited_rels[key] = None
 
-            for rel in rels:
-                if rel not in visited_rels:
-                    visited_rels.append(rel)
-
-                # Add connected nodes
-                for neighbor in [rel.from_node, rel.to_node]:
-                    if neighbor not in visited_nodes:
-                        visited_nodes.add(neighbor)
-                        queue.append((neighbor, depth + 1))
+                    # Add connected nodes
+                    for neighbor in key[:2]:
+                        if neighbor not in visited_nodes:
+                            visited_nodes[neighbor] = None
+                            queue.append((neighbor, depth + 1))
 
         nodes = [self.nodes[nid] for nid in visited_nodes if nid in self.nodes]
-        return nodes, visited_rels
+        return nodes, [MemoryRelationship.view(self.edges, key) for key in visited_rels]
 
     def search_nodes(
         self, query: str, node_type: Optional[str] = None, limit: int = 10
@@ -252,55 +510,115 @@ class MemoryGraph:
 
     def get_recent_nodes(self, limit: int = 10) -> List[MemoryNode]:
         """Get most recently created nodes"""
-        nodes = sorted(self.nodes.values(), key=lambda n: n.created_at, reverse=True)
+        nodes = sorted(self.nodes.values(), key=lambda n: n.created_ts, reverse=True)
         return nodes[:limit]
 
-    def strengthen_relationship(self, from_node: str, to_node: str, amount: float = 0.1):
+    def strengthen_relationship(
+        self, from_node: str, to_node: str, amount: float = 0.1, rel_type: Optional[str] = None
+    ):
         """Strengthen a relationship between nodes"""
-        for rel in self.relationships:
-            if rel.from_node == from_node and rel.to_node == to_node:
-                rel.strength = min(1.0, rel.strength + amount)
-                self.logger.debug(f"Strengthened relationship: {rel.strength:.2f}")
-                return True
-        return False
-
-    def weaken_relationship(self, from_node: str, to_node: str, amount: float = 0.1):
+        with self._lock:
+            rel = self.get_relationship(from_node, to_node, rel_type)
+            if rel is None:
+                return False
+
+            rel.strength = min(1.0, rel.strength + amount)
+            self.edges.touch(rel.key, time.time())
+            self._dirty_edges.add(rel.key)
+        self.logger.debug(f"Strengthened relationship: {rel.strength:.2f}")
+        return True
+
+    def weaken_relationship(
+        self, from_node: str, to_node: str, amount: float = 0.1, rel_type: Optional[str] = None
+    ):
         """Weaken a relationship between nodes"""
-        for rel in self.relationships:
-            if rel.from_node == from_node and rel.to_node == to_node:
-                rel.strength = max(0.0, rel.strength - amount)
-                self.logger.debug(f"Weakened relationship: {rel.strength:.2f}")
-                return True
-        return False
+        with self._lock:
+            rel = self.get_relationship(from_node, to_node, rel_type)
+            if rel is None:
+                return False
+
+            rel.strength = max(0.0, rel.strength - amount)
+            self._dirty_edges.add(rel.key)
+        self.logger.debug(f"Weakened relationship: {rel.strength:.2f}")
+        return True
 
     def prune_weak_relationships(self, threshold: float = 0.3):
         """Remove weak relationships below threshold"""
-        before_count = len(self.relationships)
-        self.relationships = [r for r in self.relationships if r.strength >= threshold]
-        after_count = len(self.relationships)
-
-        pruned = before_count - after_count
+        with self._lock:
+            rows = np.flatnonzero(self.edges.strength[: self.edges.size] < threshold)
+            weak = [self.edges.key_at(row) for row in rows]
+            pruned = self._remove_edges([key for key in weak if key is not None])
         if pruned > 0:
             self.logger.info(f"Pruned {pruned} weak relationships")
 
-        # Rebuild index
-        self.relationships_index = {}
-        for rel in self.relationships:
-            if rel.from_node not in self.relationships_index:
-                self.relationships_index[rel.from_node] = []
-            self.relationships_index[rel.from_node].append(rel)
+    def decay_relationships(
+        self,
+        half_life_days: float = 30.0,
+        threshold: float = 0.1,
+        shard: int = 0,
+        num_shards: int = 1,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, int]:
+        """
+        Decay relationship strength by time since last access, pruning weak edges
+
+        Strength halves every half_life_days an edge goes without being added
+        or strengthened. Edges are sharded by source node; calling this with
+        each shard in turn spreads the work over several short calls.
+
+        Returns:
+            Number of decayed and pruned relationships
+        """
+        now_ts = now.timestamp() if now else time.time()
+        with self._lock:
+            rows = self.edges.shard_rows(shard, num_shards)
+
+            # Decayed edges are not marked dirty: decay from the persisted strength
+            # and idle_since gives the same result, so only pruned edges are saved
+            self.edges.decay(rows, half_life_days * 86400.0, now_ts)
+
+            weak = rows[self.edges.strength[rows] < threshold]
+            pruned = self._remove_edges([self.edges.key_at(row) for row in weak])
+
+        if pruned > 0:
+            self.logger.info(f"Decay pruned {pruned} weak relationships")
+        return {"decayed": len(rows), "pruned": pruned}
+
+    def decay_next_shard(
+        self, half_life_days: float = 30.0, threshold: float = 0.1, num_shards: int = 16
+    ) -> Dict[str, int]:
+        """Decay the next shard in round-robin order (for periodic background calls)"""
+        shard = self._decay_cursor % num_shards
+        self._decay_cursor = shard + 1
+        return self.decay_relationships(half_life_days, threshold, shard, num_shards)
+
+    def pop_dirty(self) -> Tuple[Set[str], Set[EdgeKey]]:
+        """
+        Get and reset the nodes and edges changed since the last call
+
+        Returns:
+            Node IDs and edge keys; ones no longer in the graph were removed
+        """
+        with self._lock:
+            dirty = self._dirty_nodes, self._dirty_edges
+            self._dirty_nodes, self._dirty_edges = set(), set()
+            return dirty
+
+    def mark_dirty(self, node_ids: Iterable[str], edge_keys: Iterable[EdgeKey]):
+        """Mark nodes and edges changed again, after a failed save of popped changes"""
+        with self._lock:
+            self._dirty_nodes.update(node_ids)
+            self._dirty_edges.update(edge_keys)
 
     def get_stats(self) -> Dict[str, Any]:
         """Get graph statistics"""
         return {
             "total_nodes": len(self.nodes),
-            "total_relationships": len(self.relationships),
+            "total_relationships": len(self.edges),
             "node_types": {
                 node_type: len(node_ids) for node_type, node_ids in self.nodes_by_type.items()
             },
-            "avg_connections_per_node": (
-                len(self.relationships) / len(self.nodes) if self.nodes else 0
-            ),
+            "avg_connections_per_node": (len(self.edges) / len(self.nodes) if self.nodes else 0),
         }
 
     def export_to_json(self) -> str:
@@ -315,46 +633,32 @@ class MemoryGraph:
         }
         return json.dumps(data, indent=2)
 
-    def import_from_json(self, json_data: str):
-        """Import graph from JSON"""
-        try:
-            data = json.loads(json_data)
+    def load_records(
+        self, nodes: Iterable[Dict[str, Any]], relationships: Iterable[Dict[str, Any]]
+    ):
+        """Replace the graph with nodes and relationships in to_dict form"""
+        with self._lock:
+            # Everything currently in the graph counts as removed unless re-added
+            self._dirty_nodes.update(self.nodes)
+            self._dirty_edges.update(self.edges)
 
-            # Clear existing data
             self.nodes = {}
-            self.relationships = []
+            self.edges = RelationshipTable()
             self.nodes_by_type = {}
-            self.relationships_index = {}
-
-            # Import nodes
-            for node_data in data["nodes"]:
-                node = MemoryNode(
-                    node_id=node_data["node_id"],
-                    node_type=node_data["node_type"],
-                    content=node_data["content"],
-                    metadata=node_data.get("metadata", {}),
-                    embedding=node_data.get("embedding", []),
-                    created_at=datetime.fromisoformat(node_data["created_at"]),
-                )
-                node.accessed_count = node_data.get("accessed_count", 0)
-                if node_data.get("last_accessed"):
-                    node.last_accessed = datetime.fromisoformat(node_data["last_accessed"])
-
-                self.add_node(node)
-
-            # Import relationships
-            for rel_data in data["relationships"]:
-                rel = MemoryRelationship(
-                    from_node=rel_data["from_node"],
-                    to_node=rel_data["to_node"],
-                    rel_type=rel_data["rel_type"],
-                    properties=rel_data.get("properties", {}),
-                    strength=rel_data.get("strength", 1.0),
-                )
-                rel.created_at = datetime.fromisoformat(rel_data["created_at"])
-
-                self.add_relationship(rel)
+            self.outgoing = {}
+            self.incoming = {}
 
+            for node_data in nodes:
+                self.add_node(MemoryNode.from_dict(node_data))
+
+            for rel_data in relationships:
+                self.add_relationship(MemoryRelationship.from_dict(rel_data))
+
+    def import_from_json(self, json_data: str):
+        """Import graph from JSON"""
+        try:
+            data = json.loads(json_data)
+            self.load_records(data["nodes"], data["relationships"])
             self.logger.info(f"Imported graph with {len(self.nodes)} nodes")
 
         except Exception as e:
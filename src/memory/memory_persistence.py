@@ -4,49 +4,84 @@ Handles saving and loading of memory graph and vector store
 """
 
 import json
+import os
+import threading
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
 
 from src.core.logger import setup_logger
-from src.memory.conversation_tracker import get_conversation_tracker
-from src.memory.entity_mapper import get_entity_mapper
+from src.memory.conversation_tracker import (
+    ConversationSession,
+    ConversationTurn,
+    get_conversation_tracker,
+)
+from src.memory.entity_mapper import Entity, get_entity_mapper
+from src.memory.graph_storage import EdgeKey
 from src.memory.memory_graph import get_memory_graph
+from src.memory.segment_log import LogRecord, SegmentLog
 from src.memory.vector_store import get_memory_manager
 
 
 class MemoryPersistence:
-    """Manages persistence of all memory components"""
+    """Manages persistence of all memory components
 
-    def __init__(self, data_dir: str = "data/memory"):
+    The graph, conversation tracker and entity mapper track what changed, and
+    a save appends only those records to a segment log, so it takes time in
+    proportion to the changes rather than to the whole memory. Load replays
+    the log. Superseded records are merged away in a background thread.
+
+    Conversation turns are appended to one file per session instead, and
+    loading a session only reads its details; the tracker reads its turns
+    when they are first needed.
+    """
+
+    def __init__(self, data_dir: str = "data/memory", background_compaction: bool = True):
         self.logger = setup_logger("memory.persistence")
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
+        self.log = SegmentLog(self.data_dir / "segments")
+        self.sessions_dir = self.data_dir / "sessions"
+        self.sessions_dir.mkdir(exist_ok=True)
+        self.background_compaction = background_compaction
+        self._compactor: Optional[threading.Thread] = None
+
         # File paths
+        self.metadata_file = self.data_dir / "metadata.json"
+
+        # Full snapshots written by earlier versions, migrated on first load
         self.graph_file = self.data_dir / "memory_graph.json"
         self.conversations_file = self.data_dir / "conversations.json"
         self.entities_file = self.data_dir / "entities.json"
-        self.metadata_file = self.data_dir / "metadata.json"
 
     def save_all(self) -> bool:
-        """Save all memory components"""
+        """Save changes to all memory components since the last save or load"""
         try:
-            self.logger.info("Saving all memory components...")
-
-            # Save graph
-            self._save_graph()
-
-            # Save conversations
-            self._save_conversations()
+            self.logger.info("Saving changed memory records...")
 
-            # Save entities
-            self._save_entities()
+            tracker = get_conversation_tracker()
+            tracker.set_turn_reader(self._read_turns)
+
+            # Include turns still waiting in the ingestion queue
+            tracker.flush()
+            changes = self._pop_dirty()
+            try:
+                written = self._write(*changes)
+            except Exception:
+                # Saved again by the next save, minus turns already on disk
+                self._mark_dirty(*changes)
+                raise
 
             # Save metadata
             self._save_metadata()
 
-            self.logger.info("All memory components saved successfully")
+            if self.log.needs_compaction():
+                self.compact()
+
+            self.logger.info(f"Saved {written} changed memory records")
             return True
 
         except Exception as e:
@@ -57,15 +92,18 @@ class MemoryPersistence:
         """Load all memory components"""
         try:
             self.logger.info("Loading all memory components...")
+            get_conversation_tracker().set_turn_reader(self._read_turns)
 
-            # Load graph
-            self._load_graph()
-
-            # Load conversations
-            self._load_conversations()
+            if not self.log.exists and self._has_legacy_files():
+                self._migrate_legacy_files()
+            else:
+                state = self.log.replay()
+                self._restore_graph(state)
+                self._restore_conversations(state)
+                self._restore_entities(state)
 
-            # Load entities
-            self._load_entities()
+            # Everything loaded is already on disk
+            self._pop_dirty()
 
             self.logger.info("All memory components loaded successfully")
             return True
@@ -74,18 +112,231 @@ class MemoryPersistence:
             self.logger.error(f"Error loading memory: {e}")
             return False
 
-    def _save_graph(self):
-        """Save memory graph"""
+    def compact(self, wait: bool = False):
+        """Merge superseded records, in a background thread unless disabled"""
+        if not self.background_compaction:
+            self.log.compact()
+            return
+
+        if self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(
+                target=self.log.compact, name="memory-compaction", daemon=True
+            )
+            self._compactor.start()
+
+        if wait:
+            self._compactor.join()
+
+    def _pop_dirty(self) -> Tuple:
+        """Get and reset the changes tracked by each component"""
+        node_ids, edge_keys = get_memory_graph().pop_dirty()
+        session_ids, turns = get_conversation_tracker().pop_dirty()
+        # Sessions with new turns have a new turn count to save
+        session_ids |= {session_id for session_id, _ in turns}
+        entity_ids = get_entity_mapper().pop_dirty()
+        return node_ids, edge_keys, session_ids, turns, entity_ids
+
+    def _mark_dirty(
+        self,
+        node_ids: Iterable[str],
+        edge_keys: Iterable[EdgeKey],
+        session_ids: Iterable[str],
+        turns: List[Tuple[str, ConversationTurn]],
+        entity_ids: Iterable[str],
+    ):
+        """Hand changes returned by _pop_dirty back to their components"""
+        get_memory_graph().mark_dirty(node_ids, edge_keys)
+        get_conversation_tracker().mark_dirty(session_ids, turns)
+        get_entity_mapper().mark_dirty(entity_ids)
+
+    def _all_changes(self) -> Tuple:
+        """Get the complete memory in the form returned by _pop_dirty"""
+        graph = get_memory_graph()
+        tracker = get_conversation_tracker()
+        turns = [
+            (session_id, turn)
+            for session_id, session in tracker.sessions.items()
+            for turn in session.turns
+        ]
+        return graph.nodes, graph.edges, tracker.sessions, turns, get_entity_mapper().entities
+
+    def _write(
+        self,
+        node_ids: Iterable[str],
+        edge_keys: Iterable[EdgeKey],
+        session_ids: Iterable[str],
+        turns: List[Tuple[str, ConversationTurn]],
+        entity_ids: Iterable[str],
+    ) -> int:
+        """
+        Append turns to session files and all other changes to the log
+
+        Turns written before a failure are removed from turns, so a retry
+        does not append them twice.
+        """
+        session_ids = set(session_ids) | {session_id for session_id, _ in turns}
+
+        # Turns first, so a saved turn count never exceeds the turns on disk
+        self._append_turns(turns)
+
+        return self.log.append(self._records(node_ids, edge_keys, session_ids, entity_ids))
+
+    def _records(
+        self,
+        node_ids: Iterable[str],
+        edge_keys: Iterable[EdgeKey],
+        session_ids: Iterable[str],
+        entity_ids: Iterable[str],
+    ) -> Iterator[LogRecord]:
+        """Build log records; IDs no longer present become deletions"""
+        graph = get_memory_graph()
+        for node_id in node_ids:
+            node = graph.nodes.get(node_id)
+            yield "node", node_id, node.to_dict() if node else None
+
+        for key in edge_keys:
+            rel = graph.get_relationship(*key)
+            yield "edge", list(key), rel.to_dict() if rel else None
+
+        tracker = get_conversation_tracker()
+        session_ids = list(session_ids)
+        for session_id in session_ids:
+            session = tracker.sessions.get(session_id)
+            yield "session", session_id, session.to_dict(include_turns=False) if session else None
+
+        if session_ids:
+            current = tracker.current_session
+            yield "state", "current_session", {
+                "session_id": current.session_id if current else None
+            }
+
+        mapper = get_entity_mapper()
+        for entity_id in entity_ids:
+            entity = mapper.entities.get(entity_id)
+            yield "entity", entity_id, entity.to_dict() if entity else None
+
+    def _restore_graph(self, state: Dict[str, Dict[Any, Dict[str, Any]]]):
+        """Rebuild the memory graph from replayed records"""
+        if "node" not in state:
+            self.logger.debug("No graph records found, starting fresh")
+            return
+
         graph = get_memory_graph()
-        graph_json = graph.export_to_json()
+        graph.load_records(state["node"].values(), state.get("edge", {}).values())
+        self.logger.debug(f"Loaded graph with {len(graph.nodes)} nodes")
+
+    def _restore_conversations(self, state: Dict[str, Dict[Any, Dict[str, Any]]]):
+        """Rebuild conversation sessions from replayed records"""
+        if "session" not in state:
+            self.logger.debug("No conversation records found, starting fresh")
+            return
+
+        # Turns stay on disk until a session is used
+        tracker = get_conversation_tracker()
+        for session_data in state["session"].values():
+            session = ConversationSession.from_dict(session_data)
+            tracker.add_stored_session(session, session_data.get("turn_count", 0))
+
+        # Restore current session
+        current_session_id = state.get("state", {}).get("current_session", {}).get("session_id")
+        if current_session_id and current_session_id in tracker.sessions:
+            tracker.current_session = tracker.sessions[current_session_id]
+
+        self.logger.debug(f"Loaded {len(state['session'])} conversation sessions")
 
-        with open(self.graph_file, "w") as f:
-            f.write(graph_json)
+    def _restore_entities(self, state: Dict[str, Dict[Any, Dict[str, Any]]]):
+        """Rebuild entities from replayed records"""
+        if "entity" not in state:
+            self.logger.debug("No entity records found, starting fresh")
+            return
+
+        mapper = get_entity_mapper()
+        for entity_data in state["entity"].values():
+            entity = Entity.from_dict(entity_data)
+            mapper.entities[entity.entity_id] = entity
+            mapper.entity_name_index[entity.name] = entity.entity_id
+
+        self.logger.debug(f"Loaded {len(state['entity'])} entities")
+
+    def _has_legacy_files(self) -> bool:
+        """Check for full snapshots written by earlier versions"""
+        return any(
+            path.exists() for path in (self.graph_file, self.conversations_file, self.entities_file)
+        )
+
+    def _migrate_legacy_files(self):
+        """Load full snapshot files and move their contents into the segment log"""
+        self.logger.info("Migrating memory snapshot files to segment log")
+
+        self._load_graph()
+        self._load_conversations()
+        self._load_entities()
+
+        self._write(*self._all_changes())
+        for path in (self.graph_file, self.conversations_file, self.entities_file):
+            if path.exists():
+                path.rename(path.with_suffix(".json.migrated"))
+
+        # Saved now, so past sessions need not keep their turns in memory
+        tracker = get_conversation_tracker()
+        for session in list(tracker.sessions.values()):
+            if session is not tracker.current_session:
+                tracker.add_stored_session(session, session.turn_count)
 
-        self.logger.debug(f"Saved graph to {self.graph_file}")
+    def _turns_path(self, session_id: str) -> Path:
+        """Get the turn file of a session"""
+        return self.sessions_dir / f"{quote(session_id, safe='')}.jsonl"
+
+    def _append_turns(self, turns: List[Tuple[str, ConversationTurn]]):
+        """Append turns to their session files, removing them from turns once written"""
+        by_session: Dict[str, List[str]] = defaultdict(list)
+        for session_id, turn in turns:
+            by_session[session_id].append(json.dumps(turn.to_dict(), separators=(",", ":")))
+
+        written = set()
+        try:
+            for session_id, lines in by_session.items():
+                path = self._turns_path(session_id)
+                size = path.stat().st_size if path.exists() else 0
+                try:
+                    with open(path, "a") as f:
+                        f.write("\n".join(lines) + "\n")
+                except Exception:
+                    # Drop a partial write, so the turns can be appended again
+                    if path.exists():
+                        os.truncate(path, size)
+                    raise
+                written.add(session_id)
+        finally:
+            turns[:] = [
+                (session_id, turn) for session_id, turn in turns if session_id not in written
+            ]
+
+    def _read_turns(self, session_id: str) -> List[ConversationTurn]:
+        """Read the saved turns of a session"""
+        path = self._turns_path(session_id)
+        if not path.exists():
+            return []
+
+        turns = []
+        with open(path, "rb+") as f:
+            end = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn write at the end of the file, dropped so appends stay parseable
+                    self.logger.warning(f"Truncating incomplete turn of session {session_id}")
+                    f.truncate(end)
+                    break
+                end += len(line)
+
+                try:
+                    turns.append(ConversationTurn.from_dict(json.loads(line)))
+                except ValueError:
+                    self.logger.warning(f"Skipping unreadable turn of session {session_id}")
+        return turns
 
     def _load_graph(self):
-        """Load memory graph"""
+        """Load memory graph snapshot file"""
         if not self.graph_file.exists():
             self.logger.debug("No graph file found, starting fresh")
             return
@@ -98,26 +349,8 @@ class MemoryPersistence:
 
         self.logger.debug(f"Loaded graph from {self.graph_file}")
 
-    def _save_conversations(self):
-        """Save conversation history"""
-        tracker = get_conversation_tracker()
-
-        data = {
-            "sessions": {
-                session_id: session.to_dict() for session_id, session in tracker.sessions.items()
-            },
-            "current_session_id": (
-                tracker.current_session.session_id if tracker.current_session else None
-            ),
-        }
-
-        with open(self.conversations_file, "w") as f:
-            json.dump(data, f, indent=2)
-
-        self.logger.debug(f"Saved conversations to {self.conversations_file}")
-
     def _load_conversations(self):
-        """Load conversation history"""
+        """Load conversation history snapshot file"""
         if not self.conversations_file.exists():
             self.logger.debug("No conversations file found, starting fresh")
             return
@@ -128,28 +361,8 @@ class MemoryPersistence:
         tracker = get_conversation_tracker()
 
         # Reconstruct sessions
-        from src.memory.conversation_tracker import ConversationSession, ConversationTurn
-
         for session_id, session_data in data["sessions"].items():
-            session = ConversationSession(session_id, session_data["topic"])
-            session.started_at = datetime.fromisoformat(session_data["started_at"])
-            if session_data["ended_at"]:
-                session.ended_at = datetime.fromisoformat(session_data["ended_at"])
-            session.summary = session_data.get("summary")
-            session.key_facts = session_data.get("key_facts", [])
-
-            # Reconstruct turns
-            for turn_data in session_data["turns"]:
-                turn = ConversationTurn(
-                    turn_id=turn_data["turn_id"],
-                    speaker=turn_data["speaker"],
-                    content=turn_data["content"],
-                    timestamp=datetime.fromisoformat(turn_data["timestamp"]),
-                    metadata=turn_data.get("metadata", {}),
-                )
-                session.add_turn(turn)
-
-            tracker.sessions[session_id] = session
+            tracker.sessions[session_id] = ConversationSession.from_dict(session_data)
 
         # Restore current session
         current_session_id = data.get("current_session_id")
@@ -158,24 +371,8 @@ class MemoryPersistence:
 
         self.logger.debug(f"Loaded conversations from {self.conversations_file}")
 
-    def _save_entities(self):
-        """Save entity mapper data"""
-        mapper = get_entity_mapper()
-
-        data = {
-            "entities": {
-                entity_id: entity.to_dict() for entity_id, entity in mapper.entities.items()
-            },
-            "entity_name_index": mapper.entity_name_index,
-        }
-
-        with open(self.entities_file, "w") as f:
-            json.dump(data, f, indent=2)
-
-        self.logger.debug(f"Saved entities to {self.entities_file}")
-
     def _load_entities(self):
-        """Load entity mapper data"""
+        """Load entity mapper snapshot file"""
         if not self.entities_file.exists():
             self.logger.debug("No entities file found, starting fresh")
             return
@@ -186,20 +383,8 @@ class MemoryPersistence:
         mapper = get_entity_mapper()
 
         # Reconstruct entities
-        from src.memory.entity_mapper import Entity, EntityType
-
         for entity_id, entity_data in data["entities"].items():
-            entity = Entity(
-                entity_id=entity_id,
-                name=entity_data["name"],
-                entity_type=EntityType(entity_data["type"]),
-                attributes=entity_data.get("attributes", {}),
-            )
-            entity.first_seen = datetime.fromisoformat(entity_data["first_seen"])
-            entity.last_seen = datetime.fromisoformat(entity_data["last_seen"])
-            entity.mention_count = entity_data.get("mention_count", 1)
-
-            mapper.entities[entity_id] = entity
+            mapper.entities[entity_id] = Entity.from_dict({**entity_data, "entity_id": entity_id})
 
         mapper.entity_name_index = data.get("entity_name_index", {})
 
@@ -216,6 +401,7 @@ class MemoryPersistence:
             "graph_stats": graph.get_stats(),
             "conversation_stats": tracker.get_statistics(),
             "entity_stats": mapper.get_statistics(),
+            "log_stats": {"records": self.log.records, "live_records": self.log.live},
         }
 
         with open(self.metadata_file, "w") as f:
@@ -273,44 +459,37 @@ class MemoryPersistence:
             graph.import_from_json(json.dumps(dump["graph"]))
 
             # Load conversations
-            from src.memory.conversation_tracker import ConversationSession, ConversationTurn
-
             tracker = get_conversation_tracker()
             for session_id, session_data in dump["conversations"].items():
-                session = ConversationSession(session_id, session_data["topic"])
-                session.started_at = datetime.fromisoformat(session_data["started_at"])
-                if session_data["ended_at"]:
-                    session.ended_at = datetime.fromisoformat(session_data["ended_at"])
-                session.summary = session_data.get("summary")
-                session.key_facts = session_data.get("key_facts", [])
-
-                for turn_data in session_data["turns"]:
-                    turn = ConversationTurn(
-                        turn_id=turn_data["turn_id"],
-                        speaker=turn_data["speaker"],
-                        content=turn_data["content"],
-                        timestamp=datetime.fromisoformat(turn_data["timestamp"]),
-                        metadata=turn_data.get("metadata", {}),
-                    )
-                    session.add_turn(turn)
-
-                tracker.sessions[session_id] = session
+                tracker.sessions[session_id] = ConversationSession.from_dict(session_data)
 
             # Load entities
-            from src.memory.entity_mapper import Entity, EntityType
-
             mapper = get_entity_mapper()
             for entity_id, entity_data in dump["entities"].items():
-                entity = Entity(
-                    entity_id=entity_id,
-                    name=entity_data["name"],
-                    entity_type=EntityType(entity_data["type"]),
-                    attributes=entity_data.get("attributes", {}),
-                )
-                entity.first_seen = datetime.fromisoformat(entity_data["first_seen"])
-                entity.last_seen = datetime.fromisoformat(entity_data["last_seen"])
-                entity.mention_count = entity_data.get("mention_count", 1)
-                mapper.entities[entity_id] = entity
+                mapper.entities[entity_id] = Entity.from_dict(entity_data)
+
+            # Write imported records to the log along with any pending changes
+            # Imported sessions replace saved ones, turns included
+            node_ids, edge_keys, session_ids, turns, entity_ids = self._pop_dirty()
+            turns = [
+                (session_id, turn)
+                for session_id, turn in turns
+                if session_id not in dump["conversations"]
+            ]
+            for session_id in dump["conversations"]:
+                self._turns_path(session_id).unlink(missing_ok=True)
+            imported_turns = [
+                (session_id, turn)
+                for session_id in dump["conversations"]
+                for turn in tracker.sessions[session_id].turns
+            ]
+            self._write(
+                node_ids,
+                edge_keys,
+                set(session_ids) | set(dump["conversations"]),
+                turns + imported_turns,
+                set(entity_ids) | set(dump["entities"]),
+            )
 
             # Load vector store
             manager = get_memory_manager()
@@ -318,6 +497,7 @@ class MemoryPersistence:
             manager.vector_store.documents = vector_data.get("documents", {})
             manager.vector_store.metadata = vector_data.get("metadata", {})
             manager.vector_store.collections = vector_data.get("collections", {})
+            manager.vector_store.save()
 
             self.logger.info(f"Imported memory dump from {dump_file}")
             return True
@@ -330,16 +510,11 @@ class MemoryPersistence:
         """Get size of memory components in bytes"""
         sizes = {}
 
-        for file_name, file_path in [
-            ("graph", self.graph_file),
-            ("conversations", self.conversations_file),
-            ("entities", self.entities_file),
-            ("metadata", self.metadata_file),
-        ]:
-            if file_path.exists():
-                sizes[file_name] = file_path.stat().st_size
-            else:
-                sizes[file_name] = 0
+        sizes["log"] = sum(
+            path.stat().st_size for path in self.log.segment_files() if path.exists()
+        )
+        sizes["sessions"] = sum(path.stat().st_size for path in self.sessions_dir.glob("*.jsonl"))
+        sizes["metadata"] = self.metadata_file.stat().st_size if self.metadata_file.exists() else 0
 
         sizes["total"] = sum(sizes.values())
         return sizes
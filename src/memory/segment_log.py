@@ -0,0 +1,239 @@
+"""
+Segment Log
+Append-only, segmented JSON-lines log of keyed records with background-safe compaction
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.core.logger import setup_logger
+
+# Record: (kind, key, value); a None value deletes the key
+LogRecord = Tuple[str, Any, Optional[Dict[str, Any]]]
+
+# First line of a segment written by compaction; replay starts from the last one
+_BASE_MARKER = b'{"base":true}\n'
+
+
+def _hashable(key: Any) -> Any:
+    """Turn a JSON-decoded key back into a dict key"""
+    return tuple(key) if isinstance(key, list) else key
+
+
+class SegmentLog:
+    """Keyed records appended to numbered segment files
+
+    Each save appends only changed records to the active segment, which is
+    sealed and replaced by a new one once it grows past segment_size.
+    Replay applies segments in order, the last record for a key winning.
+
+    Compaction merges sealed segments into a single base segment. It only
+    reads and replaces sealed files, so appends can continue while it runs
+    in another thread. Replay ignores segments older than the newest base
+    segment, so an interrupted compaction never resurrects deleted keys.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_size: int = 4 * 1024 * 1024,
+        compact_ratio: float = 0.5,
+        min_compact_records: int = 1000,
+    ):
+        self.logger = setup_logger("memory.segment_log")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.segment_size = segment_size
+        self.compact_ratio = compact_ratio
+        self.min_compact_records = min_compact_records
+
+        self._lock = threading.Lock()
+        self._compacting = False
+        self._segments: Dict[int, int] = {}  # segment number -> records, in order
+        self._live: Set[Tuple[str, Any]] = set()  # (kind, key) of live records
+
+        for path in self.directory.glob("*.compact"):
+            path.unlink()  # Left by an interrupted compaction
+
+    @property
+    def exists(self) -> bool:
+        """Check if any segment has been written"""
+        return any(self.directory.glob("segment_*.jsonl"))
+
+    @property
+    def records(self) -> int:
+        """Number of records in all segments"""
+        return sum(self._segments.values())
+
+    @property
+    def live(self) -> int:
+        """Number of live keys"""
+        return len(self._live)
+
+    def replay(self) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+        """
+        Read all segments
+
+        Returns:
+            kind -> key -> value for every live key, in first-write order
+        """
+        numbers = sorted(
+            int(path.stem.split("_")[1]) for path in self.directory.glob("segment_*.jsonl")
+        )
+
+        # Everything before the newest base segment has been merged into it
+        start = 0
+        for i, number in enumerate(numbers):
+            with open(self._segment_path(number), "rb") as f:
+                if f.readline() == _BASE_MARKER:
+                    start = i
+
+        for number in numbers[:start]:
+            self._segment_path(number).unlink()  # Left by an interrupted compaction
+
+        state: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self._segments = {}
+        for number in numbers[start:]:
+            self._segments[number] = self._replay_segment(number, state)
+
+        self._live = {(kind, key) for kind, values in state.items() for key in values}
+        return state
+
+    def _replay_segment(self, number: int, state: Dict[str, Dict[Any, Dict[str, Any]]]) -> int:
+        """Apply the records of one segment, returning how many there were"""
+        records = 0
+        with open(self._segment_path(number), "rb+") as f:
+            end = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn write at the end of the segment, dropped so appends stay parseable
+                    self.logger.warning(f"Truncating incomplete record in segment {number}")
+                    f.truncate(end)
+                    break
+                end += len(line)
+
+                if line == _BASE_MARKER:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    self.logger.warning(f"Skipping unreadable record in segment {number}")
+                    continue
+
+                records += 1
+                values = state.setdefault(record["kind"], {})
+                key = _hashable(record["key"])
+                if record.get("value") is None:
+                    values.pop(key, None)
+                else:
+                    values[key] = record["value"]
+        return records
+
+    def append(self, records: Iterable[LogRecord]) -> int:
+        """Append records to the active segment, returning how many were written"""
+        lines = []
+        live_changes = []
+        for kind, key, value in records:
+            lines.append(
+                json.dumps({"kind": kind, "key": key, "value": value}, separators=(",", ":"))
+            )
+            live_changes.append(((kind, _hashable(key)), value is not None))
+
+        if not lines:
+            return 0
+
+        with self._lock:
+            number = self._active_segment()
+            path = self._segment_path(number)
+            size = path.stat().st_size if path.exists() else 0
+            try:
+                with open(path, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+            except Exception:
+                # Drop a partial write, so the records can be appended again
+                if path.exists():
+                    os.truncate(path, size)
+                raise
+            self._segments[number] += len(lines)
+
+            for live_key, live in live_changes:
+                if live:
+                    self._live.add(live_key)
+                else:
+                    self._live.discard(live_key)
+
+        return len(lines)
+
+    def needs_compaction(self) -> bool:
+        """Check if superseded records make up enough of the log to merge it"""
+        records = self.records
+        garbage = records - len(self._live)
+        return records >= self.min_compact_records and garbage > self.compact_ratio * records
+
+    def compact(self):
+        """Seal the active segment and merge all sealed segments into one base segment"""
+        with self._lock:
+            if self._compacting or not self._segments:
+                return
+            self._compacting = True
+
+            # Later appends go to a fresh segment
+            sealed = list(self._segments)
+            self._segments[sealed[-1] + 1] = 0
+
+        try:
+            state: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+            for number in sealed:
+                self._replay_segment(number, state)
+
+            # Written next to the last sealed segment, then swapped in atomically
+            target = self._segment_path(sealed[-1])
+            tmp_path = target.with_suffix(".compact")
+            records = 0
+            with open(tmp_path, "w") as f:
+                f.write(_BASE_MARKER.decode())
+                for kind, values in state.items():
+                    for key, value in values.items():
+                        record = {"kind": kind, "key": key, "value": value}
+                        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                        records += 1
+            os.replace(tmp_path, target)
+
+            for number in sealed[:-1]:
+                self._segment_path(number).unlink()
+
+            with self._lock:
+                for number in sealed[:-1]:
+                    del self._segments[number]
+                self._segments[sealed[-1]] = records
+
+            self.logger.info(f"Compacted {len(sealed)} segments to {records} records")
+
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _active_segment(self) -> int:
+        """Get the segment to append to, starting a new one when it is full"""
+        if not self._segments:
+            self._segments[1] = 0
+            return 1
+
+        number = next(reversed(self._segments))
+        path = self._segment_path(number)
+        if path.exists() and path.stat().st_size >= self.segment_size:
+            number += 1
+            self._segments[number] = 0
+        return number
+
+    def segment_files(self) -> List[Path]:
+        """Get the segment files in replay order"""
+        return [self._segment_path(number) for number in self._segments]
+
+    def _segment_path(self, number: int) -> Path:
+        """Get the file of a segment"""
+        return self.directory / f"segment_{number:08d}.jsonl"
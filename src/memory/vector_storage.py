@@ -0,0 +1,359 @@
+"""
+Vector Storage
+Append-only binary persistence for the vector store
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.logger import setup_logger
+
+# Bytes per float32 component
+_ITEM_SIZE = np.dtype(np.float32).itemsize
+
+
+class StoredDocument:
+    """Replayed state of one document in the log"""
+
+    __slots__ = ("doc_id", "collection", "document", "metadata", "row", "norm")
+
+    def __init__(
+        self,
+        doc_id: str,
+        collection: str,
+        document: Dict[str, Any],
+        metadata: Dict[str, Any],
+        row: Optional[int],
+        norm: float,
+    ):
+        self.doc_id = doc_id
+        self.collection = collection
+        self.document = document
+        self.metadata = metadata
+        self.row = row
+        self.norm = norm
+
+
+class VectorStorage:
+    """Raw float32 vector files plus an append-only JSON-lines metadata log
+
+    Layout of the storage directory:
+        manifest.json         embedding dimension per collection, current generation
+        log.jsonl             add / metadata / delete records, replayed on load
+        vectors/<name>.f32    unit-normalized rows, appended, memory-mapped on load
+
+    Overwritten rows and superseded records are garbage until compaction
+    rewrites the files with live documents only. Compaction writes a new
+    generation (log.<n>.jsonl and vectors.<n>/) beside the current one and
+    switches to it by rewriting the manifest, so a crash at any point leaves
+    one complete generation; files of other generations are removed.
+
+    Not thread-safe: VectorStore makes every call under its lock.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        compact_ratio: float = 0.5,
+        min_compact_records: int = 1000,
+    ):
+        self.logger = setup_logger("memory.vector_storage")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest_file = self.directory / "manifest.json"
+
+        self.compact_ratio = compact_ratio
+        self.min_compact_records = min_compact_records
+
+        self._dims: Dict[str, int] = {}  # collection -> embedding dimension
+        self._row_counts: Dict[str, int] = {}  # collection -> rows in vector file
+        self._records = 0  # Records in log
+        self._live = 0  # Live documents
+
+        self._set_generation(self._read_manifest())
+        self.vectors_dir.mkdir(parents=True, exist_ok=True)
+        self._remove_other_generations()
+
+    @property
+    def exists(self) -> bool:
+        """Check if storage has been written"""
+        return self.log_file.exists()
+
+    def load(self) -> Tuple[List[StoredDocument], Dict[str, np.ndarray]]:
+        """
+        Replay the log and memory-map the vector files
+
+        Returns:
+            Live documents in insertion order, and collection -> (rows, dim) memmap
+        """
+        self._read_manifest()
+
+        documents: Dict[str, StoredDocument] = {}
+        self._records = 0
+
+        if self.log_file.exists():
+            with open(self.log_file, "rb+") as f:
+                end = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn write at the end of the log, dropped so appends stay parseable
+                        self.logger.warning("Truncating incomplete vector log record")
+                        f.truncate(end)
+                        break
+                    end += len(line)
+
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        self.logger.warning("Skipping unreadable vector log record")
+                        continue
+
+                    self._records += 1
+                    self._replay(documents, record)
+
+        vectors = {}
+        for collection, dim in self._dims.items():
+            path = self._vector_path(collection)
+            rows = path.stat().st_size // (dim * _ITEM_SIZE) if path.exists() else 0
+            self._row_counts[collection] = rows
+            if rows:
+                vectors[collection] = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim))
+
+        self._live = len(documents)
+        return list(documents.values()), vectors
+
+    def _replay(self, documents: Dict[str, StoredDocument], record: Dict[str, Any]):
+        """Apply one log record"""
+        op = record.get("op")
+        doc_id = record.get("id")
+
+        if op == "add":
+            documents[doc_id] = StoredDocument(
+                doc_id,
+                record["collection"],
+                record["document"],
+                record.get("metadata", {}),
+                record.get("row"),
+                record.get("norm", 0.0),
+            )
+        elif op == "metadata" and doc_id in documents:
+            documents[doc_id].metadata = record["metadata"]
+        elif op == "delete":
+            documents.pop(doc_id, None)
+
+    def append_document(
+        self,
+        doc_id: str,
+        collection: str,
+        document: Dict[str, Any],
+        metadata: Dict[str, Any],
+        unit_row: Optional[np.ndarray],
+        norm: float,
+        replaces: bool = False,
+    ):
+        """Append a document (and its unit-normalized embedding row)"""
+        self.append_documents([(doc_id, collection, document, metadata, unit_row, norm, replaces)])
+
+    def append_documents(
+        self,
+        documents: List[
+            Tuple[str, str, Dict[str, Any], Dict[str, Any], Optional[np.ndarray], float, bool]
+        ],
+    ):
+        """
+        Append several documents with one write per file
+
+        Args:
+            documents: (doc_id, collection, document, metadata, unit_row, norm, replaces) tuples
+        """
+        # Rows first, so records never point past the end of a vector file
+        rows: Dict[str, List[np.ndarray]] = {}
+        for _, collection, _, _, unit_row, _, _ in documents:
+            if unit_row is not None:
+                rows.setdefault(collection, []).append(unit_row)
+        next_rows = {
+            collection: self._append_rows(collection, np.vstack(collection_rows))
+            for collection, collection_rows in rows.items()
+        }
+
+        records = []
+        for doc_id, collection, document, metadata, unit_row, norm, replaces in documents:
+            row = None
+            if unit_row is not None:
+                row = next_rows[collection]
+                next_rows[collection] += 1
+
+            records.append(
+                {
+                    "op": "add",
+                    "id": doc_id,
+                    "collection": collection,
+                    "document": document,
+                    "metadata": metadata,
+                    "row": row,
+                    "norm": float(norm),
+                }
+            )
+            if not replaces:
+                self._live += 1
+
+        self._append_records(records)
+
+    def append_metadata(self, doc_id: str, metadata: Dict[str, Any]):
+        """Append the new metadata of a document"""
+        self._append_record({"op": "metadata", "id": doc_id, "metadata": metadata})
+
+    def append_delete(self, doc_id: str):
+        """Append a document deletion"""
+        self._append_record({"op": "delete", "id": doc_id})
+        self._live -= 1
+
+    def needs_compaction(self) -> bool:
+        """Check if garbage records make up enough of the log to rewrite it"""
+        garbage = self._records - self._live
+        return self._records >= self.min_compact_records and garbage > self.compact_ratio * (
+            self._records
+        )
+
+    def rewrite(
+        self,
+        documents: Iterable[
+            Tuple[str, str, Dict[str, Any], Dict[str, Any], Optional[np.ndarray], float]
+        ],
+    ):
+        """
+        Replace storage with a snapshot of live documents
+
+        Args:
+            documents: (doc_id, collection, document, metadata, unit_row, norm) tuples
+        """
+        generation = self._generation + 1
+        rows: Dict[str, List[np.ndarray]] = {}
+        dims: Dict[str, int] = {}
+        records = 0
+
+        # The new generation is invisible until the manifest names it
+        new_log = self._log_path(generation)
+        new_vectors_dir = self._vectors_dir_path(generation)
+        shutil.rmtree(new_vectors_dir, ignore_errors=True)
+        new_vectors_dir.mkdir(parents=True)
+
+        with open(new_log, "w") as log:
+            for doc_id, collection, document, metadata, unit_row, norm in documents:
+                row = None
+                if unit_row is not None:
+                    collection_rows = rows.setdefault(collection, [])
+                    row = len(collection_rows)
+                    collection_rows.append(np.asarray(unit_row, dtype=np.float32))
+                    dims[collection] = len(unit_row)
+
+                record = {
+                    "op": "add",
+                    "id": doc_id,
+                    "collection": collection,
+                    "document": document,
+                    "metadata": metadata,
+                    "row": row,
+                    "norm": float(norm),
+                }
+                log.write(json.dumps(record, separators=(",", ":")) + "\n")
+                records += 1
+
+        for collection, collection_rows in rows.items():
+            vector_path = new_vectors_dir / f"{collection}.f32"
+            np.vstack(collection_rows).astype(np.float32).tofile(vector_path)
+
+        # Switch generations atomically, then drop the old files
+        previous = (self._dims, self._generation)
+        self._dims = dims
+        self._set_generation(generation)
+        try:
+            self._write_manifest()
+        except Exception:
+            # Keep appending to the generation the manifest still names
+            self._dims = previous[0]
+            self._set_generation(previous[1])
+            raise
+
+        self._row_counts = {collection: len(r) for collection, r in rows.items()}
+        self._records = records
+        self._live = records
+        self._remove_other_generations()
+        self.logger.info(f"Compacted vector storage to {records} documents")
+
+    def _append_rows(self, collection: str, unit_rows: np.ndarray) -> int:
+        """Append rows to a collection's vector file, returning the index of the first"""
+        unit_rows = np.atleast_2d(np.asarray(unit_rows, dtype=np.float32))
+
+        if collection not in self._dims:
+            self._dims[collection] = unit_rows.shape[1]
+            self._row_counts[collection] = 0
+            self._write_manifest()
+
+        row = self._row_counts[collection]
+        with open(self._vector_path(collection), "ab") as f:
+            # Drop a torn row left by an interrupted write
+            f.truncate(row * self._dims[collection] * _ITEM_SIZE)
+            f.write(unit_rows.tobytes())
+
+        self._row_counts[collection] = row + len(unit_rows)
+        return row
+
+    def _append_record(self, record: Dict[str, Any]):
+        """Append one record to the log"""
+        self._append_records([record])
+
+    def _append_records(self, records: List[Dict[str, Any]]):
+        """Append records to the log in one write"""
+        with open(self.log_file, "a") as f:
+            f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+        self._records += len(records)
+
+    def _read_manifest(self) -> int:
+        """Read collection dimensions, returning the current generation"""
+        if not self.manifest_file.exists():
+            return 0
+
+        with open(self.manifest_file, "r") as f:
+            manifest = json.load(f)
+        self._dims = manifest.get("dims", {})
+        return manifest.get("generation", 0)
+
+    def _write_manifest(self):
+        """Write collection dimensions and the current generation"""
+        tmp_file = self.manifest_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump({"version": 1, "dims": self._dims, "generation": self._generation}, f)
+        os.replace(tmp_file, self.manifest_file)
+
+    def _set_generation(self, generation: int):
+        """Point the log and vector files at a generation"""
+        self._generation = generation
+        self.log_file = self._log_path(generation)
+        self.vectors_dir = self._vectors_dir_path(generation)
+
+    def _log_path(self, generation: int) -> Path:
+        """Get the log file of a generation"""
+        return self.directory / ("log.jsonl" if generation == 0 else f"log.{generation}.jsonl")
+
+    def _vectors_dir_path(self, generation: int) -> Path:
+        """Get the vector file directory of a generation"""
+        return self.directory / ("vectors" if generation == 0 else f"vectors.{generation}")
+
+    def _remove_other_generations(self):
+        """Delete files of generations other than the current one, left by compaction"""
+        for path in self.directory.glob("log*.jsonl"):
+            if path != self.log_file:
+                path.unlink()
+        for path in self.directory.glob("vectors*"):
+            if path.is_dir() and path != self.vectors_dir:
+                shutil.rmtree(path)
+
+    def _vector_path(self, collection: str) -> Path:
+        """Get vector file of a collection"""
+        return self.vectors_dir / f"{collection}.f32"
@@ -3,30 +3,63 @@ Vector Memory Store - ChromaDB Integration
 Semantic search and embedding-based memory retrieval
 """
 
-import hashlib
 import json
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
 from src.core.logger import setup_logger
+from src.memory.embedding_matrix import EmbeddingMatrix
+from src.memory.embedding_provider import (
+    CachedEmbeddingProvider,
+    EmbeddingProvider,
+    HashEmbeddingProvider,
+)
+from src.memory.vector_storage import VectorStorage
 
 
 class VectorStore:
-    """Vector-based memory store (ChromaDB-compatible)"""
+    """Vector-based memory store (ChromaDB-compatible)
 
-    def __init__(self, persist_dir: str = "data/vector_store"):
+    Writes, compaction and searches hold a store-wide lock, so background
+    ingestion can add documents while other threads use the store.
+    """
+
+    def __init__(
+        self,
+        persist_dir: str = "data/vector_store",
+        ann_threshold: Optional[int] = None,
+        n_probe: int = 8,
+        embedding_provider: Optional[EmbeddingProvider] = None,
+    ):
         self.logger = setup_logger("memory.vector")
         self.persist_dir = Path(persist_dir)
         self.persist_dir.mkdir(parents=True, exist_ok=True)
 
+        # Model embeddings are cached by content hash; local hash embeddings are cheaper
+        # to recompute than to look up
+        if embedding_provider is None:
+            embedding_provider = HashEmbeddingProvider()
+        elif not isinstance(embedding_provider, CachedEmbeddingProvider):
+            embedding_provider = CachedEmbeddingProvider(
+                embedding_provider, cache_dir=str(self.persist_dir / "embedding_cache")
+            )
+        self.embedding_provider = embedding_provider
+
+        # Collections with at least ann_threshold documents use approximate search
+        self.ann_threshold = ann_threshold
+        self.n_probe = n_probe
+
         # In-memory storage (simulating ChromaDB)
         self.documents: Dict[str, Dict[str, Any]] = {}
-        self.embeddings: Dict[str, np.ndarray] = {}
         self.metadata: Dict[str, Dict[str, Any]] = {}
 
+        # Embedding matrix per collection
+        self.matrices: Dict[str, EmbeddingMatrix] = {}
+
         # Collections (like ChromaDB collections)
         self.collections: Dict[str, List[str]] = {
             "conversations": [],
@@ -37,6 +70,12 @@ class VectorStore:
             "code": [],
         }
 
+        # Append-only vector files and metadata log
+        self.storage = VectorStorage(self.persist_dir)
+
+        # Guards the documents, matrices and storage (reentrant: writes may compact)
+        self._lock = threading.RLock()
+
         self._load_from_disk()
 
     def add_document(
@@ -48,29 +87,87 @@ class VectorStore:
         collection: str = "conversations",
     ) -> bool:
         """Add document with embedding"""
-        try:
-            self.documents[doc_id] = {
-                "content": content,
-                "collection": collection,
-                "created_at": datetime.now().isoformat(),
-            }
-
-            self.embeddings[doc_id] = np.array(embedding, dtype=np.float32)
-            self.metadata[doc_id] = metadata or {}
-
-            # Add to collection
-            if collection not in self.collections:
-                self.collections[collection] = []
-            if doc_id not in self.collections[collection]:
-                self.collections[collection].append(doc_id)
-
-            self.logger.debug(f"Added document: {doc_id} to collection: {collection}")
-            self._save_to_disk()
-            return True
+        return self.add_documents([(doc_id, content, embedding, metadata)], collection) == 1
 
-        except Exception as e:
-            self.logger.error(f"Error adding document: {e}")
-            return False
+    def add_documents(
+        self,
+        documents: List[Tuple[str, str, Sequence[float], Optional[Dict[str, Any]]]],
+        collection: str = "conversations",
+    ) -> int:
+        """
+        Add several documents and append them to storage in one group
+
+        Args:
+            documents: (doc_id, content, embedding, metadata) tuples
+
+        Returns:
+            Number of documents added
+        """
+        with self._lock:
+            try:
+                stored = []
+                for doc_id, content, embedding, metadata in documents:
+                    replaces = doc_id in self.documents
+                    self._add_to_matrix(doc_id, embedding, collection)
+
+                    self.documents[doc_id] = {
+                        "content": content,
+                        "collection": collection,
+                        "created_at": datetime.now().isoformat(),
+                    }
+                    self.metadata[doc_id] = metadata or {}
+
+                    unit_row, norm = self.matrices[collection].get_normalized(doc_id)
+                    stored.append(
+                        (
+                            doc_id,
+                            collection,
+                            self.documents[doc_id],
+                            self.metadata[doc_id],
+                            unit_row.copy(),
+                            norm,
+                            replaces,
+                        )
+                    )
+
+                self._persist(self.storage.append_documents, stored)
+                self.logger.debug(f"Added {len(stored)} documents to collection: {collection}")
+                return len(stored)
+
+            except Exception as e:
+                self.logger.error(f"Error adding documents: {e}")
+                return 0
+
+    def _add_to_matrix(self, doc_id: str, embedding: List[float], collection: str):
+        """Store embedding in the collection matrix, moving it from any other collection"""
+        previous = self.documents.get(doc_id, {}).get("collection")
+        if previous is not None and previous != collection:
+            self._remove_from_collection(doc_id, previous)
+
+        if collection not in self.matrices:
+            self.matrices[collection] = self._new_matrix()
+        matrix = self.matrices[collection]
+        is_new = doc_id not in matrix
+        matrix.add(doc_id, embedding)
+
+        # Add to collection
+        if collection not in self.collections:
+            self.collections[collection] = []
+        if is_new:
+            self.collections[collection].append(doc_id)
+
+    def _new_matrix(self, capacity: int = 1024) -> EmbeddingMatrix:
+        """Create an embedding matrix for a collection"""
+        return EmbeddingMatrix(
+            capacity=capacity, ann_threshold=self.ann_threshold, n_probe=self.n_probe
+        )
+
+    def _remove_from_collection(self, doc_id: str, collection: str):
+        """Remove document from a collection and its matrix"""
+        if collection in self.matrices:
+            self.matrices[collection].remove(doc_id)
+        if collection in self.collections and doc_id in self.collections[collection]:
+            self.collections[collection].remove(doc_id)
 
     def search(
         self,
@@ -80,87 +177,88 @@ class VectorStore:
         threshold: float = 0.7,
     ) -> List[Tuple[str, float, str]]:
         """Semantic search using cosine similarity"""
+        return self.search_batch([query_embedding], collection, limit, threshold)[0]
 
-        if not self.embeddings:
-            return []
-
-        query_vec = np.array(query_embedding, dtype=np.float32)
-        query_norm = np.linalg.norm(query_vec)
-
-        if query_norm == 0:
-            return []
-
-        # Filter by collection
-        doc_ids = []
-        if collection and collection in self.collections:
-            doc_ids = self.collections[collection]
-        else:
-            doc_ids = list(self.documents.keys())
-
-        # Calculate similarities
-        similarities = []
-
-        for doc_id in doc_ids:
-            if doc_id not in self.embeddings:
-                continue
-
-            doc_vec = self.embeddings[doc_id]
-            doc_norm = np.linalg.norm(doc_vec)
-
-            if doc_norm == 0:
-                continue
-
-            # Cosine similarity
-            similarity = np.dot(query_vec, doc_vec) / (query_norm * doc_norm)
-
-            if similarity >= threshold:
-                content = self.documents[doc_id]["content"]
-                similarities.append((doc_id, float(similarity), content))
+    def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        collection: Optional[str] = None,
+        limit: int = 5,
+        threshold: float = 0.7,
+    ) -> List[List[Tuple[str, float, str]]]:
+        """Semantic search for several queries at once (one matrix product per collection)"""
+        results: List[List[Tuple[str, float, str]]] = [[] for _ in query_embeddings]
+        if len(query_embeddings) == 0:
+            return results
+
+        with self._lock:
+            # Filter by collection
+            if collection and collection in self.collections:
+                matrices = [self.matrices[collection]] if collection in self.matrices else []
+            else:
+                matrices = list(self.matrices.values())
+
+            for matrix in matrices:
+                batch = matrix.search_batch(query_embeddings, limit, threshold)
+                for similarities, matches in zip(results, batch):
+                    for doc_id, similarity in matches:
+                        document = self.documents.get(doc_id)
+                        if document is not None:
+                            similarities.append((doc_id, similarity, document["content"]))
 
         # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        for similarities in results:
+            similarities.sort(key=lambda x: x[1], reverse=True)
+            del similarities[limit:]
 
-        return similarities[:limit]
+        return results
+
+    def get_embedding(self, doc_id: str) -> Optional[np.ndarray]:
+        """Get embedding of a document"""
+        document = self.documents.get(doc_id)
+        if document is None or document["collection"] not in self.matrices:
+            return None
+        return self.matrices[document["collection"]].get(doc_id)
 
     def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Get document by ID"""
         if doc_id not in self.documents:
             return None
 
+        embedding = self.get_embedding(doc_id)
         return {
             "content": self.documents[doc_id]["content"],
             "metadata": self.metadata.get(doc_id, {}),
-            "embedding": self.embeddings.get(doc_id, []).tolist(),
+            "embedding": embedding.tolist() if embedding is not None else [],
         }
 
     def update_metadata(self, doc_id: str, metadata: Dict[str, Any]) -> bool:
         """Update document metadata"""
-        if doc_id not in self.documents:
-            return False
+        with self._lock:
+            if doc_id not in self.documents:
+                return False
 
-        self.metadata[doc_id].update(metadata)
-        self._save_to_disk()
-        return True
+            self.metadata[doc_id].update(metadata)
+            self._persist(self.storage.append_metadata, doc_id, self.metadata[doc_id])
+            return True
 
     def delete_document(self, doc_id: str) -> bool:
         """Delete document"""
-        if doc_id not in self.documents:
-            return False
+        with self._lock:
+            if doc_id not in self.documents:
+                return False
 
-        collection = self.documents[doc_id]["collection"]
+            collection = self.documents[doc_id]["collection"]
 
-        del self.documents[doc_id]
-        if doc_id in self.embeddings:
-            del self.embeddings[doc_id]
-        if doc_id in self.metadata:
-            del self.metadata[doc_id]
+            del self.documents[doc_id]
+            if doc_id in self.metadata:
+                del self.metadata[doc_id]
 
-        # Remove from collection
-        if collection in self.collections and doc_id in self.collections[collection]:
-            self.collections[collection].remove(doc_id)
+            # Remove from collection (tombstones the matrix row)
+            self._remove_from_collection(doc_id, collection)
 
-        self._save_to_disk()
-        return True
+            self._persist(self.storage.append_delete, doc_id)
+            return True
 
     def get_collection_stats(self, collection: str) -> Dict[str, Any]:
         """Get statistics for a collection"""
@@ -184,10 +282,10 @@ class VectorStore:
 
     def find_similar_documents(self, doc_id: str, limit: int = 5) -> List[Tuple[str, float, str]]:
         """Find documents similar to a given document"""
-        if doc_id not in self.embeddings:
+        query_embedding = self.get_embedding(doc_id)
+        if query_embedding is None:
             return []
 
-        query_embedding = self.embeddings[doc_id].tolist()
         collection = self.documents[doc_id]["collection"]
 
         results = self.search(query_embedding, collection, limit + 1, threshold=0.5)
@@ -196,67 +294,100 @@ class VectorStore:
         return [(id, score, content) for id, score, content in results if id != doc_id]
 
     def create_embedding(self, text: str) -> List[float]:
-        """Create simple embedding (placeholder - replace with actual model)"""
-        # This is a simple hash-based embedding for demonstration
-        # In production, use sentence-transformers, OpenAI embeddings, etc.
-
-        # Use MD5 hash to create deterministic vector
-        hash_obj = hashlib.md5(text.encode())
-        hash_bytes = hash_obj.digest()
-
-        # Convert to 384-dimensional vector (common embedding size)
-        embedding = []
-        for i in range(384):
-            byte_idx = i % len(hash_bytes)
-            embedding.append(float(hash_bytes[byte_idx]) / 255.0)
-
-        # Normalize
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = [x / norm for x in embedding]
-
-        return embedding
-
-    def _save_to_disk(self):
-        """Persist to disk"""
+        """Create embedding for a text"""
+        return self.embedding_provider.embed(text)
+
+    def create_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Create embeddings for several texts in one batch"""
+        return self.embedding_provider.embed_many(texts)
+
+    def save(self):
+        """Rewrite storage with a snapshot of the current documents"""
+        with self._lock:
+            try:
+                self.storage.rewrite(self._snapshot())
+            except Exception as e:
+                self.logger.error(f"Error saving to disk: {e}")
+
+    def _snapshot(self):
+        """Yield live documents in storage record form"""
+        for doc_id, document in self.documents.items():
+            collection = document["collection"]
+            matrix = self.matrices.get(collection)
+            normalized = matrix.get_normalized(doc_id) if matrix is not None else None
+            unit_row, norm = normalized if normalized is not None else (None, 0.0)
+            yield doc_id, collection, document, self.metadata.get(doc_id, {}), unit_row, norm
+
+    def _persist(self, append, *args):
+        """Append a change to storage, compacting once garbage piles up"""
         try:
-            data = {
-                "documents": self.documents,
-                "metadata": self.metadata,
-                "collections": self.collections,
-                "embeddings": {doc_id: emb.tolist() for doc_id, emb in self.embeddings.items()},
-            }
-
-            with open(self.persist_dir / "vector_store.json", "w") as f:
-                json.dump(data, f, indent=2)
-
+            append(*args)
+            if self.storage.needs_compaction():
+                self.save()
         except Exception as e:
             self.logger.error(f"Error saving to disk: {e}")
 
     def _load_from_disk(self):
         """Load from disk"""
         try:
-            store_file = self.persist_dir / "vector_store.json"
-            if not store_file.exists():
+            if not self.storage.exists:
+                self._migrate_legacy_store()
                 return
 
-            with open(store_file, "r") as f:
-                data = json.load(f)
+            stored, vectors = self.storage.load()
+
+            rows: Dict[str, Tuple[List[str], List[int], List[float]]] = {}
+            for doc in stored:
+                self.documents[doc.doc_id] = doc.document
+                self.metadata[doc.doc_id] = doc.metadata
+                self.collections.setdefault(doc.collection, []).append(doc.doc_id)
 
-            self.documents = data.get("documents", {})
-            self.metadata = data.get("metadata", {})
-            self.collections = data.get("collections", {})
+                collection_vectors = vectors.get(doc.collection)
+                if doc.row is not None and collection_vectors is not None:
+                    if doc.row < len(collection_vectors):
+                        doc_ids, doc_rows, norms = rows.setdefault(doc.collection, ([], [], []))
+                        doc_ids.append(doc.doc_id)
+                        doc_rows.append(doc.row)
+                        norms.append(doc.norm)
 
-            # Convert embeddings back to numpy arrays
-            embeddings_data = data.get("embeddings", {})
-            for doc_id, emb_list in embeddings_data.items():
-                self.embeddings[doc_id] = np.array(emb_list, dtype=np.float32)
+            # Gather live rows from the memory-mapped files in one copy per collection
+            for collection, (doc_ids, doc_rows, norms) in rows.items():
+                matrix = self._new_matrix(capacity=max(len(doc_ids), 1024))
+                matrix.extend_normalized(doc_ids, vectors[collection][doc_rows], norms)
+                self.matrices[collection] = matrix
 
             self.logger.info(f"Loaded {len(self.documents)} documents from disk")
 
         except Exception as e:
             self.logger.error(f"Error loading from disk: {e}")
 
+    def _migrate_legacy_store(self):
+        """Convert a vector_store.json file to binary storage"""
+        store_file = self.persist_dir / "vector_store.json"
+        if not store_file.exists():
+            return
+
+        with open(store_file, "r") as f:
+            data = json.load(f)
+
+        self.documents = data.get("documents", {})
+        self.metadata = data.get("metadata", {})
+        self.collections = data.get("collections", {})
+
+        # Rebuild embedding matrices
+        embeddings_data = data.get("embeddings", {})
+        for doc_id, emb_list in embeddings_data.items():
+            if doc_id not in self.documents:
+                continue
+            collection = self.documents[doc_id]["collection"]
+            if collection not in self.matrices:
+                self.matrices[collection] = self._new_matrix()
+            self.matrices[collection].add(doc_id, emb_list)
+
+        self.storage.rewrite(self._snapshot())
+        store_file.rename(store_file.with_suffix(".json.migrated"))
+        self.logger.info(f"Migrated {len(self.documents)} documents to binary storage")
+
 
 class MemoryManager:
     """High-level memory management combining graph and vector stores"""
@@ -328,41 +459,58 @@ class MemoryManager:
         use_graph: bool = True,
     ) -> List[Dict[str, Any]]:
         """Recall memories based on query"""
+        return self.recall_many([query], memory_type, limit, use_graph)[0]
+
+    def recall_many(
+        self,
+        queries: List[str],
+        memory_type: Optional[str] = None,
+        limit: int = 5,
+        use_graph: bool = True,
+    ) -> List[List[Dict[str, Any]]]:
+        """Recall memories for several queries in one pass over the vector store"""
 
         # Vector search
-        query_embedding = self.vector_store.create_embedding(query)
+        query_embeddings = self.vector_store.create_embeddings(queries)
         collection = memory_type + "s" if memory_type else None
 
-        results = self.vector_store.search(
-            query_embedding, collection=collection, limit=limit, threshold=0.6
+        batch = self.vector_store.search_batch(
+            query_embeddings, collection=collection, limit=limit, threshold=0.6
         )
 
-        memories = []
-
-        for doc_id, score, content in results:
-            memory = {
-                "id": doc_id,
-                "content": content,
-                "similarity": score,
-                "metadata": self.vector_store.metadata.get(doc_id, {}),
-            }
-
-            # Enrich with graph data if requested
-            if use_graph:
-                node = self.graph.get_node(doc_id)
-                if node:
-                    memory["accessed_count"] = node.accessed_count
-                    memory["last_accessed"] = (
-                        node.last_accessed.isoformat() if node.last_accessed else None
-                    )
+        return [
+            [
+                self._build_memory(doc_id, score, content, use_graph)
+                for doc_id, score, content in results
+            ]
+            for results in batch
+        ]
+
+    def _build_memory(
+        self, doc_id: str, score: float, content: str, use_graph: bool
+    ) -> Dict[str, Any]:
+        """Build a recalled memory from a search hit"""
+        memory = {
+            "id": doc_id,
+            "content": content,
+            "similarity": score,
+            "metadata": self.vector_store.metadata.get(doc_id, {}),
+        }
 
-                    # Get related memories
-                    rels = self.graph.get_relationships(doc_id, "both")
-                    memory["related_count"] = len(rels)
+        # Enrich with graph data if requested
+        if use_graph:
+            node = self.graph.get_node(doc_id)
+            if node:
+                memory["accessed_count"] = node.accessed_count
+                memory["last_accessed"] = (
+                    node.last_accessed.isoformat() if node.last_accessed else None
+                )
 
-            memories.append(memory)
+                # Get related memories
+                rels = self.graph.get_relationships(doc_id, "both")
+                memory["related_count"] = len(rels)
 
-        return memories
+        return memory
 
     def get_context(self, memory_id: str, depth: int = 2) -> Dict[str, Any]:
         """Get contextual information around a memory"""
@@ -0,0 +1,253 @@
+"""
+Attribute Index
+Secondary indexes over item attributes for filter evaluation
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, List, Optional, Set
+
+# Default indexed fields
+HASH_INDEX_FIELDS = ("status", "priority", "category", "tags")
+SORTED_INDEX_FIELDS = ("due_date", "created_at", "updated_at")
+
+
+def _is_hashable(value: Any) -> bool:
+    """Check if value can be used as a dict key"""
+    return isinstance(value, Hashable)
+
+
+def _value_family(value: Any) -> Optional[str]:
+    """Group values that can be ordered against each other"""
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, date):
+        return "date"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "str"
+    return None
+
+
+class AttributeIndex(ABC):
+    """Index of one item attribute
+
+    Lookups return None when the index cannot answer a filter exactly, in
+    which case the filter is evaluated item by item instead.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self._values: Dict[str, Any] = {}  # item_id -> indexed value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def update(self, item_id: str, value: Any):
+        """Index the current value of the field for an item"""
+        # Snapshot lists so in-place edits of the item are detected
+        if isinstance(value, list):
+            value = tuple(value)
+
+        if item_id in self._values:
+            if self._values[item_id] == value:
+                return
+            self.remove(item_id)
+
+        if value is not None:
+            self._values[item_id] = value
+            self._add(item_id, value)
+
+    def remove(self, item_id: str):
+        """Remove an item from the index"""
+        if item_id in self._values:
+            self._remove(item_id, self._values.pop(item_id))
+
+    @abstractmethod
+    def _add(self, item_id: str, value: Any):
+        """Add a value"""
+        pass
+
+    @abstractmethod
+    def _remove(self, item_id: str, value: Any):
+        """Remove a value"""
+        pass
+
+    @abstractmethod
+    def estimate(self, operator: str, value: Any) -> Optional[int]:
+        """Estimate number of matching items, None if not supported"""
+        pass
+
+    @abstractmethod
+    def lookup(self, operator: str, value: Any) -> Optional[Set[str]]:
+        """Get IDs of matching items, None if not supported"""
+        pass
+
+
+class HashIndex(AttributeIndex):
+    """Hash index for equality, membership and tag filters"""
+
+    def __init__(self, field: str):
+        super().__init__(field)
+        self._by_value: Dict[Any, Set[str]] = {}  # scalar value -> item IDs
+        self._by_element: Dict[Any, Set[str]] = {}  # list element -> item IDs
+        self._strings: Set[str] = set()  # item IDs with string values
+        self._unindexed: Set[str] = set()  # item IDs with unhashable values
+
+    def _add(self, item_id: str, value: Any):
+        if isinstance(value, (list, tuple)):
+            if not all(_is_hashable(element) for element in value):
+                self._unindexed.add(item_id)
+                return
+            for element in value:
+                self._by_element.setdefault(element, set()).add(item_id)
+        elif _is_hashable(value):
+            self._by_value.setdefault(value, set()).add(item_id)
+            if isinstance(value, str):
+                self._strings.add(item_id)
+        else:
+            self._unindexed.add(item_id)
+
+    def _remove(self, item_id: str, value: Any):
+        if item_id in self._unindexed:
+            self._unindexed.discard(item_id)
+            return
+
+        if isinstance(value, (list, tuple)):
+            for element in value:
+                self._discard(self._by_element, element, item_id)
+        else:
+            self._discard(self._by_value, value, item_id)
+            self._strings.discard(item_id)
+
+    @staticmethod
+    def _discard(mapping: Dict[Any, Set[str]], key: Any, item_id: str):
+        item_ids = mapping.get(key)
+        if item_ids is not None:
+            item_ids.discard(item_id)
+            if not item_ids:
+                del mapping[key]
+
+    def estimate(self, operator: str, value: Any) -> Optional[int]:
+        if operator == "eq":
+            if isinstance(value, (list, tuple)) or not _is_hashable(value):
+                return None
+            return len(self._by_value.get(value, ()))
+
+        elif operator == "ne":
+            matching = self.estimate("eq", value)
+            return None if matching is None else len(self._values) - matching
+
+        elif operator == "in":
+            if not isinstance(value, (list, tuple, set)):
+                return 0
+            if not all(_is_hashable(v) and not isinstance(v, (list, tuple)) for v in value):
+                return None
+            return sum(len(self._by_value.get(v, ())) for v in set(value))
+
+        elif operator == "contains":
+            if not isinstance(value, str) or self._unindexed:
+                return None
+            # String values need a substring check, list values a membership check
+            return len(self._by_element.get(value, ())) + len(self._strings)
+
+        return None
+
+    def lookup(self, operator: str, value: Any) -> Optional[Set[str]]:
+        if self.estimate(operator, value) is None:
+            return None
+
+        if operator == "eq":
+            return set(self._by_value.get(value, ()))
+
+        elif operator == "ne":
+            return set(self._values) - self._by_value.get(value, set())
+
+        elif operator == "in":
+            if not isinstance(value, (list, tuple, set)):
+                return set()
+            item_ids: Set[str] = set()
+            for v in set(value):
+                item_ids.update(self._by_value.get(v, ()))
+            return item_ids
+
+        elif operator == "contains":
+            needle = value.lower()
+            item_ids = set(self._by_element.get(value, ()))
+            item_ids.update(
+                item_id for item_id in self._strings if needle in self._values[item_id].lower()
+            )
+            return item_ids
+
+        return None
+
+
+class SortedIndex(AttributeIndex):
+    """Sorted index for range filters (dates, numbers)"""
+
+    def __init__(self, field: str):
+        super().__init__(field)
+        self._family: Optional[str] = None  # Value family all keys belong to
+        self._keys: List[Any] = []  # Sorted values
+        self._item_ids: List[str] = []  # Item IDs aligned with _keys
+        self._unindexed: Set[str] = set()  # item IDs with values outside the family
+
+    def _add(self, item_id: str, value: Any):
+        family = _value_family(value)
+        if self._family is None and family is not None and not self._keys:
+            self._family = family
+
+        if family is None or family != self._family:
+            self._unindexed.add(item_id)
+            return
+
+        position = bisect_right(self._keys, value)
+        self._keys.insert(position, value)
+        self._item_ids.insert(position, item_id)
+
+    def _remove(self, item_id: str, value: Any):
+        if item_id in self._unindexed:
+            self._unindexed.discard(item_id)
+            return
+
+        start = bisect_left(self._keys, value)
+        end = bisect_right(self._keys, value)
+        position = self._item_ids.index(item_id, start, end)
+        del self._keys[position]
+        del self._item_ids[position]
+
+        if not self._keys:
+            self._family = None
+
+    def _range(self, operator: str, value: Any) -> Optional[range]:
+        """Get positions in _keys matching a comparison"""
+        if not self._values:
+            return range(0)
+
+        if self._unindexed or _value_family(value) != self._family:
+            return None
+
+        if operator == "lt":
+            return range(0, bisect_left(self._keys, value))
+        elif operator == "le":
+            return range(0, bisect_right(self._keys, value))
+        elif operator == "gt":
+            return range(bisect_right(self._keys, value), len(self._keys))
+        elif operator == "ge":
+            return range(bisect_left(self._keys, value), len(self._keys))
+        elif operator == "eq":
+            return range(bisect_left(self._keys, value), bisect_right(self._keys, value))
+
+        return None
+
+    def estimate(self, operator: str, value: Any) -> Optional[int]:
+        positions = self._range(operator, value)
+        return None if positions is None else len(positions)
+
+    def lookup(self, operator: str, value: Any) -> Optional[Set[str]]:
+        positions = self._range(operator, value)
+        if positions is None:
+            return None
+        return set(self._item_ids[positions.start : positions.stop])
@@ -0,0 +1,174 @@
+"""
+Fuzzy Index
+Trigram index over the search vocabulary for fuzzy and substring term lookup
+"""
+
+import math
+from collections import Counter
+from typing import Dict, List, Set
+
+# Padding marker, never part of a token
+_PAD = "$"
+
+
+def trigrams(term: str) -> List[str]:
+    """Get padded trigrams of a term (len(term) + 2 of them)"""
+    padded = f"{_PAD}{_PAD}{term}{_PAD}{_PAD}"
+    return [padded[i : i + 3] for i in range(len(term) + 2)]
+
+
+def bounded_levenshtein(s1: str, s2: str, max_distance: int) -> int:
+    """
+    Levenshtein distance between two strings, giving up early
+
+    Returns max_distance + 1 as soon as the distance is known to exceed max_distance.
+    """
+    if abs(len(s1) - len(s2)) > max_distance:
+        return max_distance + 1
+
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+
+    distances = list(range(len(s2) + 1))
+
+    for i1, c1 in enumerate(s1):
+        new_distances = [i1 + 1]
+        for i2, c2 in enumerate(s2):
+            if c1 == c2:
+                new_distances.append(distances[i2])
+            else:
+                new_distances.append(1 + min(distances[i2], distances[i2 + 1], new_distances[-1]))
+
+        if min(new_distances) > max_distance:
+            return max_distance + 1
+        distances = new_distances
+
+    return distances[-1]
+
+
+class TrigramIndex:
+    """Trigram -> terms index with length buckets"""
+
+    def __init__(self):
+        self._grams: Dict[str, Set[str]] = {}  # trigram -> terms
+        self._gram_counts: Dict[str, int] = {}  # term -> distinct trigram count
+        self._by_length: Dict[int, Dict[int, Set[str]]] = {}  # length -> gram count -> terms
+
+    def __len__(self) -> int:
+        return len(self._gram_counts)
+
+    def add_term(self, term: str):
+        """Add a vocabulary term"""
+        if term in self._gram_counts:
+            return
+
+        grams = set(trigrams(term))
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(term)
+
+        self._gram_counts[term] = len(grams)
+        self._by_length.setdefault(len(term), {}).setdefault(len(grams), set()).add(term)
+
+    def remove_term(self, term: str):
+        """Remove a vocabulary term"""
+        gram_count = self._gram_counts.pop(term, None)
+        if gram_count is None:
+            return
+
+        for gram in set(trigrams(term)):
+            terms = self._grams[gram]
+            terms.discard(term)
+            if not terms:
+                del self._grams[gram]
+
+        by_count = self._by_length[len(term)]
+        by_count[gram_count].discard(term)
+        if not by_count[gram_count]:
+            del by_count[gram_count]
+            if not by_count:
+                del self._by_length[len(term)]
+
+    def similar_terms(self, token: str, min_similarity: float = 0.6) -> Dict[str, float]:
+        """
+        Find terms whose edit-distance similarity to token exceeds min_similarity
+
+        Similarity is 1 - distance / max(len(token), len(term)). Candidates are
+        narrowed with the q-gram count filter before computing distances, so only
+        a handful of Levenshtein computations run per token.
+
+        Returns:
+            Term -> similarity
+        """
+        length = len(token)
+        if length == 0:
+            return {}
+
+        max_ratio = 1.0 - min_similarity
+        token_gram_count = len(set(trigrams(token)))
+
+        # Count shared trigrams per term
+        shared: Counter = Counter()
+        for gram in set(trigrams(token)):
+            shared.update(self._grams.get(gram, ()))
+
+        # Length buckets within reach: term length -> max edit distance
+        reach = {}
+        candidates: List[str] = []
+        for term_length, by_count in self._by_length.items():
+            max_distance = math.ceil(max_ratio * max(length, term_length)) - 1
+            if abs(length - term_length) > max_distance:
+                continue
+            reach[term_length] = max_distance
+
+            # Terms sharing no trigram are only in reach when neither side has
+            # more trigrams than the edits can destroy
+            if token_gram_count <= 3 * max_distance:
+                for gram_count, terms in by_count.items():
+                    if gram_count <= 3 * max_distance:
+                        candidates.extend(term for term in terms if term not in shared)
+
+        # Each edit destroys at most three trigrams of either string
+        for term, count in shared.items():
+            max_distance = reach.get(len(term))
+            if max_distance is None:
+                continue
+            if count >= max(token_gram_count, self._gram_counts[term]) - 3 * max_distance:
+                candidates.append(term)
+
+        results = {}
+        for term in candidates:
+            longest = max(length, len(term))
+            max_distance = reach[len(term)]
+            distance = bounded_levenshtein(token, term, max_distance)
+            if distance <= max_distance:
+                similarity = 1.0 - distance / longest
+                if similarity > min_similarity:
+                    results[term] = similarity
+
+        return results
+
+    def substring_terms(self, token: str) -> Set[str]:
+        """Find terms containing token"""
+        if len(token) < 3:
+            return {
+                term
+                for term_length, by_count in self._by_length.items()
+                if term_length >= len(token)
+                for terms in by_count.values()
+                for term in terms
+                if token in term
+            }
+
+        # Any superstring contains every inner trigram of the token
+        inner = [token[i : i + 3] for i in range(len(token) - 2)]
+        gram_sets = sorted((self._grams.get(gram, set()) for gram in set(inner)), key=len)
+        if not gram_sets[0]:
+            return set()
+
+        candidates = set(gram_sets[0])
+        for gram_set in gram_sets[1:]:
+            candidates &= gram_set
+            if not candidates:
+                break
+
+        return {term for term in candidates if token in term}
@@ -0,0 +1,240 @@
+"""
+Inverted Index
+Per-field posting lists with BM25 scoring
+"""
+
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.search.fuzzy_index import TrigramIndex
+from src.search.prefix_index import PrefixIndex
+
+# Text fields indexed for full-text search, in extraction order
+TEXT_FIELDS = ("title", "description", "content", "notes", "tags")
+
+# Relative weight of a match in each field
+DEFAULT_FIELD_WEIGHTS = {
+    "title": 2.0,
+    "tags": 1.5,
+    "description": 1.0,
+    "content": 1.0,
+    "notes": 0.8,
+}
+
+
+class InvertedIndex:
+    """Posting lists (field -> term -> item ID -> term frequency)"""
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        field_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = field_weights or dict(DEFAULT_FIELD_WEIGHTS)
+
+        # Posting lists
+        self._postings: Dict[str, Dict[str, Dict[str, int]]] = {field: {} for field in TEXT_FIELDS}
+
+        # Cached document lengths (field -> item ID -> token count)
+        self._field_lengths: Dict[str, Dict[str, int]] = {field: {} for field in TEXT_FIELDS}
+        self._total_lengths: Dict[str, int] = {field: 0 for field in TEXT_FIELDS}
+
+        # Forward index of cached term counts (item ID -> field -> term -> frequency)
+        self._documents: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+        # Vocabulary (term -> number of items containing it in any field)
+        self._vocabulary: Dict[str, int] = {}
+
+        # Trigram index over the vocabulary
+        self._trigrams = TrigramIndex()
+
+        # Prefix trie over the vocabulary, weighted by document frequency
+        self._prefixes = PrefixIndex()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._documents
+
+    def add_document(self, item_id: str, field_tokens: Dict[str, List[str]]):
+        """Add item tokens (field -> tokens) to the posting lists"""
+        if item_id in self._documents:
+            self.remove_document(item_id)
+
+        self._documents[item_id] = {}
+        self.update_document(item_id, field_tokens)
+
+    def update_document(self, item_id: str, field_tokens: Dict[str, List[str]]):
+        """
+        Replace the tokens of the given fields of an item
+
+        Only postings of terms whose frequency changed are touched. Fields
+        not given keep their current tokens; an empty token list clears a field.
+        """
+        document = self._documents.setdefault(item_id, {})
+        old_terms = self._terms_of(document)
+
+        for field, tokens in field_tokens.items():
+            if field not in self._postings:
+                continue
+
+            old_counts = document.get(field, {})
+            new_counts = dict(Counter(tokens))
+            postings = self._postings[field]
+
+            for term in old_counts.keys() - new_counts.keys():
+                term_postings = postings[term]
+                del term_postings[item_id]
+                if not term_postings:
+                    del postings[term]
+
+            for term, tf in new_counts.items():
+                if old_counts.get(term) != tf:
+                    postings.setdefault(term, {})[item_id] = tf
+
+            lengths = self._field_lengths[field]
+            self._total_lengths[field] += len(tokens) - lengths.pop(item_id, 0)
+
+            if new_counts:
+                document[field] = new_counts
+                lengths[item_id] = len(tokens)
+            else:
+                document.pop(field, None)
+
+        self._update_vocabulary(old_terms, self._terms_of(document))
+
+    def _terms_of(self, document: Dict[str, Dict[str, int]]) -> Set[str]:
+        """Get distinct terms of a forward index entry"""
+        terms: Set[str] = set()
+        for counts in document.values():
+            terms.update(counts)
+        return terms
+
+    def _update_vocabulary(self, old_terms: Set[str], new_terms: Set[str]):
+        """Adjust document frequencies and vocabulary indexes after an item changed"""
+        for term in new_terms - old_terms:
+            df = self._vocabulary.get(term, 0) + 1
+            self._vocabulary[term] = df
+            self._prefixes.set_weight(term, df)
+            if df == 1:
+                self._trigrams.add_term(term)
+
+        for term in old_terms - new_terms:
+            df = self._vocabulary[term] - 1
+            self._prefixes.set_weight(term, df)
+            if df:
+                self._vocabulary[term] = df
+            else:
+                del self._vocabulary[term]
+                self._trigrams.remove_term(term)
+
+    def remove_document(self, item_id: str):
+        """Remove item from the posting lists"""
+        document = self._documents.get(item_id)
+        if document is None:
+            return
+
+        self.update_document(item_id, {field: [] for field in document})
+        del self._documents[item_id]
+
+    def document_terms(self, item_id: str) -> Dict[str, Dict[str, int]]:
+        """Get cached term counts (field -> term -> frequency) of an item"""
+        return self._documents.get(item_id, {})
+
+    def postings(self, field: str, term: str) -> Dict[str, int]:
+        """Get posting list (item ID -> term frequency) for a term in a field"""
+        return self._postings.get(field, {}).get(term, {})
+
+    def vocabulary(self) -> Iterable[str]:
+        """Get all indexed terms"""
+        return self._vocabulary.keys()
+
+    def document_frequency(self, term: str, fields: Iterable[str] = TEXT_FIELDS) -> int:
+        """Number of items containing the term in any of the given fields"""
+        if fields is TEXT_FIELDS:
+            return self._vocabulary.get(term, 0)
+
+        item_ids: Set[str] = set()
+        for field in fields:
+            item_ids.update(self.postings(field, term))
+        return len(item_ids)
+
+    def matching_ids(self, terms: Iterable[str], fields: Iterable[str] = TEXT_FIELDS) -> Set[str]:
+        """Get IDs of items containing any of the terms in the given fields"""
+        fields = list(fields)
+        item_ids: Set[str] = set()
+        for term in terms:
+            for field in fields:
+                item_ids.update(self.postings(field, term))
+        return item_ids
+
+    def similar_terms(self, token: str, min_similarity: float = 0.6) -> Dict[str, float]:
+        """Find indexed terms within edit-distance similarity of token"""
+        return self._trigrams.similar_terms(token, min_similarity)
+
+    def substring_terms(self, token: str) -> Set[str]:
+        """Find indexed terms containing token"""
+        return self._trigrams.substring_terms(token)
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        """Get the most frequent indexed terms starting with prefix"""
+        return [term for term, _ in self._prefixes.top_k(prefix, limit)]
+
+    def idf(self, field: str, term: str) -> float:
+        """BM25 inverse document frequency of a term within a field"""
+        n = len(self._documents)
+        df = len(self.postings(field, term))
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def bm25(
+        self,
+        terms: Dict[str, float],
+        fields: Iterable[str] = TEXT_FIELDS,
+        scores: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, float]:
+        """
+        Accumulate weighted BM25 scores for items matching the terms
+
+        Args:
+            terms: Term -> query weight
+            fields: Fields to score
+            scores: Optional accumulator to add into
+
+        Returns:
+            Item ID -> score, only for items in the posting lists
+        """
+        if scores is None:
+            scores = {}
+
+        k1 = self.k1
+        b = self.b
+
+        for field in fields:
+            postings = self._postings.get(field)
+            if not postings:
+                continue
+
+            lengths = self._field_lengths[field]
+            if not lengths:
+                continue
+            avg_length = self._total_lengths[field] / len(lengths)
+            field_weight = self.field_weights.get(field, 1.0)
+
+            for term, query_weight in terms.items():
+                term_postings = postings.get(term)
+                if not term_postings:
+                    continue
+
+                weight = field_weight * query_weight * self.idf(field, term)
+                for item_id, tf in term_postings.items():
+                    norm = k1 * (1.0 - b + b * lengths[item_id] / avg_length)
+                    scores[item_id] = scores.get(item_id, 0.0) + weight * tf * (k1 + 1.0) / (
+                        tf + norm
+                    )
+
+        return scores
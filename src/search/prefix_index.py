@@ -0,0 +1,105 @@
+"""
+Prefix Index
+Weighted trie for top-k prefix completions
+"""
+
+import heapq
+from typing import Dict, List, Tuple
+
+
+class _TrieNode:
+    """Trie node with the best weight in its subtree"""
+
+    __slots__ = ("children", "weight", "best")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.weight = 0  # Weight of the term ending here, 0 if none
+        self.best = 0  # Highest term weight in this subtree
+
+
+class PrefixIndex:
+    """Trie of terms weighted by document frequency"""
+
+    def __init__(self):
+        self._root = _TrieNode()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def set_weight(self, term: str, weight: int):
+        """Set the weight of a term, removing it when weight is 0"""
+        node = self._root
+        path = [node]
+        for char in term:
+            child = node.children.get(char)
+            if child is None:
+                if weight <= 0:
+                    return
+                child = node.children[char] = _TrieNode()
+            node = child
+            path.append(node)
+
+        if node.weight <= 0 < weight:
+            self._size += 1
+        elif weight <= 0 < node.weight:
+            self._size -= 1
+        node.weight = max(weight, 0)
+
+        # Prune empty nodes and refresh subtree bests up to the first unchanged one
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            if depth and not node.children and not node.weight:
+                del path[depth - 1].children[term[depth - 1]]
+                continue
+
+            best = max([node.weight] + [child.best for child in node.children.values()])
+            if best == node.best and depth < len(path) - 1:
+                break
+            node.best = best
+
+    def get_weight(self, term: str) -> int:
+        """Get the weight of a term (0 if absent)"""
+        node = self._root
+        for char in term:
+            node = node.children.get(char)
+            if node is None:
+                return 0
+        return node.weight
+
+    def top_k(self, prefix: str, k: int) -> List[Tuple[str, int]]:
+        """
+        Get the k heaviest terms starting with prefix
+
+        Best-first search over subtrees ordered by their best weight, so only
+        the branches leading to the returned terms are expanded.
+
+        Returns:
+            (term, weight) pairs by descending weight, then alphabetically
+        """
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        results: List[Tuple[str, int]] = []
+        if k <= 0 or not node.best:
+            return results
+
+        # Entries: (-weight, text, is_subtree, node); a subtree sorts before its terms
+        heap = [(-node.best, prefix, True, node)]
+        while heap and len(results) < k:
+            neg_weight, text, is_subtree, node = heapq.heappop(heap)
+
+            if not is_subtree:
+                results.append((text, -neg_weight))
+                continue
+
+            if node.weight:
+                heapq.heappush(heap, (-node.weight, text, False, node))
+            for char, child in node.children.items():
+                heapq.heappush(heap, (-child.best, text + char, True, child))
+
+        return results
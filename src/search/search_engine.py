@@ -6,9 +6,17 @@ Advanced search with multiple search strategies
 import re
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
 
 from src.core.logger import setup_logger
+from src.search.attribute_index import (
+    HASH_INDEX_FIELDS,
+    SORTED_INDEX_FIELDS,
+    AttributeIndex,
+    HashIndex,
+    SortedIndex,
+)
+from src.search.inverted_index import TEXT_FIELDS, InvertedIndex
 
 
 class SearchMode(Enum):
@@ -30,6 +38,9 @@ class SearchField(Enum):
     PRIORITY = "priority"
     STATUS = "status"
     CATEGORY = "category"
+    DUE_DATE = "due_date"
+    CREATED_AT = "created_at"
+    UPDATED_AT = "updated_at"
     ALL = "all"  # Search all fields
 
 
@@ -152,64 +163,102 @@ class SearchResult:
 class SearchEngine:
     """Advanced search engine"""
 
+    # Text fields each searchable field maps to
+    _FIELD_MAP = {
+        SearchField.TITLE: ("title",),
+        SearchField.DESCRIPTION: ("description",),
+        SearchField.TAGS: ("tags",),
+    }
+
     def __init__(self):
         self.logger = setup_logger("search.engine")
 
-        # Index for full-text search
-        self._index: Dict[str, Set[str]] = {}  # word -> set of item IDs
+        # Inverted index for full-text search
+        self._index = InvertedIndex()
 
         # Items storage
         self._items: Dict[str, Dict[str, Any]] = {}  # item_id -> item
 
+        # Cached searchable text
+        self._fields: Dict[str, Dict[str, str]] = {}  # item_id -> field -> text
+
+        # Secondary indexes for filters
+        self._attributes: Dict[str, AttributeIndex] = {
+            **{field: HashIndex(field) for field in HASH_INDEX_FIELDS},
+            **{field: SortedIndex(field) for field in SORTED_INDEX_FIELDS},
+        }
+
     def index_item(self, item_id: str, item: Dict[str, Any]):
         """Index an item for searching"""
-        self._items[item_id] = item
+        self.update_item(item_id, item)
+        self.logger.debug(f"Indexed item: {item_id}")
 
-        # Extract searchable text
-        searchable_text = self._extract_searchable_text(item)
+    def update_item(self, item_id: str, item: Dict[str, Any]):
+        """Index a new or changed item, re-tokenizing only fields whose text changed"""
+        old_fields = self._fields.get(item_id, {})
+        new_fields = self._extract_fields(item)
 
-        # Tokenize and index
-        tokens = self._tokenize(searchable_text)
-        for token in tokens:
-            if token not in self._index:
-                self._index[token] = set()
-            self._index[token].add(item_id)
+        changed_tokens = {
+            field: self._tokenize(new_fields.get(field, ""))
+            for field in old_fields.keys() | new_fields.keys()
+            if old_fields.get(field) != new_fields.get(field)
+        }
 
-        self.logger.debug(f"Indexed item: {item_id}")
+        self._items[item_id] = item
+        self._fields[item_id] = new_fields
+
+        if changed_tokens or item_id not in self._index:
+            self._index.update_document(item_id, changed_tokens)
+
+        for field, attribute_index in self._attributes.items():
+            attribute_index.update(item_id, item.get(field))
 
     def remove_item(self, item_id: str):
         """Remove item from index"""
         if item_id in self._items:
             # Remove from index
-            item = self._items[item_id]
-            searchable_text = self._extract_searchable_text(item)
-            tokens = self._tokenize(searchable_text)
-
-            for token in tokens:
-                if token in self._index:
-                    self._index[token].discard(item_id)
-                    if not self._index[token]:
-                        del self._index[token]
+            self._index.remove_document(item_id)
+            for attribute_index in self._attributes.values():
+                attribute_index.remove(item_id)
 
             # Remove from storage
             del self._items[item_id]
+            del self._fields[item_id]
             self.logger.debug(f"Removed item: {item_id}")
 
     def search(self, query: SearchQuery) -> List[SearchResult]:
         """Execute search query"""
-        # Start with all items
-        candidate_ids = set(self._items.keys())
-
-        # Apply filters
-        if query.filters:
-            candidate_ids = self._apply_filters(candidate_ids, query.filters)
-
-        # If no text query, return filtered results
-        if not query.query:
-            results = [SearchResult(self._items[item_id], score=1.0) for item_id in candidate_ids]
+        if query.query and query.mode != SearchMode.REGEX:
+            # Candidates come from the posting lists, so filters only see matching items
+            scores = self._index_search(query)
+            candidate_ids = set(scores)
+
+            if query.filters:
+                candidate_ids = self._apply_filters(candidate_ids, query.filters)
+
+            results = [
+                SearchResult(
+                    self._items[item_id],
+                    score=scores[item_id],
+                    highlights=self._get_highlights(query, item_id),
+                )
+                for item_id in candidate_ids
+            ]
         else:
-            # Apply text search
-            results = self._text_search(query, candidate_ids)
+            # Start with all items, narrowed by filters
+            if query.filters:
+                candidate_ids = self._apply_filters(None, query.filters)
+            else:
+                candidate_ids = set(self._items.keys())
+
+            # If no text query, return filtered results
+            if not query.query:
+                results = [
+                    SearchResult(self._items[item_id], score=1.0) for item_id in candidate_ids
+                ]
+            else:
+                # Apply text search
+                results = self._text_search(query, candidate_ids)
 
         # Sort by score
         results.sort(key=lambda r: r.score, reverse=True)
@@ -222,23 +271,28 @@ class SearchEngine:
         self.logger.info(f"Search returned {len(results)} results")
         return results
 
-    def _extract_searchable_text(self, item: Dict[str, Any]) -> str:
-        """Extract searchable text from item"""
-        parts = []
+    def _extract_fields(self, item: Dict[str, Any]) -> Dict[str, str]:
+        """Extract searchable text per field from item"""
+        fields = {}
 
         # Common searchable fields
         for field in ["title", "description", "content", "notes"]:
             if field in item and item[field]:
-                parts.append(str(item[field]))
+                fields[field] = str(item[field])
 
         # Tags
         if "tags" in item and item["tags"]:
             if isinstance(item["tags"], list):
-                parts.extend(item["tags"])
+                fields["tags"] = " ".join(str(tag) for tag in item["tags"])
             else:
-                parts.append(str(item["tags"]))
+                fields["tags"] = str(item["tags"])
 
-        return " ".join(parts)
+        return fields
+
+    def _get_searchable_text(self, item_id: str, fields: Iterable[str] = TEXT_FIELDS) -> str:
+        """Get cached searchable text of item"""
+        item_fields = self._fields[item_id]
+        return " ".join(item_fields[field] for field in fields if field in item_fields)
 
     def _tokenize(self, text: str) -> List[str]:
         """Tokenize text into searchable tokens"""
@@ -253,124 +307,160 @@ class SearchEngine:
 
         return tokens
 
-    def _apply_filters(self, candidate_ids: Set[str], filters: List[SearchFilter]) -> Set[str]:
-        """Apply filters to candidate items"""
-        filtered_ids = candidate_ids.copy()
+    def _search_fields(self, query: SearchQuery) -> List[str]:
+        """Resolve query fields to indexed text fields"""
+        if SearchField.ALL in query.fields:
+            return list(TEXT_FIELDS)
 
-        for search_filter in filters:
-            # Check each candidate
-            matching_ids = set()
-            for item_id in filtered_ids:
-                item = self._items[item_id]
-                if search_filter.matches(item):
-                    matching_ids.add(item_id)
+        fields = [
+            text_field for field in query.fields for text_field in self._FIELD_MAP.get(field, ())
+        ]
+
+        # Non-text fields (priority, status, ...) only make sense as filters
+        return fields or list(TEXT_FIELDS)
 
-            filtered_ids = matching_ids
+    def _apply_filters(
+        self, candidate_ids: Optional[Set[str]], filters: List[SearchFilter]
+    ) -> Set[str]:
+        """Apply filters to candidate items (None for all items), most selective first"""
+        # Estimate matches of each filter from the attribute indexes
+        plan = []
+        for search_filter in filters:
+            attribute_index = self._attributes.get(search_filter.field.value)
+            estimate = None
+            if attribute_index is not None:
+                estimate = attribute_index.estimate(search_filter.operator, search_filter.value)
+            plan.append((estimate, search_filter))
+
+        plan.sort(key=lambda step: float("inf") if step[0] is None else step[0])
+
+        filtered_ids = candidate_ids
+        for estimate, search_filter in plan:
+            if estimate is not None and (filtered_ids is None or estimate < len(filtered_ids)):
+                matching_ids = self._attributes[search_filter.field.value].lookup(
+                    search_filter.operator, search_filter.value
+                )
+                filtered_ids = matching_ids if filtered_ids is None else filtered_ids & matching_ids
+            else:
+                # Checking the remaining candidates is cheaper than reading the index
+                remaining_ids = self._items.keys() if filtered_ids is None else filtered_ids
+                filtered_ids = {
+                    item_id
+                    for item_id in remaining_ids
+                    if search_filter.matches(self._items[item_id])
+                }
+
+            if not filtered_ids:
+                break
 
-        return filtered_ids
+        return set(self._items.keys()) if filtered_ids is None else filtered_ids
 
-    def _text_search(self, query: SearchQuery, candidate_ids: Set[str]) -> List[SearchResult]:
-        """Perform text search"""
+    def _index_search(self, query: SearchQuery) -> Dict[str, float]:
+        """Perform text search through the inverted index"""
         if query.mode == SearchMode.EXACT:
-            return self._exact_search(query, candidate_ids)
+            return self._exact_search(query)
 
         elif query.mode == SearchMode.PARTIAL:
-            return self._partial_search(query, candidate_ids)
+            return self._partial_search(query)
 
         elif query.mode == SearchMode.FUZZY:
-            return self._fuzzy_search(query, candidate_ids)
-
-        elif query.mode == SearchMode.REGEX:
-            return self._regex_search(query, candidate_ids)
+            return self._fuzzy_search(query)
 
         elif query.mode == SearchMode.SEMANTIC:
-            return self._semantic_search(query, candidate_ids)
+            return self._semantic_search(query)
+
+        return {}
+
+    def _text_search(self, query: SearchQuery, candidate_ids: Set[str]) -> List[SearchResult]:
+        """Perform text search by scanning candidate items"""
+        if query.mode == SearchMode.REGEX:
+            return self._regex_search(query, candidate_ids)
 
         return []
 
-    def _exact_search(self, query: SearchQuery, candidate_ids: Set[str]) -> List[SearchResult]:
+    def _expand_term(self, token: str, fields: List[str]) -> Dict[str, float]:
+        """Find terms in fields containing token, weighted by how much of the term it covers"""
+        return {
+            term: len(token) / len(term)
+            for term in self._index.substring_terms(token)
+            if any(self._index.postings(field, term) for field in fields)
+        }
+
+    def _exact_search(self, query: SearchQuery) -> Dict[str, float]:
         """Exact match search"""
-        results = []
+        scores = {}
         query_lower = query.query.lower()
+        fields = self._search_fields(query)
+
+        # Every query token must be part of some term of a matching item
+        candidate_ids: Optional[Set[str]] = None
+        for query_token in set(self._tokenize(query.query)):
+            matching_ids = self._index.matching_ids(self._expand_term(query_token, fields), fields)
+            candidate_ids = matching_ids if candidate_ids is None else candidate_ids & matching_ids
+            if not candidate_ids:
+                return scores
+
+        if candidate_ids is None:
+            # Query has no indexable tokens, check every item
+            candidate_ids = set(self._items.keys())
 
         for item_id in candidate_ids:
-            item = self._items[item_id]
-            searchable_text = self._extract_searchable_text(item).lower()
+            searchable_text = self._get_searchable_text(item_id, fields).lower()
 
             if query_lower == searchable_text:
-                results.append(SearchResult(item, score=1.0))
+                scores[item_id] = 1.0
             elif query_lower in searchable_text:
                 # Partial exact match
-                score = len(query_lower) / len(searchable_text)
-                results.append(SearchResult(item, score=score))
+                scores[item_id] = len(query_lower) / len(searchable_text)
 
-        return results
+        return scores
 
-    def _partial_search(self, query: SearchQuery, candidate_ids: Set[str]) -> List[SearchResult]:
-        """Partial match search (contains)"""
-        results = []
-        query_tokens = self._tokenize(query.query)
+    def _partial_search(self, query: SearchQuery) -> Dict[str, float]:
+        """Partial match search (contains), ranked by BM25"""
+        scores: Dict[str, float] = {}
+        fields = self._search_fields(query)
 
-        for item_id in candidate_ids:
-            item = self._items[item_id]
-            searchable_text = self._extract_searchable_text(item)
-            item_tokens = self._tokenize(searchable_text)
-
-            # Calculate match score
-            matches = 0
-            highlights = {}
-
-            for query_token in query_tokens:
-                for item_token in item_tokens:
-                    if query_token in item_token:
-                        matches += 1
-
-                        # Add highlight
-                        for field in ["title", "description"]:
-                            if field in item and item[field]:
-                                field_text = str(item[field])
-                                if query_token.lower() in field_text.lower():
-                                    if field not in highlights:
-                                        highlights[field] = []
-                                    highlights[field].append(query_token)
-
-            if matches > 0:
-                score = matches / len(query_tokens)
-                results.append(SearchResult(item, score=score, highlights=highlights))
+        for query_token in self._tokenize(query.query):
+            self._index.bm25(self._expand_term(query_token, fields), fields, scores)
 
-        return results
+        return scores
 
-    def _fuzzy_search(self, query: SearchQuery, candidate_ids: Set[str]) -> List[SearchResult]:
-        """Fuzzy match search"""
-        results = []
-        query_tokens = self._tokenize(query.query)
+    def _get_highlights(self, query: SearchQuery, item_id: str) -> Dict[str, List[str]]:
+        """Get query tokens found in the title and description of item"""
+        highlights = {}
+        if query.mode != SearchMode.PARTIAL:
+            return highlights
 
-        for item_id in candidate_ids:
-            item = self._items[item_id]
-            searchable_text = self._extract_searchable_text(item)
-            item_tokens = self._tokenize(searchable_text)
+        query_tokens = self._tokenize(query.query)
+        item_fields = self._fields[item_id]
+        for field in ["title", "description"]:
+            if field in item_fields:
+                field_text = item_fields[field].lower()
+                matched = [token for token in query_tokens if token in field_text]
+                if matched:
+                    highlights[field] = matched
 
-            # Calculate fuzzy match score
-            total_score = 0
-            matches = 0
+        return highlights
 
-            for query_token in query_tokens:
-                best_match_score = 0
+    def _fuzzy_search(self, query: SearchQuery) -> Dict[str, float]:
+        """Fuzzy match search"""
+        scores: Dict[str, float] = {}
+        query_tokens = self._tokenize(query.query)
+        fields = self._search_fields(query)
 
-                for item_token in item_tokens:
-                    # Levenshtein distance
-                    similarity = self._string_similarity(query_token, item_token)
-                    best_match_score = max(best_match_score, similarity)
+        for query_token in query_tokens:
+            # Best similarity of any similar vocabulary term, per item
+            best_match_scores: Dict[str, float] = {}
 
-                if best_match_score > 0.6:  # Threshold
-                    total_score += best_match_score
-                    matches += 1
+            for term, similarity in self._index.similar_terms(query_token, 0.6).items():
+                for item_id in self._index.matching_ids([term], fields):
+                    if similarity > best_match_scores.get(item_id, 0.0):
+                        best_match_scores[item_id] = similarity
 
-            if matches > 0:
-                score = total_score / len(query_tokens)
-                results.append(SearchResult(item, score=score))
+            for item_id, best_match_score in best_match_scores.items():
+                scores[item_id] = scores.get(item_id, 0.0) + best_match_score
 
-        return results
+        return {item_id: total_score / len(query_tokens) for item_id, total_score in scores.items()}
 
     def _regex_search(self, query: SearchQuery, candidate_ids: Set[str]) -> List[SearchResult]:
         """Regular expression search"""
@@ -381,7 +471,7 @@ class SearchEngine:
 
             for item_id in candidate_ids:
                 item = self._items[item_id]
-                searchable_text = self._extract_searchable_text(item)
+                searchable_text = self._get_searchable_text(item_id)
 
                 if pattern.search(searchable_text):
                     results.append(SearchResult(item, score=1.0))
@@ -391,70 +481,18 @@ class SearchEngine:
 
         return results
 
-    def _semantic_search(self, query: SearchQuery, candidate_ids: Set[str]) -> List[SearchResult]:
-        """Semantic search (basic implementation)"""
+    def _semantic_search(self, query: SearchQuery) -> Dict[str, float]:
+        """Semantic search (basic implementation), ranked by BM25 over query terms"""
         # This is a simplified version
         # A full implementation would use embeddings and vector similarity
+        fields = self._search_fields(query)
+        query_terms = {token: 1.0 for token in self._tokenize(query.query)}
 
-        results = []
-        query_tokens = set(self._tokenize(query.query))
-
-        for item_id in candidate_ids:
-            item = self._items[item_id]
-            searchable_text = self._extract_searchable_text(item)
-            item_tokens = set(self._tokenize(searchable_text))
-
-            # Jaccard similarity
-            intersection = query_tokens & item_tokens
-            union = query_tokens | item_tokens
-
-            if union:
-                score = len(intersection) / len(union)
-                if score > 0:
-                    results.append(SearchResult(item, score=score))
-
-        return results
-
-    def _string_similarity(self, s1: str, s2: str) -> float:
-        """Calculate string similarity (0-1)"""
-        # Levenshtein distance
-        if len(s1) < len(s2):
-            s1, s2 = s2, s1
-
-        if len(s2) == 0:
-            return 0.0
-
-        distances = range(len(s2) + 1)
-
-        for i1, c1 in enumerate(s1):
-            new_distances = [i1 + 1]
-            for i2, c2 in enumerate(s2):
-                if c1 == c2:
-                    new_distances.append(distances[i2])
-                else:
-                    new_distances.append(
-                        1 + min(distances[i2], distances[i2 + 1], new_distances[-1])
-                    )
-            distances = new_distances
-
-        # Convert distance to similarity
-        max_len = max(len(s1), len(s2))
-        return 1.0 - (distances[-1] / max_len)
+        return self._index.bm25(query_terms, fields)
 
     def get_suggestions(self, partial_query: str, limit: int = 5) -> List[str]:
-        """Get search suggestions based on partial query"""
-        suggestions = set()
-        partial_lower = partial_query.lower()
-
-        # Find matching tokens in index
-        for token in self._index.keys():
-            if token.startswith(partial_lower):
-                suggestions.add(token)
-
-            if len(suggestions) >= limit:
-                break
-
-        return sorted(list(suggestions))[:limit]
+        """Get search suggestions based on partial query, most frequent first"""
+        return self._index.complete(partial_query.lower(), limit)
 
 
 # Global instance
@@ -19,6 +19,7 @@ from src.sync.sync_engine import (
     SyncConflict,
     SyncEngine,
     SyncStatus,
+    coalesce_changes,
     get_sync_engine,
 )
 
@@ -31,6 +32,7 @@ __all__ = [
     "SyncConflict",
     "ConflictResolution",
     "get_sync_engine",
+    "coalesce_changes",
     # Cloud Storage
     "CloudProvider",
     "LocalFileProvider",
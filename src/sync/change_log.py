@@ -0,0 +1,361 @@
+"""
+Change Log
+Append-only, segmented log of sync changes with a sequence and timestamp index
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.core.logger import setup_logger
+
+# A lock file older than this was left by a process that died holding it
+_STALE_LOCK_SECONDS = 60.0
+
+
+class ChangeLog:
+    """Sync changes appended to segment files, found through a small index
+
+    Every change gets a sequence number. index.json lists the segments in
+    order with their sequence range, timestamp range and committed length;
+    it is replaced atomically after each append, so a segment's bytes past
+    its committed length (a torn write) are never read and are overwritten
+    by the next append. Reads skip every segment whose ranges fall before
+    the cursor or time asked for.
+
+    The active segment is sealed once it grows past segment_size. Once
+    compact_after sealed segments have built up, compaction merges them
+    into new segments without duplicate change IDs. It reads only sealed
+    files, so it can run in another thread while appends continue.
+
+    Several processes or devices may share the directory. Every index read,
+    update and orphan sweep holds index.lock, a file created exclusively.
+    Compaction writes its output segments without the lock, so the sweep
+    only deletes unlisted segments older than orphan_grace seconds. If
+    another process compacted the same segments first, compaction discards
+    its output.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_size: int = 4 * 1024 * 1024,
+        compact_after: int = 4,
+        lock_timeout: float = 10.0,
+        orphan_grace: float = 3600.0,
+    ):
+        self.logger = setup_logger("sync.change_log")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.directory / "index.json"
+        self.lock_file = self.directory / "index.lock"
+
+        self.segment_size = segment_size
+        self.compact_after = compact_after
+        self.lock_timeout = lock_timeout
+        self.orphan_grace = orphan_grace
+
+        self._lock = threading.Lock()
+        self._compacting = False
+        self.next_seq = 1
+        self.segments: List[Dict[str, Any]] = []  # In sequence order, active segment last
+
+        with self._locked():
+            self._load_index()
+            self._remove_orphans()
+
+    @property
+    def count(self) -> int:
+        """Number of changes in the log"""
+        return sum(segment["count"] for segment in self.segments)
+
+    def append(self, changes: List[Dict[str, Any]]) -> int:
+        """
+        Append changes to the active segment
+
+        Args:
+            changes: Change dictionaries, each with a "timestamp" in ISO format
+
+        Returns:
+            Sequence number of the last change in the log
+        """
+        with self._locked():
+            self._load_index()  # Pick up appends made through other providers
+            if not changes:
+                return self.next_seq - 1
+
+            segment = self._active_segment()
+            changes_with_seq = []
+            for change in changes:
+                changes_with_seq.append({"seq": self.next_seq, **change})
+                self.next_seq += 1
+            data = _encode(changes_with_seq)
+
+            with open(self.directory / segment["file"], "r+b") as f:
+                f.seek(segment["bytes"])
+                f.write(data)
+                f.truncate()
+
+            self._track(segment, changes_with_seq, len(data))
+            self._save_index()
+            return self.next_seq - 1
+
+    def read(
+        self, after_seq: int = 0, since: Optional[datetime] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Read changes after a cursor and/or a time, without duplicate change IDs
+
+        Args:
+            after_seq: Only return changes with a higher sequence number
+            since: Only return changes with a later timestamp
+
+        Returns:
+            Tuple of (change dictionaries in log order, cursor for the next read)
+        """
+        with self._locked():
+            self._load_index()
+            cursor = self.next_seq - 1
+
+            changes = []
+            seen = set()
+            for segment in self.segments:
+                if segment["count"] == 0 or segment["last_seq"] <= after_seq:
+                    continue
+                if since is not None and _parse_time(segment["max_time"]) <= since:
+                    continue
+
+                # Segments entirely after the cursor and time need no per-change checks
+                whole = segment["first_seq"] > after_seq and (
+                    since is None or _parse_time(segment["min_time"]) > since
+                )
+                for change in self._read_segment(segment):
+                    if not whole and (
+                        change["seq"] <= after_seq
+                        or since is not None
+                        and _parse_time(change["timestamp"]) <= since
+                    ):
+                        continue
+                    if change["change_id"] in seen:
+                        continue
+                    seen.add(change["change_id"])
+                    changes.append(change)
+
+        return changes, cursor
+
+    def needs_compaction(self) -> bool:
+        """Check if enough sealed segments have built up to merge them"""
+        return len(self._uncompacted()) >= self.compact_after
+
+    def compact(self):
+        """Merge sealed segments into full segments without duplicate change IDs"""
+        with self._locked():
+            if self._compacting:
+                return
+            self._load_index()
+            sealed = self._uncompacted()
+            if len(sealed) < 2:
+                return
+            self._compacting = True
+
+        outputs: List[Dict[str, Any]] = []
+        committed = False
+        try:
+            chunk: List[Dict[str, Any]] = []
+            chunk_bytes = 0
+            seen = set()
+            for segment in sealed:
+                for change in self._read_segment(segment):
+                    if change["change_id"] in seen:
+                        continue
+                    seen.add(change["change_id"])
+
+                    chunk.append(change)
+                    chunk_bytes += len(json.dumps(change, separators=(",", ":"))) + 1
+                    if chunk_bytes >= self.segment_size:
+                        outputs.append(self._write_segment(chunk))
+                        chunk, chunk_bytes = [], 0
+            if chunk:
+                outputs.append(self._write_segment(chunk))
+
+            with self._locked():
+                self._load_index()
+                files = [segment["file"] for segment in sealed]
+                listed = [segment["file"] for segment in self.segments]
+                start = listed.index(files[0]) if files[0] in listed else -1
+                if start < 0 or listed[start : start + len(files)] != files:
+                    self.logger.info("Segments were compacted by another process")
+                    return
+
+                self.segments[start : start + len(sealed)] = outputs
+                self._save_index()
+                committed = True
+
+                # Only removed once the index no longer lists them
+                for segment in sealed:
+                    (self.directory / segment["file"]).unlink()
+
+            before = sum(segment["count"] for segment in sealed)
+            after = sum(segment["count"] for segment in outputs)
+            self.logger.info(
+                f"Compacted {len(sealed)} segments ({before} changes) "
+                f"into {len(outputs)} ({after} changes)"
+            )
+
+        except FileNotFoundError:
+            # A sealed segment was removed by another process compacting it
+            self.logger.info("Segments were compacted by another process")
+
+        finally:
+            if not committed:
+                for segment in outputs:
+                    (self.directory / segment["file"]).unlink(missing_ok=True)
+            with self._lock:
+                self._compacting = False
+
+    def _uncompacted(self) -> List[Dict[str, Any]]:
+        """Get the sealed segments not yet compacted"""
+        return [segment for segment in self.segments[:-1] if not segment["compacted"]]
+
+    def _read_segment(self, segment: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Read the committed changes of a segment"""
+        with open(self.directory / segment["file"], "rb") as f:
+            data = f.read(segment["bytes"])
+        for line in data.splitlines():
+            yield json.loads(line)
+
+    def _write_segment(self, changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Write changes that already have sequence numbers to a new compacted segment"""
+        segment = self._new_segment(compacted=True)
+        data = _encode(changes)
+        with open(self.directory / segment["file"], "wb") as f:
+            f.write(data)
+        self._track(segment, changes, len(data))
+        return segment
+
+    def _track(self, segment: Dict[str, Any], changes: List[Dict[str, Any]], size: int):
+        """Extend the index entry of a segment with changes written to it"""
+        timestamps = [change["timestamp"] for change in changes]
+        if segment["count"]:
+            timestamps += [segment["min_time"], segment["max_time"]]
+        else:
+            segment["first_seq"] = changes[0]["seq"]
+
+        segment["min_time"] = min(timestamps, key=_parse_time)
+        segment["max_time"] = max(timestamps, key=_parse_time)
+        segment["last_seq"] = changes[-1]["seq"]
+        segment["count"] += len(changes)
+        segment["bytes"] += size
+
+    def _active_segment(self) -> Dict[str, Any]:
+        """Get the segment to append to, starting a new one when it is full"""
+        if not self.segments or self.segments[-1]["bytes"] >= self.segment_size:
+            segment = self._new_segment(compacted=False)
+            (self.directory / segment["file"]).touch()
+            self.segments.append(segment)
+        return self.segments[-1]
+
+    def _new_segment(self, compacted: bool) -> Dict[str, Any]:
+        """Create the index entry of an empty segment"""
+        return {
+            "file": f"changes_{uuid.uuid4().hex[:12]}.jsonl",
+            "first_seq": 0,
+            "last_seq": 0,
+            "min_time": None,
+            "max_time": None,
+            "count": 0,
+            "bytes": 0,
+            "compacted": compacted,
+        }
+
+    def _load_index(self):
+        """Load the index if it exists"""
+        if self.index_file.exists():
+            with open(self.index_file, "r") as f:
+                index = json.load(f)
+            self.next_seq = index["next_seq"]
+            self.segments = index["segments"]
+
+    def _save_index(self):
+        """Replace the index atomically"""
+        tmp_path = self.index_file.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"next_seq": self.next_seq, "segments": self.segments}, f)
+        os.replace(tmp_path, self.index_file)
+
+    @contextmanager
+    def _locked(self):
+        """Hold the thread lock and the lock file shared with other processes"""
+        with self._lock:
+            token = self._acquire_lock_file()
+            try:
+                yield
+            finally:
+                self._release_lock_file(token)
+
+    def _acquire_lock_file(self) -> str:
+        """Create the lock file, waiting while another process holds it"""
+        token = f"{os.getpid()}-{uuid.uuid4().hex}"
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                fd = os.open(self.lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if self._break_stale_lock():
+                    continue
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for {self.lock_file}")
+                time.sleep(0.01)
+                continue
+
+            with os.fdopen(fd, "w") as f:
+                f.write(token)
+            return token
+
+    def _break_stale_lock(self) -> bool:
+        """Remove a lock file left by a process that died, returning whether one was removed"""
+        try:
+            if time.time() - self.lock_file.stat().st_mtime < _STALE_LOCK_SECONDS:
+                return False
+            self.lock_file.unlink()
+        except FileNotFoundError:
+            pass
+        self.logger.warning(f"Removed stale lock file {self.lock_file}")
+        return True
+
+    def _release_lock_file(self, token: str):
+        """Remove the lock file if it is still the one this process created"""
+        try:
+            if self.lock_file.read_text() == token:
+                self.lock_file.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _remove_orphans(self):
+        """
+        Delete segment files the index does not list, left by an interrupted compaction
+
+        Recent ones are kept, as they may be compaction output another
+        process has not listed yet.
+        """
+        listed = {segment["file"] for segment in self.segments}
+        cutoff = time.time() - self.orphan_grace
+        for path in self.directory.glob("changes_*.jsonl"):
+            if path.name not in listed and path.stat().st_mtime < cutoff:
+                path.unlink()
+
+
+def _encode(changes: List[Dict[str, Any]]) -> bytes:
+    """Encode changes as JSON lines"""
+    return "".join(json.dumps(change, separators=(",", ":")) + "\n" for change in changes).encode()
+
+
+def _parse_time(timestamp: str) -> datetime:
+    """Parse an ISO format timestamp"""
+    return datetime.fromisoformat(timestamp)
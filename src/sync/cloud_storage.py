@@ -3,15 +3,20 @@ Cloud Storage Provider
 Handles cloud storage operations for sync
 """
 
+import base64
+import hashlib
 import json
 import os
+import threading
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.core.logger import setup_logger
-from src.sync.sync_engine import SyncChange
+from src.sync.change_log import ChangeLog
+from src.sync.envelope import ENVELOPE_ENTITY_TYPE, decode_changes, encode_changes
+from src.sync.sync_engine import ChangeType, SyncChange
 
 
 class CloudProvider(ABC):
@@ -54,9 +59,13 @@ class CloudProvider(ABC):
 
 
 class LocalFileProvider(CloudProvider):
-    """Local file system provider (for testing/offline)"""
+    """Local file system provider (for testing/offline)
 
-    def __init__(self, storage_path: str = None):
+    Changes are appended to a segmented change log rather than rewriting a
+    single file, and sealed segments are compacted in a background thread.
+    """
+
+    def __init__(self, storage_path: str = None, background_compaction: bool = True):
         super().__init__("local_file")
 
         if storage_path is None:
@@ -65,9 +74,15 @@ class LocalFileProvider(CloudProvider):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
 
-        self.changes_file = self.storage_path / "changes.json"
+        self.changes_file = self.storage_path / "changes.json"  # Before the change log
         self.metadata_file = self.storage_path / "metadata.json"
 
+        self.change_log = ChangeLog(self.storage_path / "changes")
+        self.background_compaction = background_compaction
+        self._compaction_thread: Optional[threading.Thread] = None
+
+        self._migrate_changes_file()
+
     def connect(self, credentials: Dict[str, Any] = None) -> bool:
         """Connect to local storage"""
         self.logger.info(f"Connected to local storage: {self.storage_path}")
@@ -81,44 +96,22 @@ class LocalFileProvider(CloudProvider):
         return True
 
     def upload_changes(self, changes: List[SyncChange]) -> bool:
-        """Upload changes to local file"""
+        """Upload changes to the local change log"""
         if not self._connected:
             self.logger.error("Not connected")
             return False
 
         try:
-            # Load existing changes
-            existing_changes = []
-            if self.changes_file.exists():
-                with open(self.changes_file, "r") as f:
-                    data = json.load(f)
-                    existing_changes = [SyncChange.from_dict(c) for c in data.get("changes", [])]
-
-            # Add new changes
-            all_changes = existing_changes + changes
-
-            # Remove duplicates (by change_id)
-            seen_ids = set()
-            unique_changes = []
-            for change in all_changes:
-                if change.change_id not in seen_ids:
-                    unique_changes.append(change)
-                    seen_ids.add(change.change_id)
-
-            # Save
-            with open(self.changes_file, "w") as f:
-                json.dump(
-                    {
-                        "changes": [c.to_dict() for c in unique_changes],
-                        "updated_at": datetime.now().isoformat(),
-                    },
-                    f,
-                    indent=2,
-                )
+            # Duplicates from earlier uploads are dropped on read and by compaction
+            unique_changes = {c.change_id: c for c in changes}
+            self.change_log.append([c.to_dict() for c in unique_changes.values()])
 
             # Update metadata
             self._update_metadata()
 
+            if self.change_log.needs_compaction():
+                self.compact(wait=not self.background_compaction)
+
             self.logger.info(f"Uploaded {len(changes)} changes")
             return True
 
@@ -127,22 +120,14 @@ class LocalFileProvider(CloudProvider):
             return False
 
     def download_changes(self, since: Optional[datetime] = None) -> List[SyncChange]:
-        """Download changes from local file"""
+        """Download changes from the local change log"""
         if not self._connected:
             self.logger.error("Not connected")
             return []
 
         try:
-            if not self.changes_file.exists():
-                return []
-
-            with open(self.changes_file, "r") as f:
-                data = json.load(f)
-                changes = [SyncChange.from_dict(c) for c in data.get("changes", [])]
-
-            # Filter by timestamp if provided
-            if since:
-                changes = [c for c in changes if c.timestamp > since]
+            data, _ = self.change_log.read(since=since)
+            changes = [SyncChange.from_dict(c) for c in data]
 
             self.logger.info(f"Downloaded {len(changes)} changes")
             return changes
@@ -151,6 +136,63 @@ class LocalFileProvider(CloudProvider):
             self.logger.error(f"Failed to download changes: {e}")
             return []
 
+    def download_changes_after(self, cursor: int = 0) -> Tuple[List[SyncChange], int]:
+        """
+        Download changes uploaded after a cursor
+
+        Args:
+            cursor: Cursor returned by the previous call, or 0 for all changes
+
+        Returns:
+            Tuple of (changes, cursor for the next call)
+        """
+        if not self._connected:
+            self.logger.error("Not connected")
+            return [], cursor
+
+        try:
+            data, next_cursor = self.change_log.read(after_seq=cursor)
+            changes = [SyncChange.from_dict(c) for c in data]
+
+            self.logger.info(f"Downloaded {len(changes)} changes")
+            return changes, next_cursor
+
+        except Exception as e:
+            self.logger.error(f"Failed to download changes: {e}")
+            return [], cursor
+
+    def compact(self, wait: bool = True):
+        """Compact sealed change log segments, in a background thread unless waiting"""
+        if wait:
+            self.change_log.compact()
+            return
+
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+
+        self._compaction_thread = threading.Thread(
+            target=self.change_log.compact, name="sync_change_log_compaction", daemon=True
+        )
+        self._compaction_thread.start()
+
+    def _migrate_changes_file(self):
+        """Move changes from a changes.json file written by earlier versions into the log"""
+        if not self.changes_file.exists():
+            return
+
+        try:
+            with open(self.changes_file, "r") as f:
+                data = json.load(f)
+
+            changes = data.get("changes", [])
+            self.change_log.append(changes)
+            self.changes_file.rename(self.changes_file.with_suffix(".json.migrated"))
+
+            self.logger.info(f"Migrated {len(changes)} changes to the change log")
+
+        except Exception as e:
+            self.logger.error(f"Failed to migrate changes file: {e}")
+
     def get_latest_sync_time(self) -> Optional[datetime]:
         """Get latest sync timestamp"""
         if not self.metadata_file.exists():
@@ -177,12 +219,18 @@ class LocalFileProvider(CloudProvider):
 
 
 class EncryptedCloudProvider(CloudProvider):
-    """Encrypted cloud storage provider"""
+    """Encrypted cloud storage provider
+
+    Each upload is serialized into one envelope, encrypted as a whole and
+    stored through the base provider as a single change, so encryption
+    work and stored size follow the batch rather than each field.
+    """
 
-    def __init__(self, base_provider: CloudProvider, encryption_key: str):
+    def __init__(self, base_provider: CloudProvider, encryption_key: str, compress: bool = True):
         super().__init__(f"encrypted_{base_provider.provider_name}")
         self.base_provider = base_provider
         self.encryption_key = encryption_key
+        self.compress = compress
 
     def connect(self, credentials: Dict[str, Any] = None) -> bool:
         """Connect to encrypted storage"""
@@ -197,43 +245,48 @@ class EncryptedCloudProvider(CloudProvider):
         return result
 
     def upload_changes(self, changes: List[SyncChange]) -> bool:
-        """Upload encrypted changes"""
-        # Encrypt changes
-        encrypted_changes = [self._encrypt_change(c) for c in changes]
-        return self.base_provider.upload_changes(encrypted_changes)
+        """Upload changes as one encrypted envelope"""
+        if not changes:
+            return self.base_provider.upload_changes([])
+
+        payload = self._xor_bytes(encode_changes(changes, compress=self.compress))
+        envelope_id = f"envelope_{hashlib.sha256(payload).hexdigest()[:16]}"
+
+        envelope = SyncChange(
+            change_id=envelope_id,
+            change_type=ChangeType.CREATE,
+            entity_type=ENVELOPE_ENTITY_TYPE,
+            entity_id=envelope_id,
+            data={"payload": base64.b64encode(payload).decode("ascii")},
+            timestamp=max(c.timestamp for c in changes),
+            device_id=changes[0].device_id,
+        )
+        return self.base_provider.upload_changes([envelope])
 
     def download_changes(self, since: Optional[datetime] = None) -> List[SyncChange]:
         """Download and decrypt changes"""
-        encrypted_changes = self.base_provider.download_changes(since)
-        return [self._decrypt_change(c) for c in encrypted_changes]
+        changes = []
+        for stored in self.base_provider.download_changes(since):
+            if stored.entity_type != ENVELOPE_ENTITY_TYPE:
+                # Changes encrypted field by field before envelopes
+                changes.append(self._decrypt_change(stored))
+                continue
 
-    def get_latest_sync_time(self) -> Optional[datetime]:
-        """Get latest sync time"""
-        return self.base_provider.get_latest_sync_time()
+            try:
+                payload = self._xor_bytes(base64.b64decode(stored.data["payload"]))
+                batch = decode_changes(payload)
+            except Exception as e:
+                self.logger.error(f"Failed to decrypt envelope {stored.change_id}: {e}")
+                continue
 
-    def _encrypt_change(self, change: SyncChange) -> SyncChange:
-        """Encrypt change data"""
-        # Simple XOR encryption for demo (use proper encryption in production)
-        encrypted_data = {}
-        for key, value in change.data.items():
-            if isinstance(value, str):
-                encrypted_data[key] = self._xor_encrypt(value)
-            else:
-                encrypted_data[key] = value
+            # The envelope is as new as its newest change; older ones in it may predate since
+            changes.extend(c for c in batch if since is None or c.timestamp > since)
 
-        # Create new change with encrypted data
-        encrypted = SyncChange(
-            change_id=change.change_id,
-            change_type=change.change_type,
-            entity_type=change.entity_type,
-            entity_id=change.entity_id,
-            data=encrypted_data,
-            timestamp=change.timestamp,
-            device_id=change.device_id,
-            version=change.version,
-        )
+        return changes
 
-        return encrypted
+    def get_latest_sync_time(self) -> Optional[datetime]:
+        """Get latest sync time"""
+        return self.base_provider.get_latest_sync_time()
 
     def _decrypt_change(self, change: SyncChange) -> SyncChange:
         """Decrypt change data"""
@@ -258,15 +311,12 @@ class EncryptedCloudProvider(CloudProvider):
 
         return decrypted
 
-    def _xor_encrypt(self, text: str) -> str:
-        """Simple XOR encryption"""
+    def _xor_bytes(self, data: bytes) -> bytes:
+        """XOR bytes with the repeated key (its own inverse)"""
         key = self.encryption_key.encode()
-        encrypted = []
-
-        for i, char in enumerate(text):
-            encrypted.append(chr(ord(char) ^ key[i % len(key)]))
-
-        return "".join(encrypted).encode("utf-8").hex()
+        stream = (key * (len(data) // len(key) + 1))[: len(data)]
+        mixed = int.from_bytes(data, "big") ^ int.from_bytes(stream, "big")
+        return mixed.to_bytes(len(data), "big")
 
     def _xor_decrypt(self, encrypted_hex: str) -> str:
         """Simple XOR decryption"""
@@ -0,0 +1,90 @@
+"""
+Sync Envelope
+Compact, optionally compressed serialization of sync change batches
+"""
+
+import json
+import zlib
+from datetime import datetime
+from typing import List
+
+from src.sync.sync_engine import ChangeType, SyncChange
+
+# Entity type of the change that carries an envelope through a provider
+ENVELOPE_ENTITY_TYPE = "__sync_envelope__"
+
+# First byte of an envelope: how the rest is encoded
+_RAW = b"j"
+_COMPRESSED = b"z"
+
+_VERSION = 1
+
+
+def encode_changes(changes: List[SyncChange], compress: bool = True) -> bytes:
+    """
+    Serialize a batch of changes
+
+    Each change becomes one positional row with no field names or checksum,
+    which is recomputed on decode.
+
+    Args:
+        changes: Changes to serialize
+        compress: Whether to zlib-compress the batch
+
+    Returns:
+        Envelope bytes
+    """
+    rows = [
+        [
+            c.change_id,
+            c.change_type.value,
+            c.entity_type,
+            c.entity_id,
+            c.data,
+            c.timestamp.isoformat(),
+            c.device_id,
+            c.version,
+        ]
+        for c in changes
+    ]
+    body = json.dumps({"v": _VERSION, "changes": rows}, separators=(",", ":")).encode()
+
+    if compress:
+        return _COMPRESSED + zlib.compress(body)
+    return _RAW + body
+
+
+def decode_changes(envelope: bytes) -> List[SyncChange]:
+    """Deserialize a batch of changes written by encode_changes"""
+    encoding, body = envelope[:1], envelope[1:]
+    if encoding == _COMPRESSED:
+        body = zlib.decompress(body)
+    elif encoding != _RAW:
+        raise ValueError(f"Unknown envelope encoding: {encoding!r}")
+
+    data = json.loads(body)
+    if data.get("v") != _VERSION:
+        raise ValueError(f"Unsupported envelope version: {data.get('v')}")
+
+    return [
+        SyncChange(
+            change_id=change_id,
+            change_type=ChangeType(change_type),
+            entity_type=entity_type,
+            entity_id=entity_id,
+            data=change_data,
+            timestamp=datetime.fromisoformat(timestamp),
+            device_id=device_id,
+            version=version,
+        )
+        for (
+            change_id,
+            change_type,
+            entity_type,
+            entity_id,
+            change_data,
+            timestamp,
+            device_id,
+            version,
+        ) in data["changes"]
+    ]
@@ -10,7 +10,13 @@ from typing import Any, Callable, Dict, List, Optional
 from src.core.logger import setup_logger
 from src.sync.cloud_storage import CloudStorageManager, get_cloud_manager
 from src.sync.offline_support import OfflineManager, get_offline_manager
-from src.sync.sync_engine import ChangeType, SyncChange, SyncEngine, SyncStatus
+from src.sync.sync_engine import (
+    ChangeType,
+    SyncChange,
+    SyncEngine,
+    SyncStatus,
+    coalesce_changes,
+)
 
 
 class SyncCoordinator:
@@ -75,8 +81,9 @@ class SyncCoordinator:
                 results["errors"].append("Device is offline")
                 return results
 
-            # 1. Upload local changes
-            pending_changes = self.sync_engine.get_pending_changes()
+            # 1. Upload local changes, one net change per entity
+            pending_changes = coalesce_changes(self.sync_engine.get_pending_changes())
+            upload_success = True  # Changes that cancelled out need no upload
 
             if pending_changes:
                 upload_success = self.cloud_manager.upload_to_cloud(pending_changes)
@@ -111,7 +118,7 @@ class SyncCoordinator:
                 )
 
             # 3. Clear successfully synced changes
-            if results["uploaded"] > 0:
+            if upload_success:
                 self.sync_engine.clear_pending_changes()
 
             # 4. Process offline queue
@@ -8,7 +8,7 @@ import json
 import time
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from src.core.logger import setup_logger
 
@@ -129,16 +129,118 @@ class SyncConflict:
         }
 
 
+def coalesce_changes(changes: List[SyncChange]) -> List[SyncChange]:
+    """
+    Collapse successive changes to each entity into one net change
+
+    A create or update followed by updates keeps its type with the updates'
+    fields laid over its data. An update followed by a delete becomes the
+    delete, and a create followed by a delete cancels out. Any other pair
+    (such as a delete then a create) keeps the later change.
+
+    Args:
+        changes: Changes in the order they were made
+
+    Returns:
+        Net changes, ordered by each entity's last change
+    """
+    net: Dict[Tuple[str, str], Optional[SyncChange]] = {}
+    for change in changes:
+        key = (change.entity_type, change.entity_id)
+        previous = net.pop(key, None)  # Re-inserted so order follows the last change
+        net[key] = _combine_changes(previous, change) if previous else change
+
+    return [change for change in net.values() if change is not None]
+
+
+def _combine_changes(previous: SyncChange, change: SyncChange) -> Optional[SyncChange]:
+    """Combine two successive changes to an entity, or None if they cancel out"""
+    if change.change_type == ChangeType.UPDATE and previous.change_type != ChangeType.DELETE:
+        change_type = previous.change_type
+        data = {**previous.data, **change.data}
+    elif change.change_type == ChangeType.DELETE and previous.change_type == ChangeType.CREATE:
+        return None
+    else:
+        return change
+
+    return SyncChange(
+        change_id=change.change_id,
+        change_type=change_type,
+        entity_type=change.entity_type,
+        entity_id=change.entity_id,
+        data=data,
+        timestamp=change.timestamp,
+        device_id=change.device_id,
+        version=change.version,
+    )
+
+
+class AppliedChangeLog:
+    """Applied remote change IDs, bounded by per-device watermarks
+
+    Recent change IDs are kept exactly. Compaction drops the oldest ones and
+    raises the watermark of their device to the newest timestamp dropped;
+    any change from that device at or before its watermark then counts as
+    applied. This assumes a device's changes older than what is kept have
+    all been delivered, which holds as long as sync runs more often than
+    max_recent changes arrive.
+    """
+
+    def __init__(self, max_recent: int = 10000):
+        self.max_recent = max_recent
+        self.watermarks: Dict[str, datetime] = {}  # device_id -> newest compacted timestamp
+        self._recent: Dict[str, Tuple[str, datetime]] = {}  # change_id -> (device_id, timestamp)
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def __contains__(self, change: SyncChange) -> bool:
+        if change.change_id in self._recent:
+            return True
+        watermark = self.watermarks.get(change.device_id)
+        return watermark is not None and change.timestamp <= watermark
+
+    def add(self, change: SyncChange):
+        """Record a change as applied, compacting once more than max_recent are kept"""
+        self._recent[change.change_id] = (change.device_id, change.timestamp)
+        if len(self._recent) > self.max_recent:
+            # Keep the newest half so compaction runs once per max_recent / 2 changes
+            timestamps = sorted(timestamp for _, timestamp in self._recent.values())
+            self.compact(timestamps[len(timestamps) - self.max_recent // 2 - 1])
+
+    def compact(self, before: datetime) -> int:
+        """Fold change IDs at or before a time into device watermarks"""
+        kept = {}
+        for change_id, (device_id, timestamp) in self._recent.items():
+            if timestamp > before:
+                kept[change_id] = (device_id, timestamp)
+            elif device_id not in self.watermarks or timestamp > self.watermarks[device_id]:
+                self.watermarks[device_id] = timestamp
+
+        dropped = len(self._recent) - len(kept)
+        self._recent = kept
+        return dropped
+
+    def clear(self):
+        """Forget all applied changes"""
+        self.watermarks.clear()
+        self._recent.clear()
+
+
 class SyncEngine:
     """Core synchronization engine"""
 
-    def __init__(self, device_id: str):
+    def __init__(self, device_id: str, max_applied_changes: int = 10000):
         self.logger = setup_logger("sync.engine")
         self.device_id = device_id
 
         # Change tracking
         self.pending_changes: List[SyncChange] = []
-        self.applied_changes: Set[str] = set()  # Track applied change IDs
+        self.applied_changes = AppliedChangeLog(max_applied_changes)
+
+        # Latest pending change per (entity_type, entity_id), and pending change IDs
+        self._pending_index: Dict[Tuple[str, str], SyncChange] = {}
+        self._pending_ids: Set[str] = set()
 
         # Conflict tracking
         self.conflicts: List[SyncConflict] = []
@@ -181,7 +283,7 @@ class SyncEngine:
         )
 
         # Add to pending changes
-        self.pending_changes.append(change)
+        self._add_pending(change)
 
         # Update version
         self.entity_versions[entity_id] = new_version
@@ -202,9 +304,12 @@ class SyncEngine:
             "errors": [],
         }
 
+        # Pending changes that come back from the remote side are done
+        acknowledged = set()
+
         for remote_change in remote_changes:
             # Skip if already applied
-            if remote_change.change_id in self.applied_changes:
+            if remote_change in self.applied_changes:
                 continue
 
             # Check for conflicts
@@ -216,7 +321,7 @@ class SyncEngine:
 
                 if resolution:
                     results["applied"].append(resolution.to_dict())
-                    self.applied_changes.add(remote_change.change_id)
+                    self._mark_applied(remote_change, acknowledged)
                 else:
                     results["conflicts"].append(conflict.to_dict())
                     self.conflicts.append(conflict)
@@ -225,15 +330,14 @@ class SyncEngine:
                 try:
                     self._apply_change(remote_change)
                     results["applied"].append(remote_change.to_dict())
-                    self.applied_changes.add(remote_change.change_id)
+                    self._mark_applied(remote_change, acknowledged)
                 except Exception as e:
                     self.logger.error(f"Error applying change: {e}")
                     results["errors"].append({"change": remote_change.to_dict(), "error": str(e)})
 
         # Clear applied pending changes
-        self.pending_changes = [
-            c for c in self.pending_changes if c.change_id not in self.applied_changes
-        ]
+        if acknowledged:
+            self._remove_pending(acknowledged)
 
         self.status = SyncStatus.SUCCESS if not results["conflicts"] else SyncStatus.CONFLICT
         self.last_sync_time = datetime.now()
@@ -246,20 +350,51 @@ class SyncEngine:
 
         return results
 
+    def _add_pending(self, change: SyncChange):
+        """Add a local change to the pending list and indexes"""
+        self.pending_changes.append(change)
+        self._pending_ids.add(change.change_id)
+
+        key = (change.entity_type, change.entity_id)
+        latest = self._pending_index.get(key)
+        if latest is None or change.timestamp >= latest.timestamp:
+            self._pending_index[key] = change
+
+    def _remove_pending(self, change_ids: Set[str]):
+        """Remove pending changes by ID, re-indexing only the affected entities"""
+        removed = [c for c in self.pending_changes if c.change_id in change_ids]
+        self.pending_changes = [c for c in self.pending_changes if c.change_id not in change_ids]
+        self._pending_ids -= change_ids
+
+        affected = {(c.entity_type, c.entity_id) for c in removed}
+        for key in affected:
+            del self._pending_index[key]
+        for change in self.pending_changes:
+            key = (change.entity_type, change.entity_id)
+            if key in affected:
+                latest = self._pending_index.get(key)
+                if latest is None or change.timestamp >= latest.timestamp:
+                    self._pending_index[key] = change
+
+    def _mark_applied(self, change: SyncChange, acknowledged: Set[str]):
+        """Record a remote change as applied, noting if it was one of ours"""
+        self.applied_changes.add(change)
+        if change.change_id in self._pending_ids:
+            acknowledged.add(change.change_id)
+
+    def compact_applied_changes(self, before: datetime) -> int:
+        """Fold applied change IDs at or before a time into per-device watermarks"""
+        dropped = self.applied_changes.compact(before)
+        self.logger.debug(f"Compacted {dropped} applied change IDs")
+        return dropped
+
     def _detect_conflict(self, remote_change: SyncChange) -> Optional[SyncConflict]:
         """Detect if remote change conflicts with local changes"""
-        # Find local changes for same entity
-        local_changes = [
-            c
-            for c in self.pending_changes
-            if c.entity_id == remote_change.entity_id and c.entity_type == remote_change.entity_type
-        ]
-
-        if not local_changes:
-            return None
+        # Most recent local change for the same entity
+        local_change = self._pending_index.get((remote_change.entity_type, remote_change.entity_id))
 
-        # Get most recent local change
-        local_change = max(local_changes, key=lambda c: c.timestamp)
+        if local_change is None:
+            return None
 
         # Check if changes conflict
         if self._changes_conflict(local_change, remote_change):
@@ -374,6 +509,8 @@ class SyncEngine:
     def clear_pending_changes(self):
         """Clear all pending changes"""
         self.pending_changes.clear()
+        self._pending_index.clear()
+        self._pending_ids.clear()
         self.logger.debug("Cleared pending changes")
 
     def get_sync_status(self) -> Dict[str, Any]:
@@ -4,6 +4,13 @@ Visual workflow automation system with drag-and-drop node editor
 """
 
 # Core workflow components
+from src.workflows.execution_plan import ExecutionPlan
+from src.workflows.run_scheduler import (
+    RunPriority,
+    RunStatus,
+    WorkflowRun,
+    WorkflowRunScheduler,
+)
 from src.workflows.workflow_engine import (
     Connection,
     Workflow,
@@ -52,6 +59,11 @@ __all__ = [
     "WorkflowManager",
     "WorkflowStatus",
     "Connection",
+    "ExecutionPlan",
+    "WorkflowRun",
+    "WorkflowRunScheduler",
+    "RunPriority",
+    "RunStatus",
     "get_workflow_manager",
     # Nodes
     "WorkflowNode",
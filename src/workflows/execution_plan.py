@@ -0,0 +1,161 @@
+"""
+Execution Plan
+Compiled, reusable view of a workflow graph for the executor
+"""
+
+from collections import deque
+from typing import Any, Dict, List, Set, Tuple
+
+from src.workflows.workflow_nodes import PortType
+
+
+class ExecutionPlan:
+    """Lookup tables compiled once from a workflow's nodes and connections
+
+    Holds the trigger nodes, a topological order of all nodes, successor
+    lists per node and per output port, the context key every input port
+    reads (its bound "node.port" output) and the nodes feeding each node's
+    data inputs. Expression nodes, which have no execution input (Compare,
+    Get Variable, ...), are evaluated whenever a node reads them, so each
+    node also lists the expressions it depends on. Workflows cache their
+    plan and drop it when nodes or connections change, so repeated runs skip
+    re-walking the connections.
+    """
+
+    def __init__(self, nodes: Dict[str, Any], connections: List[Any]):
+        self.node_count = len(nodes)
+        self.connection_count = len(connections)
+
+        # Trigger nodes in the order they were added
+        self.triggers: List[str] = [
+            node_id for node_id, node in nodes.items() if node.category.value == "trigger"
+        ]
+
+        # node_id -> successors over all output ports, in connection order
+        self.successors: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+        # node_id -> output port -> successors
+        self.port_successors: Dict[str, Dict[str, List[str]]] = {node_id: {} for node_id in nodes}
+        # node_id -> distinct predecessors
+        self.predecessors: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+        # node_id -> input port -> context key of the output it is bound to
+        self.bindings: Dict[str, Dict[str, str]] = {node_id: {} for node_id in nodes}
+        # node_id -> nodes whose outputs feed its data (non-execution) inputs
+        self.data_sources: Dict[str, Set[str]] = {node_id: set() for node_id in nodes}
+
+        # Nodes run only on demand, as inputs of other nodes
+        self.expressions: Set[str] = {
+            node_id
+            for node_id, node in nodes.items()
+            if node.category.value != "trigger"
+            and all(port.port_type != PortType.EXEC for port in node.input_ports)
+        }
+        # Nodes a For Each batch may run without the executor
+        self.batchable: Set[str] = {node_id for node_id, node in nodes.items() if node.batchable}
+
+        for connection in connections:
+            source, target = connection.from_node, connection.to_node
+            if source not in nodes or target not in nodes:
+                continue
+
+            self.successors[source].append(target)
+            self.port_successors[source].setdefault(connection.from_port, []).append(target)
+            if source not in self.predecessors[target]:
+                self.predecessors[target].append(source)
+            self.bindings[target][connection.to_port] = f"{source}.{connection.from_port}"
+
+            port_types = {port.port_id: port.port_type for port in nodes[target].input_ports}
+            if port_types.get(connection.to_port) != PortType.EXEC:
+                self.data_sources[target].add(source)
+
+        self.order = self._topological_order()
+        self._position = {node_id: i for i, node_id in enumerate(self.order)}
+
+        # node_id -> expressions it reads, directly or through other expressions, in run order
+        self.expression_inputs: Dict[str, List[str]] = {
+            node_id: self._expression_inputs(node_id) for node_id in nodes
+        }
+        # Reading an expression also reads its sources
+        for node_id, expressions in self.expression_inputs.items():
+            for expression in expressions:
+                self.data_sources[node_id] |= self.data_sources[expression]
+
+        # For Each node_id -> (body nodes in run order, whether all are batchable)
+        self._loop_bodies: Dict[str, Tuple[List[str], bool]] = {}
+        # node_id -> nodes reachable through its outputs, filled in on demand
+        self._descendants: Dict[str, Set[str]] = {}
+
+    @property
+    def has_cycle(self) -> bool:
+        """Check if the graph has a cycle, which the executor cannot run"""
+        return len(self.order) < self.node_count
+
+    def is_current(self, nodes: Dict[str, Any], connections: List[Any]) -> bool:
+        """Check the plan was compiled from graphs of this size (catches direct edits)"""
+        return self.node_count == len(nodes) and self.connection_count == len(connections)
+
+    def next_nodes(self, node_id: str, port: str = None) -> List[str]:
+        """Get the successors of a node, or only those on one output port"""
+        if port:
+            return self.port_successors[node_id].get(port, [])
+        return self.successors[node_id]
+
+    def descendants(self, node_id: str) -> Set[str]:
+        """Get the nodes reachable from a node through its outputs"""
+        if node_id not in self._descendants:
+            found: Set[str] = set()
+            pending = list(self.successors[node_id])
+            while pending:
+                successor = pending.pop()
+                if successor not in found:
+                    found.add(successor)
+                    pending.extend(self.successors[successor])
+            self._descendants[node_id] = found
+
+        return self._descendants[node_id]
+
+    def loop_body(self, node_id: str) -> Tuple[List[str], bool]:
+        """Get the nodes run for each item of a For Each node and whether all are batchable"""
+        if node_id not in self._loop_bodies:
+            body = set()
+            pending = list(self.next_nodes(node_id, "loop_body"))
+            while pending:
+                body_node = pending.pop()
+                if body_node not in body:
+                    body.add(body_node)
+                    pending.extend(self.successors[body_node])
+
+            for body_node in list(body):
+                body.update(self.expression_inputs[body_node])
+
+            steps = sorted(body, key=lambda n: self._position.get(n, len(self._position)))
+            batchable = bool(steps) and all(n in self.batchable for n in steps)
+            self._loop_bodies[node_id] = (steps, batchable)
+
+        return self._loop_bodies[node_id]
+
+    def _expression_inputs(self, node_id: str) -> List[str]:
+        """Collect the expressions feeding a node, ordered so sources come first"""
+        found = set()
+        pending = [n for n in self.data_sources[node_id] if n in self.expressions]
+        while pending:
+            expression = pending.pop()
+            if expression not in found:
+                found.add(expression)
+                pending.extend(n for n in self.data_sources[expression] if n in self.expressions)
+
+        return sorted(found, key=lambda n: self._position.get(n, len(self._position)))
+
+    def _topological_order(self) -> List[str]:
+        """Order nodes so each comes after its predecessors, leaving out nodes on cycles"""
+        remaining = {node_id: len(preds) for node_id, preds in self.predecessors.items()}
+        ready = deque(node_id for node_id, count in remaining.items() if count == 0)
+
+        order = []
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for successor in dict.fromkeys(self.successors[node_id]):
+                remaining[successor] -= 1
+                if remaining[successor] == 0:
+                    ready.append(successor)
+        return order
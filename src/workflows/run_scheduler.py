@@ -0,0 +1,587 @@
+"""
+Workflow Run Scheduler
+Queues workflow runs and executes them on a bounded pool of worker threads
+"""
+
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Set, Tuple
+
+from src.core.logger import setup_logger
+
+if TYPE_CHECKING:
+    from src.workflows.workflow_engine import WorkflowManager
+
+
+class RunPriority(Enum):
+    """Workflow run priority, highest first"""
+
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+
+_PRIORITIES = list(RunPriority)
+
+
+class RunStatus(Enum):
+    """Workflow run status"""
+
+    QUEUED = "queued"
+    DEFERRED = "deferred"  # Waiting for room in the queue
+    RUNNING = "running"
+    SUSPENDED = "suspended"  # Parked on a delay, holding no worker
+    COMPLETED = "completed"
+    FAILED = "failed"
+    REJECTED = "rejected"
+
+
+_UNFINISHED = (RunStatus.QUEUED, RunStatus.DEFERRED, RunStatus.RUNNING, RunStatus.SUSPENDED)
+
+
+class WorkflowRun:
+    """One requested execution of a workflow"""
+
+    def __init__(
+        self,
+        run_id: str,
+        workflow_id: str,
+        initial_data: Optional[Dict[str, Any]] = None,
+        priority: RunPriority = RunPriority.NORMAL,
+    ):
+        self.run_id = run_id
+        self.workflow_id = workflow_id
+        self.initial_data = initial_data or {}
+        self.priority = priority
+        self.status = RunStatus.QUEUED
+
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.completed_at: Optional[float] = None
+        self.attempts = 0
+        self.report: Optional[Dict[str, Any]] = None
+
+        # Executor continuation of a suspended run and when to resume it
+        self.continuation: Optional[Dict[str, Any]] = None
+        self.resume_at: Optional[float] = None
+
+        self._done = threading.Event()
+
+    @property
+    def queue_seconds(self) -> Optional[float]:
+        """Time from submission to start"""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_seconds(self) -> Optional[float]:
+        """Time from start to completion"""
+        if self.started_at is None or self.completed_at is None:
+            return None
+        return self.completed_at - self.started_at
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the run has finished or been rejected"""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            "run_id": self.run_id,
+            "workflow_id": self.workflow_id,
+            "initial_data": self.initial_data,
+            "priority": self.priority.value,
+            "status": self.status.value,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "attempts": self.attempts,
+            "continuation": self.continuation,
+            "resume_at": self.resume_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WorkflowRun":
+        """Create from dictionary"""
+        run = cls(
+            run_id=data["run_id"],
+            workflow_id=data["workflow_id"],
+            initial_data=data.get("initial_data"),
+            priority=RunPriority(data.get("priority", "normal")),
+        )
+        run.status = RunStatus(data["status"])
+        run.submitted_at = data["submitted_at"]
+        run.started_at = data.get("started_at")
+        run.completed_at = data.get("completed_at")
+        run.attempts = data.get("attempts", 0)
+        run.continuation = data.get("continuation")
+        run.resume_at = data.get("resume_at")
+        return run
+
+
+class WorkflowRunScheduler:
+    """Runs queued workflow runs on a fixed number of workers
+
+    Runs are taken highest priority first, oldest first within a priority,
+    skipping workflows already at their concurrency cap. The worker count is
+    the global cap. Once max_queued runs are waiting, new runs are rejected,
+    or with overload="defer" set aside until the queue drains.
+
+    Every state change is appended to a journal, so queued, deferred and
+    interrupted runs are picked up again after a restart. Each run uses its
+    own WorkflowExecutor and context. With max_per_workflow above 1, runs of
+    one workflow still share its node objects: execution and error counts
+    are updated under a lock, but last_executed and last_error only tell
+    which run touched a node last.
+
+    A run reaching a Delay node is suspended: its continuation is journaled
+    and a single timer thread re-queues it when due, so parked runs hold no
+    worker. The same timer heap fires the Timer Trigger nodes of all
+    workflows once schedule_timer_triggers() has armed them; their next due
+    times are kept in timers.json.
+    """
+
+    def __init__(
+        self,
+        workflow_manager: "WorkflowManager",
+        state_dir: str = "data/workflow_runs",
+        workers: int = 4,
+        max_per_workflow: int = 1,
+        max_queued: int = 1000,
+        overload: str = "reject",
+        max_deferred: int = 10000,
+        history_size: int = 1000,
+    ):
+        if overload not in ("reject", "defer"):
+            raise ValueError(f"Unknown overload policy: {overload}")
+
+        self.logger = setup_logger("workflow.scheduler")
+        self.workflow_manager = workflow_manager
+        self.workers = workers
+        self.max_per_workflow = max_per_workflow
+        self.max_queued = max_queued
+        self.overload = overload
+        self.max_deferred = max_deferred
+
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.journal_file = self.state_dir / "runs.jsonl"
+        self.timers_file = self.state_dir / "timers.json"
+        self._journal_records = 0
+
+        self._condition = threading.Condition()
+        self._queues: Dict[RunPriority, Deque[WorkflowRun]] = {p: deque() for p in _PRIORITIES}
+        self._deferred: Deque[WorkflowRun] = deque()
+        self._running: Dict[str, int] = {}  # workflow_id -> running runs
+        self._runs: Dict[str, WorkflowRun] = {}  # Unfinished runs by ID
+        self._history: Deque[WorkflowRun] = deque(maxlen=history_size)  # Finished runs
+        self._counts = {status: 0 for status in RunStatus if status not in _UNFINISHED}
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._sequence = 0
+
+        # Timer heap of (due, sequence, kind, key): kind "run" resumes a
+        # suspended run, kind "trigger" fires a "workflow_id/node_id" timer
+        self._timers: List[Tuple[float, int, str, str]] = []
+        self._timer_thread: Optional[threading.Thread] = None
+        self._trigger_due: Dict[str, Optional[float]] = self._load_triggers()
+        self._armed_triggers: Set[str] = set()
+
+        with self._condition:
+            self._recover()
+
+    def submit(
+        self,
+        workflow_id: str,
+        initial_data: Optional[Dict[str, Any]] = None,
+        priority: RunPriority = RunPriority.NORMAL,
+    ) -> WorkflowRun:
+        """
+        Request a workflow run
+
+        Args:
+            workflow_id: Workflow to run
+            initial_data: Initial execution context
+            priority: Run priority
+
+        Returns:
+            The run; its status is REJECTED if the scheduler is overloaded
+        """
+        with self._condition:
+            self._sequence += 1
+            run_id = f"run_{int(time.time() * 1000)}_{self._sequence}"
+            run = WorkflowRun(run_id, workflow_id, initial_data, priority)
+
+            if self._queued_count() < self.max_queued:
+                self._enqueue(run)
+            elif self.overload == "defer" and len(self._deferred) < self.max_deferred:
+                run.status = RunStatus.DEFERRED
+                self._deferred.append(run)
+                self._runs[run.run_id] = run
+            else:
+                self._finish(run, RunStatus.REJECTED)
+                self.logger.warning(f"Rejected run of {workflow_id}: queue is full")
+                return run
+
+            self._journal(run)
+            self._condition.notify()
+
+        self._ensure_workers()
+        return run
+
+    def get_run(self, run_id: str) -> Optional[WorkflowRun]:
+        """Get an unfinished or recently finished run"""
+        with self._condition:
+            run = self._runs.get(run_id)
+            if run is None:
+                run = next((r for r in self._history if r.run_id == run_id), None)
+            return run
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no runs are queued, deferred or running"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._runs:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def schedule_timer_triggers(self):
+        """Arm the enabled Timer Trigger nodes of all enabled workflows"""
+        now = time.time()
+        with self._condition:
+            for workflow in list(self.workflow_manager.workflows.values()):
+                if not workflow.enabled:
+                    continue
+
+                for node in workflow.nodes.values():
+                    key = f"{workflow.workflow_id}/{node.node_id}"
+                    if node.node_type != "trigger.timer" or not node.enabled:
+                        continue
+                    if key in self._armed_triggers:
+                        continue
+
+                    # Due times saved by an earlier process are kept; None means run once and done
+                    interval = float(node.config.get("interval_seconds", 60))
+                    due = self._trigger_due.get(key, now + interval)
+                    self._armed_triggers.add(key)
+                    self._trigger_due[key] = due
+                    if due is not None:
+                        self._add_timer(due, "trigger", key)
+
+            self._save_triggers()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the workers after their current runs; queued runs stay in the journal"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+        if self._timer_thread:
+            self._timer_thread.join(timeout)
+            self._timer_thread = None
+
+        with self._condition:
+            # Triggers are re-armed by the next schedule_timer_triggers()
+            self._timers = [timer for timer in self._timers if timer[2] == "run"]
+            heapq.heapify(self._timers)
+            self._armed_triggers.clear()
+            self._stopping = False
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get run counts and queue and run time statistics over recent runs"""
+        with self._condition:
+            finished = list(self._history)
+            metrics = {
+                "queued": self._queued_count(),
+                "deferred": len(self._deferred),
+                "running": sum(self._running.values()),
+                "suspended": sum(r.status == RunStatus.SUSPENDED for r in self._runs.values()),
+                "timers": len(self._timers),
+                "workers": self.workers,
+            }
+            metrics.update({status.value: count for status, count in self._counts.items()})
+
+        metrics["queue_seconds"] = _summarize([r.queue_seconds for r in finished])
+        metrics["run_seconds"] = _summarize([r.run_seconds for r in finished])
+        return metrics
+
+    def _ensure_workers(self):
+        """Start worker threads, and the timer thread if timers are set, that are not running"""
+        with self._condition:
+            if self._stopping:
+                return
+
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._work, name=f"workflow_run_{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+            if self._timers and not (self._timer_thread and self._timer_thread.is_alive()):
+                self._timer_thread = threading.Thread(
+                    target=self._run_timers, name="workflow_timers", daemon=True
+                )
+                self._timer_thread.start()
+
+    def _work(self):
+        """Worker loop: take the next eligible run and execute it"""
+        from src.workflows.workflow_engine import WorkflowStatus
+
+        while True:
+            with self._condition:
+                run = self._take_next()
+                while run is None and not self._stopping:
+                    self._condition.wait()
+                    run = self._take_next()
+                if run is None:
+                    return
+
+                run.status = RunStatus.RUNNING
+                if run.started_at is None:
+                    run.started_at = time.time()
+                run.attempts += 1
+                self._running[run.workflow_id] = self._running.get(run.workflow_id, 0) + 1
+                self._journal(run)
+
+            executor = self._execute(run)
+
+            with self._condition:
+                self._running[run.workflow_id] -= 1
+                if executor is not None and executor.continuation:
+                    run.status = RunStatus.SUSPENDED
+                    run.continuation = executor.continuation
+                    run.resume_at = executor.continuation["resume_at"]
+                    self._add_timer(run.resume_at, "run", run.run_id)
+                else:
+                    run.report = executor.get_execution_report() if executor else None
+                    run.completed_at = time.time()
+                    run.continuation = None
+                    success = executor is not None and executor.status == WorkflowStatus.COMPLETED
+                    self._finish(run, RunStatus.COMPLETED if success else RunStatus.FAILED)
+                self._journal(run)
+
+                self._promote_deferred()
+                self._condition.notify_all()
+
+    def _execute(self, run: WorkflowRun):
+        """Execute or resume a run on its own executor, or return None if it cannot run"""
+        from src.workflows.workflow_engine import WorkflowExecutor
+
+        workflow = self.workflow_manager.get_workflow(run.workflow_id)
+        if workflow is None or not workflow.enabled:
+            self.logger.error(f"Workflow not found or disabled: {run.workflow_id}")
+            return None
+
+        executor = WorkflowExecutor(suspend_delays=True)
+        try:
+            if run.continuation:
+                executor.execute_continuation(workflow, run.continuation)
+            else:
+                executor.execute(workflow, dict(run.initial_data))
+        except Exception as e:
+            self.logger.error(f"Run {run.run_id} failed: {e}")
+            return None
+        return executor
+
+    def _add_timer(self, due: float, kind: str, key: str):
+        """Add a timer to the heap and make sure the timer thread is running"""
+        self._sequence += 1
+        heapq.heappush(self._timers, (due, self._sequence, kind, key))
+        self._condition.notify_all()
+        self._ensure_workers()
+
+    def _run_timers(self):
+        """Timer loop: fire due timers, then sleep until the next one"""
+        with self._condition:
+            while not self._stopping:
+                now = time.time()
+                while self._timers and self._timers[0][0] <= now:
+                    due, _, kind, key = heapq.heappop(self._timers)
+                    if kind == "run":
+                        self._resume_run(key)
+                    else:
+                        self._fire_trigger(key, due, now)
+
+                timeout = self._timers[0][0] - now if self._timers else None
+                self._condition.wait(timeout)
+
+    def _resume_run(self, run_id: str):
+        """Queue a suspended run again"""
+        run = self._runs.get(run_id)
+        if run is None or run.status != RunStatus.SUSPENDED:
+            return
+
+        # Suspended runs were admitted before, so they skip the queue limit
+        self._enqueue(run)
+        self._journal(run)
+        self._condition.notify_all()
+        self._ensure_workers()
+
+    def _fire_trigger(self, key: str, due: float, now: float):
+        """Submit a run for a timer trigger and schedule its next firing"""
+        if self._trigger_due.get(key) != due or key not in self._armed_triggers:
+            return
+
+        workflow_id, node_id = key.split("/", 1)
+        workflow = self.workflow_manager.get_workflow(workflow_id)
+        node = workflow.nodes.get(node_id) if workflow else None
+        if not (workflow and workflow.enabled and node and node.enabled):
+            # Trigger removed or disabled since it was armed
+            self._armed_triggers.discard(key)
+            self._trigger_due.pop(key, None)
+            self._save_triggers()
+            return
+
+        # Missed firings are skipped rather than run back to back
+        next_due = None
+        if not node.config.get("run_once", False):
+            interval = float(node.config.get("interval_seconds", 60))
+            next_due = due + interval if due + interval > now else now + interval
+            self._add_timer(next_due, "trigger", key)
+        self._trigger_due[key] = next_due
+        self._save_triggers()
+
+        self.submit(workflow_id)
+
+    def _load_triggers(self) -> Dict[str, Optional[float]]:
+        """Load timer trigger due times saved by an earlier process"""
+        if not self.timers_file.exists():
+            return {}
+        try:
+            with open(self.timers_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Error loading timer triggers: {e}")
+            return {}
+
+    def _save_triggers(self):
+        """Save timer trigger due times"""
+        tmp_path = self.timers_file.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._trigger_due, f)
+        os.replace(tmp_path, self.timers_file)
+
+    def _take_next(self) -> Optional[WorkflowRun]:
+        """Remove the highest priority queued run whose workflow is under its cap"""
+        if self._stopping:
+            return None
+
+        for priority in _PRIORITIES:
+            queue = self._queues[priority]
+            for i, run in enumerate(queue):
+                if self._running.get(run.workflow_id, 0) < self.max_per_workflow:
+                    del queue[i]
+                    return run
+        return None
+
+    def _enqueue(self, run: WorkflowRun):
+        """Add a run to the queue of its priority"""
+        run.status = RunStatus.QUEUED
+        self._queues[run.priority].append(run)
+        self._runs[run.run_id] = run
+
+    def _promote_deferred(self):
+        """Move deferred runs into the queue while it has room"""
+        while self._deferred and self._queued_count() < self.max_queued:
+            run = self._deferred.popleft()
+            self._enqueue(run)
+            self._journal(run)
+
+    def _queued_count(self) -> int:
+        """Number of queued runs"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _finish(self, run: WorkflowRun, status: RunStatus):
+        """Record a run as finished"""
+        run.status = status
+        self._runs.pop(run.run_id, None)
+        self._history.append(run)
+        self._counts[status] += 1
+        run._done.set()
+
+    def _journal(self, run: WorkflowRun):
+        """Append a run's state to the journal, compacting it once mostly stale"""
+        with open(self.journal_file, "a") as f:
+            f.write(_encode(run) + "\n")
+        self._journal_records += 1
+
+        if self._journal_records > 2 * len(self._runs) + 1000:
+            self._compact_journal()
+
+    def _compact_journal(self):
+        """Rewrite the journal with only unfinished runs"""
+        tmp_path = self.journal_file.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            for run in self._runs.values():
+                f.write(_encode(run) + "\n")
+        os.replace(tmp_path, self.journal_file)
+        self._journal_records = len(self._runs)
+
+    def _recover(self):
+        """Re-queue runs left unfinished by the last process"""
+        if not self.journal_file.exists():
+            return
+
+        latest: Dict[str, Dict[str, Any]] = {}
+        with open(self.journal_file, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line
+                latest[record["run_id"]] = record
+
+        unfinished = sorted(
+            (r for r in latest.values() if RunStatus(r["status"]) in _UNFINISHED),
+            key=lambda r: r["submitted_at"],
+        )
+        for record in unfinished:
+            run = WorkflowRun.from_dict(record)
+            if run.status == RunStatus.DEFERRED:
+                self._deferred.append(run)
+                self._runs[run.run_id] = run
+            elif run.status == RunStatus.SUSPENDED:
+                self._runs[run.run_id] = run
+                self._add_timer(run.resume_at, "run", run.run_id)
+            else:
+                # Runs interrupted mid-execution start over from their last continuation
+                self._enqueue(run)
+
+        self._promote_deferred()
+        self._compact_journal()
+        if unfinished:
+            self.logger.info(f"Recovered {len(unfinished)} unfinished workflow runs")
+            self._ensure_workers()
+
+
+def _encode(run: WorkflowRun) -> str:
+    """Encode a run as one journal line; context values JSON cannot hold are stored as text"""
+    return json.dumps(run.to_dict(), separators=(",", ":"), default=str)
+
+
+def _summarize(values: List[Optional[float]]) -> Dict[str, float]:
+    """Get the mean, 95th percentile and maximum of the values that are set"""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return {"count": 0, "mean": 0.0, "p95": 0.0, "max": 0.0}
+
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p95": values[min(len(values) - 1, int(0.95 * len(values)))],
+        "max": values[-1],
+    }
@@ -4,15 +4,24 @@ Executes workflows by traversing the node graph
 """
 
 import json
+import threading
 import time
+from collections import ChainMap
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from enum import Enum
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from src.core.logger import setup_logger
+from src.workflows.execution_plan import ExecutionPlan
+from src.workflows.run_scheduler import RunPriority, WorkflowRun, WorkflowRunScheduler
 from src.workflows.workflow_nodes import WorkflowNode, create_node
 
+# Guards workflow execution counts, which concurrent runs of a workflow share
+_stats_lock = threading.Lock()
+
 
 class WorkflowStatus(Enum):
     """Workflow execution status"""
@@ -78,6 +87,18 @@ class Workflow:
         # Execution
         self.enabled = True
         self.execution_count = 0
+        self.max_concurrency = 1  # Nodes run at once; above 1, branches run in parallel
+        self._plan: Optional[ExecutionPlan] = None
+
+    def get_execution_plan(self) -> ExecutionPlan:
+        """Get the compiled execution plan, compiling it if the graph changed"""
+        if self._plan is None or not self._plan.is_current(self.nodes, self.connections):
+            self._plan = ExecutionPlan(self.nodes, self.connections)
+        return self._plan
+
+    def invalidate_plan(self):
+        """Drop the compiled execution plan after a graph change"""
+        self._plan = None
 
     def add_node(self, node: WorkflowNode) -> bool:
         """Add node to workflow"""
@@ -85,6 +106,7 @@ class Workflow:
             return False
 
         self.nodes[node.node_id] = node
+        self.invalidate_plan()
         self.modified_at = datetime.now()
         return True
 
@@ -99,6 +121,7 @@ class Workflow:
         ]
 
         del self.nodes[node_id]
+        self.invalidate_plan()
         self.modified_at = datetime.now()
         return True
 
@@ -133,6 +156,7 @@ class Workflow:
         to_port_obj.connected_to = f"{connection.from_node}.{connection.from_port}"
 
         self.connections.append(connection)
+        self.invalidate_plan()
         self.modified_at = datetime.now()
         return True
 
@@ -156,6 +180,7 @@ class Workflow:
                     break
 
         self.connections.remove(connection)
+        self.invalidate_plan()
         self.modified_at = datetime.now()
         return True
 
@@ -207,6 +232,7 @@ class Workflow:
                 "version": self.version,
                 "enabled": self.enabled,
                 "execution_count": self.execution_count,
+                "max_concurrency": self.max_concurrency,
             },
         }
 
@@ -234,6 +260,7 @@ class Workflow:
         workflow.version = metadata.get("version", 1)
         workflow.enabled = metadata.get("enabled", True)
         workflow.execution_count = metadata.get("execution_count", 0)
+        workflow.max_concurrency = metadata.get("max_concurrency", 1)
 
         # Restore nodes
         for node_id, node_data in data.get("nodes", {}).items():
@@ -265,6 +292,7 @@ class Workflow:
             )
             workflow.connections.append(connection)
 
+        workflow.invalidate_plan()
         return workflow
 
     @staticmethod
@@ -275,12 +303,19 @@ class Workflow:
 
 
 class WorkflowExecutor:
-    """Executes workflows"""
+    """Executes workflows
 
-    def __init__(self):
+    Delay nodes block the run by default. With suspend_delays, the run stops
+    at the first delay instead, with status PAUSED and the rest of the run in
+    continuation, which execute_continuation picks up later, on this or any
+    other executor.
+    """
+
+    def __init__(self, suspend_delays: bool = False):
         self.logger = setup_logger("workflow.executor")
         self.status = WorkflowStatus.IDLE
         self.current_workflow: Optional[Workflow] = None
+        self.suspend_delays = suspend_delays
 
         # Execution state
         self.context: Dict[str, Any] = {}
@@ -288,6 +323,9 @@ class WorkflowExecutor:
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
 
+        # Remaining work of a run suspended on a delay
+        self.continuation: Optional[Dict[str, Any]] = None
+
     def execute(self, workflow: Workflow, initial_data: Dict[str, Any] = None) -> bool:
         """Execute workflow"""
         try:
@@ -307,31 +345,51 @@ class WorkflowExecutor:
             self.execution_log = []
             self.started_at = datetime.now()
             self.completed_at = None
+            self.continuation = None
 
-            # Find trigger nodes
-            trigger_nodes = [n for n in workflow.nodes.values() if n.category.value == "trigger"]
+            plan = workflow.get_execution_plan()
 
-            if not trigger_nodes:
+            if not plan.triggers:
                 self.logger.error("No trigger nodes found")
                 self.status = WorkflowStatus.FAILED
                 return False
 
+            if plan.has_cycle:
+                self.logger.error("Workflow contains a cycle")
+                self.status = WorkflowStatus.FAILED
+                return False
+
             # Execute from each trigger
-            for trigger in trigger_nodes:
-                if not trigger.enabled:
-                    continue
+            triggers = [workflow.nodes[t] for t in plan.triggers if workflow.nodes[t].enabled]
+            if workflow.max_concurrency > 1:
+                self._execute_parallel(triggers, plan, workflow.max_concurrency)
+            else:
+                self._execute_stack([trigger.node_id for trigger in reversed(triggers)])
 
-                self._execute_from_node(trigger)
+            return self._complete(workflow)
 
-            # Complete
-            self.status = WorkflowStatus.COMPLETED
+        except Exception as e:
+            self.logger.error(f"Workflow execution error: {e}")
+            self.status = WorkflowStatus.FAILED
             self.completed_at = datetime.now()
-            workflow.execution_count += 1
+            return False
 
-            duration = (self.completed_at - self.started_at).total_seconds()
-            self.logger.info(f"Workflow completed in {duration:.2f}s")
+    def execute_continuation(self, workflow: Workflow, continuation: Dict[str, Any]) -> bool:
+        """Finish a run suspended by an executor with suspend_delays"""
+        try:
+            self.current_workflow = workflow
+            self.status = WorkflowStatus.RUNNING
+            self.context = continuation["context"]
+            self.execution_log = list(continuation["execution_log"])
+            self.started_at = datetime.fromisoformat(continuation["started_at"])
+            self.completed_at = None
+            self.continuation = None
 
-            return True
+            # Nodes removed while the run was parked are skipped
+            stack = [node_id for node_id in continuation["stack"] if node_id in workflow.nodes]
+            self._execute_stack(stack)
+
+            return self._complete(workflow)
 
         except Exception as e:
             self.logger.error(f"Workflow execution error: {e}")
@@ -339,56 +397,311 @@ class WorkflowExecutor:
             self.completed_at = datetime.now()
             return False
 
-    def _execute_from_node(self, node: WorkflowNode) -> bool:
-        """Execute workflow starting from a node"""
-        if not node.enabled:
+    def _complete(self, workflow: Workflow) -> bool:
+        """Mark the run completed, or paused if it was suspended"""
+        if self.continuation:
+            self.status = WorkflowStatus.PAUSED
+            self.logger.info(f"Workflow suspended until {self.continuation['resume_at']:.0f}")
             return True
 
-        # Log execution
-        self._log_node_execution(node, "started")
+        self.status = WorkflowStatus.COMPLETED
+        self.completed_at = datetime.now()
+        with _stats_lock:
+            workflow.execution_count += 1
 
-        # Execute node
-        success = node.execute(self.context)
+        duration = (self.completed_at - self.started_at).total_seconds()
+        self.logger.info(f"Workflow completed in {duration:.2f}s")
 
-        if not success:
-            self._log_node_execution(node, "failed")
-            return False
+        return True
 
-        self._log_node_execution(node, "completed")
+    def _execute_stack(
+        self,
+        stack: List[str],
+        context: Optional[Dict[str, Any]] = None,
+        log: Optional[List[Dict[str, Any]]] = None,
+    ) -> bool:
+        """
+        Execute nodes depth first from a stack of node IDs, top last
+
+        Args:
+            stack: Node IDs to run, the next one last
+            context: Context to run against, for loop bodies; defaults to the run's
+            log: Log to append to; defaults to the run's
+
+        Returns:
+            False if any node failed
+        """
+        workflow = self.current_workflow
+        plan = workflow.get_execution_plan()
+
+        # Only the run itself can be suspended, not a loop body inside it
+        top_level = context is None
+        context = self.context if context is None else context
+        log = self.execution_log if log is None else log
+
+        # Explicit stack in place of recursion, so deep graphs cannot overflow
+        success = True
+        while stack:
+            node = workflow.nodes[stack.pop()]
+            if not node.enabled:
+                continue
+
+            # Log execution
+            log.append(self._log_entry(node, "started"))
+
+            # Execute node
+            self._evaluate_expressions(node, plan, context)
+            if not node.execute(context):
+                log.append(self._log_entry(node, "failed"))
+                success = False
+                continue
+
+            log.append(self._log_entry(node, "completed"))
+
+            next_port = context.pop("__next_port__", None)
+            items = context.pop("__loop__", None)
+            if items is not None:
+                # A failed loop body fails the For Each, so "completed" is not followed
+                if not self._execute_loop(node, items, plan, context, log):
+                    success = False
+                    continue
+                next_port = "completed"
+
+            # Successors are pushed in reverse so they run in connection order
+            next_nodes = self._get_next_nodes(node, plan, next_port)
+            stack.extend(n.node_id for n in reversed(next_nodes))
+
+            delay = context.pop("__delay__", None)
+            if delay and self.suspend_delays and top_level:
+                self.continuation = {
+                    "stack": stack,
+                    "resume_at": time.time() + delay,
+                    "context": self.context,
+                    "execution_log": self.execution_log,
+                    "started_at": self.started_at.isoformat(),
+                }
+                break
+            if delay:
+                time.sleep(delay)
 
-        # Find next nodes
-        next_nodes = self._get_next_nodes(node)
+        return success
 
-        # Execute next nodes
-        for next_node in next_nodes:
-            self._execute_from_node(next_node)
+    def _evaluate_expressions(self, node: WorkflowNode, plan: ExecutionPlan, context: Dict):
+        """Run the expression nodes a node reads, so its inputs are current"""
+        for node_id in plan.expression_inputs[node.node_id]:
+            expression = self.current_workflow.nodes[node_id]
+            if expression.enabled:
+                expression.execute(context)
 
+    def _execute_loop(
+        self,
+        node: WorkflowNode,
+        items: Iterable[Any],
+        plan: ExecutionPlan,
+        context: Dict[str, Any],
+        log: List[Dict[str, Any]],
+    ) -> bool:
+        """Run a For Each node's body for every item, as configured by its mode"""
+        body, batchable = plan.loop_body(node.node_id)
+        nodes = self.current_workflow.nodes
+
+        if node.config.get("mode") == "batch":
+            if batchable and all(nodes[node_id].enabled for node_id in body):
+                return self._execute_batch(node, items, body, context, log)
+            return self._execute_map(node, items, plan, context, log)
+
+        start = [n.node_id for n in reversed(self._get_next_nodes(node, plan, "loop_body"))]
+        success = True
+        for index, item in enumerate(items):
+            node.set_output_value("item", item, context)
+            node.set_output_value("index", index, context)
+            success = self._execute_stack(list(start), context, log) and success
+        return success
+
+    def _execute_batch(
+        self,
+        node: WorkflowNode,
+        items: Iterable[Any],
+        body: List[str],
+        context: Dict[str, Any],
+        log: List[Dict[str, Any]],
+    ) -> bool:
+        """
+        Run a body of batchable nodes over all items in one pass
+
+        The body is flattened into a fixed list of evaluate() calls, skipping
+        the per-node stack, logging and bookkeeping of a sequential loop. Each
+        body node gets one log entry with the number of items it ran for.
+        """
+        body_nodes = [self.current_workflow.nodes[node_id] for node_id in body]
+
+        count = 0
+        for index, item in enumerate(items):
+            node.set_output_value("item", item, context)
+            node.set_output_value("index", index, context)
+            for body_node in body_nodes:
+                if not body_node.evaluate(context):
+                    log.append(self._log_entry(body_node, "failed"))
+                    return False
+            count += 1
+
+        for body_node in body_nodes:
+            body_node.record_execution(count)
+            entry = self._log_entry(body_node, "completed")
+            entry["items"] = count
+            log.append(entry)
         return True
 
-    def _get_next_nodes(self, node: WorkflowNode) -> List[WorkflowNode]:
-        """Get nodes connected to this node's output"""
-        next_nodes = []
+    def _execute_map(
+        self,
+        node: WorkflowNode,
+        items: Iterable[Any],
+        plan: ExecutionPlan,
+        context: Dict[str, Any],
+        log: List[Dict[str, Any]],
+    ) -> bool:
+        """
+        Run the body for each item on a bounded thread pool
+
+        Items are taken batch_size at a time, so large or lazy inputs are
+        never held in full. Each item runs on its own write layer over the
+        context; layers and logs are merged in item order, so later items
+        win conflicting writes as in a sequential loop.
+        """
+        start = [n.node_id for n in reversed(self._get_next_nodes(node, plan, "loop_body"))]
+        batch_size = max(1, int(node.config.get("batch_size", 100)))
+        max_workers = max(1, int(node.config.get("max_workers", 4)))
+
+        def run_item(indexed_item: Tuple[int, Any]):
+            index, item = indexed_item
+            writes: Dict[str, Any] = {}
+            node.set_output_value("item", item, writes)
+            node.set_output_value("index", index, writes)
+            entries: List[Dict[str, Any]] = []
+            success = self._execute_stack(list(start), ChainMap(writes, context), entries)
+            return success, writes, entries
+
+        success = True
+        indexed_items = enumerate(items)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="for_each") as pool:
+            while True:
+                chunk = list(islice(indexed_items, batch_size))
+                if not chunk:
+                    break
 
-        for connection in self.current_workflow.connections:
-            if connection.from_node == node.node_id:
-                # Check if this is the correct output port
-                # For conditional nodes, check the __next_port__ context
-                next_port = self.context.get("__next_port__")
-                if next_port and connection.from_port != next_port:
-                    continue
+                for item_success, writes, entries in pool.map(run_item, chunk):
+                    context.update(writes)
+                    log.extend(entries)
+                    success = success and item_success
+        return success
+
+    def _execute_parallel(self, triggers: List[WorkflowNode], plan: ExecutionPlan, limit: int):
+        """
+        Execute branches concurrently on a thread pool of at most limit nodes
+
+        Every node run (activation) gets its own write layer over the shared
+        context, so __next_port__ and outputs of parallel branches never mix
+        mid-node. Layers are merged as activations finish; when two write the
+        same key, the one later in depth-first order wins, and the log is
+        sorted into depth-first order.
+
+        A node whose inputs are bound to other nodes waits until no activation
+        earlier in depth-first order is still running or queued that is, or
+        may lead to, one of those nodes. It therefore sees every input a
+        sequential run would have produced before it. The one difference from
+        a sequential run: an input from a node that depth-first order runs
+        later may already be set. Delays hold only their own branch and are
+        never suspended.
+        """
+        # Activation path: child indices from the trigger, ordered like a depth-first run
+        writers: Dict[str, Tuple[int, ...]] = {}  # context key -> path of its last writer
+        logs: List[Tuple[Tuple[int, ...], List[Dict[str, Any]]]] = []
+        waiting: List[Tuple[WorkflowNode, Tuple[int, ...]]] = []
+        futures: Dict[Future, Tuple[WorkflowNode, Tuple[int, ...]]] = {}
+
+        def blocked(node: WorkflowNode, path: Tuple[int, ...]) -> bool:
+            sources = plan.data_sources[node.node_id]
+            if not sources:
+                return False
 
-                to_node = self.current_workflow.nodes.get(connection.to_node)
-                if to_node and to_node.enabled:
-                    next_nodes.append(to_node)
+            pending = list(futures.values()) + waiting
+            return any(
+                other_path < path
+                and (other.node_id in sources or sources & plan.descendants(other.node_id))
+                for other, other_path in pending
+            )
 
-        # Clear __next_port__ context
-        if "__next_port__" in self.context:
-            del self.context["__next_port__"]
+        def submit(node: WorkflowNode, path: Tuple[int, ...]):
+            futures[pool.submit(self._run_activation, node)] = (node, path)
+
+        with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="workflow") as pool:
+            waiting.extend((trigger, (i,)) for i, trigger in enumerate(triggers))
+
+            while waiting or futures:
+                # The earliest pending activation is never blocked, so this always progresses
+                ready = [(node, path) for node, path in waiting if not blocked(node, path)]
+                ready_paths = {path for _, path in ready}
+                waiting = [activation for activation in waiting if activation[1] not in ready_paths]
+                for node, path in ready:
+                    submit(node, path)
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: futures[f][1]):
+                    node, path = futures.pop(future)
+                    success, writes, entries = future.result()
+                    logs.append((path, entries))
+
+                    next_port = writes.pop("__next_port__", None)
+                    for key, value in writes.items():
+                        if key not in writers or writers[key] <= path:
+                            self.context[key] = value
+                            writers[key] = path
+
+                    if success:
+                        next_nodes = self._get_next_nodes(node, plan, next_port)
+                        waiting.extend((n, path + (i,)) for i, n in enumerate(next_nodes))
+
+        for _, entries in sorted(logs, key=lambda log: log[0]):
+            self.execution_log.extend(entries)
+
+    def _run_activation(
+        self, node: WorkflowNode
+    ) -> Tuple[bool, Dict[str, Any], List[Dict[str, Any]]]:
+        """Run one node against a private write layer over the shared context"""
+        plan = self.current_workflow.get_execution_plan()
+        writes: Dict[str, Any] = {}
+        layer = ChainMap(writes, self.context)
+        entries = [self._log_entry(node, "started")]
+
+        self._evaluate_expressions(node, plan, layer)
+        success = node.execute(layer)
+        delay = writes.pop("__delay__", None)
+        if delay:
+            time.sleep(delay)
+        entries.append(self._log_entry(node, "completed" if success else "failed"))
+
+        items = writes.pop("__loop__", None)
+        if items is not None:
+            success = self._execute_loop(node, items, plan, layer, entries) and success
+            writes["__next_port__"] = "completed"
+
+        return success, writes, entries
+
+    def _get_next_nodes(
+        self, node: WorkflowNode, plan: ExecutionPlan, next_port: Optional[str] = None
+    ) -> List[WorkflowNode]:
+        """Get nodes connected to this node's output"""
+        # For conditional nodes, follow only the port named in the __next_port__ context
+        next_nodes = []
+        for node_id in plan.next_nodes(node.node_id, next_port):
+            to_node = self.current_workflow.nodes[node_id]
+            if to_node.enabled:
+                next_nodes.append(to_node)
 
         return next_nodes
 
-    def _log_node_execution(self, node: WorkflowNode, status: str):
-        """Log node execution"""
+    def _log_entry(self, node: WorkflowNode, status: str) -> Dict[str, Any]:
+        """Build a node execution log entry"""
         log_entry = {
             "timestamp": datetime.now().isoformat(),
             "node_id": node.node_id,
@@ -400,7 +713,7 @@ class WorkflowExecutor:
         if status == "failed" and node.last_error:
             log_entry["error"] = node.last_error
 
-        self.execution_log.append(log_entry)
+        return log_entry
 
     def pause(self):
         """Pause execution"""
@@ -456,6 +769,9 @@ class WorkflowManager:
         # Executor
         self.executor = WorkflowExecutor()
 
+        # Background run queue, created on first use
+        self._scheduler: Optional[WorkflowRunScheduler] = None
+
         # Load workflows
         self._load_workflows()
 
@@ -519,6 +835,21 @@ class WorkflowManager:
 
         return self.executor.execute(workflow, initial_data)
 
+    def get_scheduler(self) -> WorkflowRunScheduler:
+        """Get the run scheduler, recovering runs queued before the last shutdown"""
+        if self._scheduler is None:
+            self._scheduler = WorkflowRunScheduler(self, state_dir=str(self.workflows_dir / "runs"))
+        return self._scheduler
+
+    def submit_workflow(
+        self,
+        workflow_id: str,
+        initial_data: Dict[str, Any] = None,
+        priority: RunPriority = RunPriority.NORMAL,
+    ) -> WorkflowRun:
+        """Queue a workflow run without waiting for it"""
+        return self.get_scheduler().submit(workflow_id, initial_data, priority)
+
     def _save_workflow(self, workflow: Workflow):
         """Save workflow to disk"""
         workflow_file = self.workflows_dir / f"{workflow.workflow_id}.json"
@@ -4,12 +4,16 @@ Pre-built node types for visual workflow automation
 """
 
 import json
+import threading
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.core.logger import setup_logger
 
+# Guards node execution stats, which concurrent runs of a workflow share
+_stats_lock = threading.Lock()
+
 
 class NodeCategory(Enum):
     """Categories of workflow nodes"""
@@ -71,6 +75,10 @@ class NodePort:
 class WorkflowNode:
     """Base class for workflow nodes"""
 
+    # Batchable nodes only read inputs and write outputs or variables, never
+    # branch, and implement evaluate(), so For Each batches can run them
+    batchable = False
+
     def __init__(
         self,
         node_id: str,
@@ -92,6 +100,7 @@ class WorkflowNode:
         # Ports
         self.input_ports: List[NodePort] = []
         self.output_ports: List[NodePort] = []
+        self._ports_by_id: Dict[Tuple[bool, str], NodePort] = {}  # (is_input, port_id) -> port
 
         # Configuration
         self.config: Dict[str, Any] = {}
@@ -116,49 +125,62 @@ class WorkflowNode:
         """Add input port"""
         port = NodePort(port_id, name, port_type, True, required, default_value)
         self.input_ports.append(port)
+        self._ports_by_id.setdefault((True, port_id), port)
         return port
 
     def add_output_port(self, port_id: str, name: str, port_type: PortType):
         """Add output port"""
         port = NodePort(port_id, name, port_type, False)
         self.output_ports.append(port)
+        self._ports_by_id.setdefault((False, port_id), port)
         return port
 
     def get_input_value(self, port_id: str, context: Dict[str, Any]) -> Any:
         """Get value from input port"""
-        for port in self.input_ports:
-            if port.port_id == port_id:
-                # Check if connected
-                if port.connected_to:
-                    return context.get(port.connected_to)
-                # Return default value
-                return port.default_value
-        return None
+        port = self._ports_by_id.get((True, port_id))
+        if port is None:
+            return None
+
+        # Check if connected
+        if port.connected_to:
+            return context.get(port.connected_to)
+        # Return default value
+        return port.default_value
 
     def set_output_value(self, port_id: str, value: Any, context: Dict[str, Any]):
         """Set value to output port"""
-        for port in self.output_ports:
-            if port.port_id == port_id:
-                context[f"{self.node_id}.{port_id}"] = value
-                return True
-        return False
+        if (False, port_id) not in self._ports_by_id:
+            return False
+
+        context[f"{self.node_id}.{port_id}"] = value
+        return True
 
     def execute(self, context: Dict[str, Any]) -> bool:
         """Execute node logic (override in subclasses)"""
         try:
-            self.last_executed = datetime.now()
-            self.execution_count += 1
+            self.record_execution()
 
             # Default implementation
             self.logger.info(f"Executing node: {self.display_name}")
             return True
 
         except Exception as e:
-            self.error_count += 1
-            self.last_error = str(e)
+            with _stats_lock:
+                self.error_count += 1
+                self.last_error = str(e)
             self.logger.error(f"Node execution error: {e}")
             return False
 
+    def record_execution(self, count: int = 1):
+        """Count executions of this node (safe across concurrent runs)"""
+        with _stats_lock:
+            self.execution_count += count
+            self.last_executed = datetime.now()
+
+    def evaluate(self, context: Dict[str, Any]) -> bool:
+        """Compute outputs without execution bookkeeping (batchable nodes only)"""
+        raise NotImplementedError(f"{self.node_type} cannot run in a batch")
+
     def validate(self) -> List[str]:
         """Validate node configuration"""
         errors = []
@@ -383,6 +405,8 @@ class IfNode(WorkflowNode):
 class CompareNode(WorkflowNode):
     """Compare two values"""
 
+    batchable = True
+
     def __init__(self, node_id: str):
         super().__init__(
             node_id,
@@ -404,7 +428,9 @@ class CompareNode(WorkflowNode):
 
     def execute(self, context: Dict[str, Any]) -> bool:
         super().execute(context)
+        return self.evaluate(context)
 
+    def evaluate(self, context: Dict[str, Any]) -> bool:
         value_a = self.get_input_value("value_a", context)
         value_b = self.get_input_value("value_b", context)
         operator = self.config.get("operator", "==")
@@ -448,6 +474,24 @@ class ForEachNode(WorkflowNode):
         self.add_output_port("index", "Index", PortType.NUMBER)
         self.add_output_port("completed", "Completed", PortType.EXEC)
 
+        # In batch mode, a body of batchable nodes runs over all items in one
+        # pass; any other body runs per item on max_workers threads, taking
+        # batch_size items at a time. Items in a thread pool do not see each
+        # other's writes; later items win conflicts, as in a sequential loop.
+        self.config = {
+            "mode": "sequential",  # sequential, batch
+            "batch_size": 100,
+            "max_workers": 4,
+        }
+
+    def execute(self, context: Dict[str, Any]) -> bool:
+        super().execute(context)
+
+        # The executor runs the loop body, then follows "completed"
+        array = self.get_input_value("array", context)
+        context["__loop__"] = array if array is not None else []
+        return True
+
 
 # ===== DATA NODES =====
 
@@ -455,6 +499,8 @@ class ForEachNode(WorkflowNode):
 class GetVariableNode(WorkflowNode):
     """Get variable value"""
 
+    batchable = True
+
     def __init__(self, node_id: str):
         super().__init__(
             node_id,
@@ -473,7 +519,9 @@ class GetVariableNode(WorkflowNode):
 
     def execute(self, context: Dict[str, Any]) -> bool:
         super().execute(context)
+        return self.evaluate(context)
 
+    def evaluate(self, context: Dict[str, Any]) -> bool:
         var_name = self.config.get("variable_name", "")
         value = context.get(var_name)
 
@@ -484,6 +532,8 @@ class GetVariableNode(WorkflowNode):
 class SetVariableNode(WorkflowNode):
     """Set variable value"""
 
+    batchable = True
+
     def __init__(self, node_id: str):
         super().__init__(
             node_id,
@@ -505,7 +555,9 @@ class SetVariableNode(WorkflowNode):
 
     def execute(self, context: Dict[str, Any]) -> bool:
         super().execute(context)
+        return self.evaluate(context)
 
+    def evaluate(self, context: Dict[str, Any]) -> bool:
         var_name = self.config.get("variable_name", "")
         value = self.get_input_value("value", context)
 
@@ -516,6 +568,8 @@ class SetVariableNode(WorkflowNode):
 class FormatStringNode(WorkflowNode):
     """Format string with variables"""
 
+    batchable = True
+
     def __init__(self, node_id: str):
         super().__init__(
             node_id,
@@ -533,6 +587,20 @@ class FormatStringNode(WorkflowNode):
 
         self.add_output_port("result", "Result", PortType.STRING)
 
+    def execute(self, context: Dict[str, Any]) -> bool:
+        super().execute(context)
+        return self.evaluate(context)
+
+    def evaluate(self, context: Dict[str, Any]) -> bool:
+        # {var1}, {var2} and {var3} are replaced; other braces are left alone
+        result = str(self.get_input_value("template", context) or "")
+        for name in ("var1", "var2", "var3"):
+            value = self.get_input_value(name, context)
+            result = result.replace(f"{{{name}}}", "" if value is None else str(value))
+
+        self.set_output_value("result", result, context)
+        return True
+
 
 # ===== AI NODES =====
 
@@ -604,6 +672,15 @@ class DelayNode(WorkflowNode):
 
         self.add_output_port("exec", "Execute", PortType.EXEC)
 
+    def execute(self, context: Dict[str, Any]) -> bool:
+        super().execute(context)
+
+        # The executor waits, or parks the run if it can be suspended
+        seconds = float(self.get_input_value("seconds", context) or 0)
+        if seconds > 0:
+            context["__delay__"] = seconds
+        return True
+
 
 class LogNode(WorkflowNode):
     """Log message"""
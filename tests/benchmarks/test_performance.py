@@ -321,3 +321,122 @@ def test_team_task_workflow_performance(benchmark):
 
     result = benchmark(workflow)
     assert result is not None
+
+
+# ==================== Memory Benchmarks ====================
+
+
+@pytest.fixture(scope="module")
+def memory_vectors():
+    """Clustered 384-dimensional embeddings and held-out queries"""
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(200, 384))
+    labels = rng.integers(200, size=20100)
+    vectors = (centers[labels] + 0.5 * rng.normal(size=(20100, 384))).astype(np.float32)
+    return vectors[:20000], vectors[20000:]
+
+
+@pytest.mark.parametrize("n_probe", [4, 8, 16, 32])
+def test_ann_search_recall_performance(benchmark, memory_vectors, n_probe):
+    """Benchmark IVF search and report recall@10 against exact search"""
+    from src.memory.embedding_matrix import EmbeddingMatrix, normalize_rows
+
+    vectors, queries = memory_vectors
+    matrix = EmbeddingMatrix(ann_threshold=1000, n_probe=n_probe)
+    matrix.extend_normalized([f"doc_{i}" for i in range(len(vectors))], *normalize_rows(vectors))
+
+    exact = matrix.search_batch(queries, k=10, exact=True)
+    approximate = benchmark(matrix.search_batch, queries, 10)
+
+    found = sum(
+        len({doc_id for doc_id, _ in a} & {doc_id for doc_id, _ in e})
+        for a, e in zip(approximate, exact)
+    )
+    recall = found / (10 * len(queries))
+    benchmark.extra_info["recall_at_10"] = recall
+    assert recall >= 0.5
+
+
+class _LegacyNode:
+    """Node layout before compact storage: attribute dict, datetimes, list embedding"""
+
+    def __init__(self, node_id, node_type, content, embedding):
+        from datetime import datetime
+
+        self.node_id = node_id
+        self.node_type = node_type
+        self.content = content
+        self.metadata = {}
+        self.embedding = embedding
+        self.created_at = datetime.now()
+        self.accessed_count = 0
+        self.last_accessed = None
+
+
+class _LegacyRelationship:
+    """Relationship layout before compact storage"""
+
+    def __init__(self, from_node, to_node, rel_type, strength):
+        from datetime import datetime
+
+        self.from_node = from_node
+        self.to_node = to_node
+        self.rel_type = rel_type
+        self.properties = {}
+        self.strength = strength
+        self.created_at = datetime.now()
+
+
+def _build_legacy_graph(count, embeddings):
+    """Nodes, relationship list and outgoing index as stored before"""
+    nodes = {}
+    relationships = []
+    index = {}
+    for i in range(count):
+        node_id = f"turn_{i}"
+        nodes[node_id] = _LegacyNode(node_id, "conversation", f"turn {i}", embeddings[i].tolist())
+        if i:
+            rel = _LegacyRelationship(f"turn_{i - 1}", node_id, "precedes", 1.0)
+            relationships.append(rel)
+            index.setdefault(rel.from_node, []).append(rel)
+    return nodes, relationships, index
+
+
+def _build_compact_graph(count, embeddings):
+    """Same graph in MemoryGraph"""
+    from src.memory.memory_graph import MemoryGraph, MemoryNode, MemoryRelationship
+
+    graph = MemoryGraph()
+    for i in range(count):
+        node_id = f"turn_{i}"
+        graph.add_node(
+            MemoryNode(node_id, "conversation", f"turn {i}", embedding=embeddings[i].tolist())
+        )
+        if i:
+            graph.add_relationship(MemoryRelationship(f"turn_{i - 1}", node_id, "precedes"))
+    return graph
+
+
+def test_graph_memory_footprint(benchmark, memory_vectors):
+    """Benchmark compact graph construction and compare memory with the legacy layout"""
+    import tracemalloc
+
+    embeddings = memory_vectors[0][:5000]
+
+    def measure(build):
+        tracemalloc.start()
+        graph = build(len(embeddings), embeddings)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del graph
+        return size
+
+    legacy = measure(_build_legacy_graph)
+    compact = measure(_build_compact_graph)
+    benchmark.extra_info["legacy_bytes"] = legacy
+    benchmark.extra_info["compact_bytes"] = compact
+
+    benchmark.pedantic(_build_compact_graph, args=(1000, embeddings), rounds=3)
+    assert compact < legacy / 2
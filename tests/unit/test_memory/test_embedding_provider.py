@@ -0,0 +1,109 @@
+"""
+Unit Tests for Embedding Provider Module
+Tests batched embedding and the content-hash cache
+"""
+
+import numpy as np
+import pytest
+
+from src.memory.embedding_provider import (
+    CachedEmbeddingProvider,
+    EmbeddingProvider,
+    HashEmbeddingProvider,
+)
+from src.memory.vector_store import VectorStore
+
+
+class CountingProvider(EmbeddingProvider):
+    """Provider that records every text it embeds"""
+
+    def __init__(self):
+        super().__init__("counting", 8)
+        self.calls = []
+
+    def embed_many(self, texts):
+        self.calls.append(list(texts))
+        return HashEmbeddingProvider(self.dim).embed_many(texts)
+
+
+class TestHashEmbeddingProvider:
+    """Test suite for HashEmbeddingProvider class"""
+
+    def test_deterministic_unit_vectors(self):
+        """Test the same text always gets the same unit vector"""
+        provider = HashEmbeddingProvider()
+        embeddings = provider.embed_many(["hello", "world", "hello"])
+
+        assert embeddings.shape == (3, 384)
+        assert np.array_equal(embeddings[0], embeddings[2])
+        assert np.linalg.norm(embeddings, axis=1) == pytest.approx(np.ones(3), abs=1e-5)
+
+    def test_embed_matches_batch(self):
+        """Test single and batched embedding agree"""
+        provider = HashEmbeddingProvider()
+        assert provider.embed("hello") == pytest.approx(provider.embed_many(["hello"])[0])
+
+
+class TestCachedEmbeddingProvider:
+    """Test suite for CachedEmbeddingProvider class"""
+
+    def test_texts_are_embedded_once(self):
+        """Test repeated texts hit the cache, within and across batches"""
+        inner = CountingProvider()
+        provider = CachedEmbeddingProvider(inner)
+
+        first = provider.embed_many(["a", "b", "a"])
+        second = provider.embed_many(["b", "c"])
+
+        assert inner.calls == [["a", "b"], ["c"]]
+        assert np.array_equal(first[1], second[0])
+        assert (provider.hits, provider.misses) == (2, 3)
+
+    def test_lru_eviction(self):
+        """Test least recently used entries are evicted past capacity"""
+        inner = CountingProvider()
+        provider = CachedEmbeddingProvider(inner, capacity=2)
+
+        provider.embed_many(["a", "b"])
+        provider.embed_many(["a"])
+        provider.embed_many(["c"])
+        provider.embed_many(["a", "b"])
+
+        assert inner.calls[-1] == ["b"]
+        assert len(provider) == 2
+
+    def test_cache_persists_to_disk(self, tmp_path):
+        """Test cached vectors are reloaded instead of re-embedded"""
+        first = CachedEmbeddingProvider(CountingProvider(), cache_dir=str(tmp_path))
+        expected = first.embed_many(["a", "b"])
+
+        inner = CountingProvider()
+        second = CachedEmbeddingProvider(inner, cache_dir=str(tmp_path))
+
+        assert np.array_equal(second.embed_many(["a", "b"]), expected)
+        assert inner.calls == []
+
+    def test_cache_files_are_compacted(self, tmp_path):
+        """Test the cache files stay bounded by the capacity"""
+        provider = CachedEmbeddingProvider(CountingProvider(), cache_dir=str(tmp_path), capacity=3)
+        for text in "abcdefghij":
+            provider.embed_many([text])
+
+        reloaded = CachedEmbeddingProvider(CountingProvider(), cache_dir=str(tmp_path), capacity=3)
+        assert len(reloaded) == 3
+        assert (tmp_path / "counting.f32").stat().st_size <= 6 * 8 * 4
+
+
+class TestVectorStoreEmbeddings:
+    """Test suite for VectorStore embedding providers"""
+
+    def test_custom_provider_is_cached(self, tmp_path):
+        """Test a custom provider is wrapped in a persistent cache"""
+        inner = CountingProvider()
+        store = VectorStore(persist_dir=str(tmp_path / "vectors"), embedding_provider=inner)
+
+        store.create_embedding("hello")
+        store.create_embeddings(["hello", "world"])
+
+        assert inner.calls == [["hello"], ["world"]]
+        assert (tmp_path / "vectors" / "embedding_cache" / "counting.keys").exists()
@@ -0,0 +1,105 @@
+"""
+Unit Tests for Entity Mapper Module
+Tests precompiled entity extraction and batch analysis
+"""
+
+import pytest
+
+from src.memory import memory_graph
+from src.memory.entity_mapper import EntityRelationshipMapper, EntityType
+
+
+@pytest.fixture
+def mapper(monkeypatch):
+    """Mapper over a fresh memory graph"""
+    monkeypatch.setattr(memory_graph, "_memory_graph", None)
+    return EntityRelationshipMapper()
+
+
+class TestEntityExtraction:
+    """Test suite for entity extraction"""
+
+    def test_extracts_all_entity_kinds_in_text_order(self, mapper):
+        """Test people, organizations, emails and projects come back in text order"""
+        entities = mapper.extract_entities(
+            "Jane Doe from Acme Corp emailed john.smith@example.com about Project Apollo, "
+            "Google, cc Dr. Brown"
+        )
+
+        assert [(e.name, e.entity_type) for e in entities] == [
+            ("Jane Doe", EntityType.PERSON),
+            ("Acme Corp", EntityType.ORGANIZATION),
+            ("John Smith", EntityType.PERSON),
+            ("Project Apollo", EntityType.PROJECT),
+            ("Google", EntityType.ORGANIZATION),
+            ("Dr. Brown", EntityType.PERSON),
+        ]
+        assert mapper.get_entity("John Smith").attributes == {"email": "john.smith@example.com"}
+
+    def test_specific_patterns_take_precedence(self, mapper):
+        """Test organizations and projects are not also extracted as people"""
+        entities = mapper.extract_entities("Globex Inc started Initiative Zeta")
+
+        assert [e.entity_type for e in entities] == [EntityType.ORGANIZATION, EntityType.PROJECT]
+        assert len(mapper.entities) == 2
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            (
+                "Ask Acme Corp for a quote",
+                [("Ask Acme", EntityType.PERSON), ("Acme Corp", EntityType.ORGANIZATION)],
+            ),
+            (
+                "Ping Dr. Watson",
+                [("Ping Dr", EntityType.PERSON), ("Dr. Watson", EntityType.PERSON)],
+            ),
+            (
+                "Ask Microsoft Teams",
+                [("Ask Microsoft", EntityType.PERSON), ("Microsoft", EntityType.ORGANIZATION)],
+            ),
+        ],
+    )
+    def test_overlapping_mentions_are_kept(self, mapper, text, expected):
+        """Test a capitalized word before an entity does not hide it"""
+        entities = mapper.extract_entities(text)
+
+        assert [(e.name, e.entity_type) for e in entities] == expected
+
+
+class TestAnalyzeMany:
+    """Test suite for batch text analysis"""
+
+    TEXTS = [
+        "Jane Doe met John Smith",
+        "John Smith joined Acme Corp",
+        "Jane Doe and John Smith wrote to jane.doe@example.com",
+    ]
+
+    def test_matches_sequential_analysis(self, mapper, monkeypatch):
+        """Test batch results match analyzing each text in turn"""
+        monkeypatch.setattr(memory_graph, "_memory_graph", None)
+        sequential = EntityRelationshipMapper()
+        expected = [sequential.analyze_text(text, f"t{i}") for i, text in enumerate(self.TEXTS)]
+
+        results = mapper.analyze_many(self.TEXTS, [f"t{i}" for i in range(3)])
+
+        assert [r["relationships"] for r in results] == [r["relationships"] for r in expected]
+        assert {e.name: e.mention_count for e in mapper.entities.values()} == {
+            e.name: e.mention_count for e in sequential.entities.values()
+        }
+        assert mapper.get_entity("Jane Doe").mention_count == 3
+        assert mapper.get_entity("Jane Doe").attributes == {"email": "jane.doe@example.com"}
+        assert len(mapper.graph.relationships) == len(sequential.graph.relationships)
+
+    def test_creates_each_entity_once(self, mapper, monkeypatch):
+        """Test each distinct entity is created and added to the graph once"""
+        created = []
+        add_node = mapper.graph.add_node
+        monkeypatch.setattr(
+            mapper.graph, "add_node", lambda node: created.append(node.node_id) or add_node(node)
+        )
+
+        mapper.analyze_many(self.TEXTS)
+
+        assert len(created) == len(set(created)) == 3
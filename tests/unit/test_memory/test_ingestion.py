@@ -0,0 +1,159 @@
+"""
+Unit Tests for Ingestion Module
+Tests the background ingestion queue and batched conversation turn storage
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.memory import conversation_tracker, memory_graph, vector_store
+from src.memory.conversation_tracker import ConversationContextTracker
+from src.memory.ingestion import IngestionQueue
+
+
+class TestIngestionQueue:
+    """Test suite for IngestionQueue class"""
+
+    def test_batches_waiting_items(self):
+        """Test items queued while the worker is busy are handled as one batch"""
+        batches = []
+        release = threading.Event()
+
+        def handler(batch):
+            release.wait(timeout=5)
+            batches.append(list(batch))
+
+        ingestion = IngestionQueue(handler, batch_size=3)
+        for i in range(7):
+            ingestion.put(i)
+        release.set()
+        ingestion.flush()
+
+        assert [item for batch in batches for item in batch] == list(range(7))
+        assert all(len(batch) <= 3 for batch in batches)
+        assert len(batches) < 7
+
+    def test_put_does_not_wait_for_handler(self):
+        """Test put returns while the handler is still running"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def handler(batch):
+            started.set()
+            release.wait(timeout=5)
+
+        ingestion = IngestionQueue(handler)
+        ingestion.put("a")
+        assert started.wait(timeout=5)
+        ingestion.put("b")  # Returns although the first batch is still being handled
+
+        assert len(ingestion) == 1
+        release.set()
+        ingestion.flush()
+        assert len(ingestion) == 0
+
+    def test_failed_batch_does_not_stop_worker(self):
+        """Test a handler error is counted and later items are still handled"""
+        handled = []
+
+        def handler(batch):
+            if "bad" in batch:
+                raise ValueError("bad item")
+            handled.extend(batch)
+
+        ingestion = IngestionQueue(handler, batch_size=1)
+        ingestion.put("bad")
+        ingestion.put("good")
+        ingestion.flush()
+
+        assert handled == ["good"]
+        assert ingestion.failed == 1
+
+    def test_synchronous_mode(self):
+        """Test items are handled on the caller's thread without a worker"""
+        handled = []
+        ingestion = IngestionQueue(handled.extend, background=False)
+        ingestion.put("a")
+
+        assert handled == ["a"]
+        assert ingestion._worker is None
+
+
+class TestTurnIngestion:
+    """Test suite for conversation turn ingestion"""
+
+    @pytest.fixture
+    def tracker(self, tmp_path, monkeypatch):
+        """Tracker over fresh memory components in a temporary directory"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(memory_graph, "_memory_graph", None)
+        monkeypatch.setattr(vector_store, "_memory_manager", None)
+        monkeypatch.setattr(conversation_tracker, "_conversation_tracker", None)
+        return ConversationContextTracker()
+
+    def test_turns_are_stored_in_batches(self, tracker, monkeypatch):
+        """Test queued turns are embedded in bulk and stored after flush"""
+        store = tracker.memory_manager.vector_store
+        calls = []
+        create_embeddings = store.create_embeddings
+        monkeypatch.setattr(
+            store,
+            "create_embeddings",
+            lambda texts: calls.append(texts) or create_embeddings(texts),
+        )
+
+        release = threading.Event()
+        store_turns = tracker._store_turns
+        monkeypatch.setattr(
+            tracker.ingestion, "handler", lambda items: release.wait(5) and store_turns(items)
+        )
+
+        turn_ids = [tracker.add_turn("user", f"message {i}") for i in range(5)]
+        release.set()
+        tracker.flush()
+
+        assert sum(len(texts) for texts in calls) == 5
+        assert len(calls) < 5
+        assert all(turn_id in store.documents for turn_id in turn_ids)
+        for previous, turn_id in zip(turn_ids, turn_ids[1:]):
+            assert tracker.graph.get_relationship(previous, turn_id, "precedes")
+
+    def test_turn_metadata_is_captured_when_added(self, tracker):
+        """Test stored turns keep the session they were added to"""
+        tracker.start_session("s1", topic="first")
+        first = tracker.add_turn("user", "hello")
+        tracker.start_session("s2", topic="second")
+        tracker.flush()
+
+        metadata = tracker.memory_manager.vector_store.metadata[first]
+        assert (metadata["session_id"], metadata["topic"]) == ("s1", "first")
+
+    def test_compaction_waits_for_ingestion(self, tracker, monkeypatch):
+        """Test compaction on the caller's thread does not interleave with stored turns"""
+        store = tracker.memory_manager.vector_store
+        for i in range(3):
+            store.add_document(f"old_{i}", "old", store.create_embedding(f"old {i}"))
+        store.delete_document("old_0")
+        store.delete_document("old_1")
+
+        # Hold the worker between appending vector rows and their log records
+        appending = threading.Event()
+        append_records = store.storage._append_records
+
+        def slow_append_records(records):
+            appending.set()
+            time.sleep(0.2)
+            append_records(records)
+
+        monkeypatch.setattr(store.storage, "_append_records", slow_append_records)
+        turn_ids = [tracker.add_turn("user", f"message {i}") for i in range(3)]
+        assert appending.wait(5)
+        store.save()
+        tracker.flush()
+
+        reloaded = vector_store.VectorStore(str(store.persist_dir))
+        for turn_id in turn_ids:
+            assert np.allclose(reloaded.get_embedding(turn_id), store.get_embedding(turn_id))
@@ -0,0 +1,101 @@
+"""
+Unit Tests for IVF Index Module
+Tests approximate nearest-neighbour search against exact search
+"""
+
+import numpy as np
+import pytest
+
+from src.memory.embedding_matrix import EmbeddingMatrix, normalize_rows
+from src.memory.ivf_index import IVFIndex, spherical_kmeans
+
+
+def clustered_vectors(count, dim=16, clusters=20, seed=0):
+    """Random vectors grouped around a few directions"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(clusters, size=count)
+    return (centers[labels] + 0.3 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+class TestIVFIndex:
+    """Test suite for IVFIndex class"""
+
+    def test_kmeans_returns_unit_centroids(self):
+        """Test spherical k-means centroids are normalized"""
+        vectors, _ = normalize_rows(clustered_vectors(500))
+        centroids = spherical_kmeans(vectors, 10)
+
+        assert centroids.shape == (10, 16)
+        assert np.linalg.norm(centroids, axis=1) == pytest.approx(np.ones(10), abs=1e-5)
+
+    def test_full_probe_returns_every_row(self):
+        """Test probing every list yields each row exactly once"""
+        vectors, _ = normalize_rows(clustered_vectors(300))
+        index = IVFIndex(n_lists=12)
+        index.train(vectors)
+
+        candidates = index.candidates(vectors[0], n_probe=12)
+        assert sorted(candidates.tolist()) == list(range(300))
+
+    def test_updated_rows_move_between_lists(self):
+        """Test re-adding a row with a new vector leaves no stale entry"""
+        vectors, _ = normalize_rows(clustered_vectors(300))
+        index = IVFIndex(n_lists=12)
+        index.train(vectors)
+
+        index.add(np.array([0]), -vectors[:1])
+        candidates = index.candidates(vectors[0], n_probe=12)
+        assert sorted(candidates.tolist()) == list(range(300))
+
+    def test_remap_after_compaction(self):
+        """Test rows are renumbered when the matrix drops rows"""
+        vectors, _ = normalize_rows(clustered_vectors(100))
+        index = IVFIndex(n_lists=5)
+        index.train(vectors)
+
+        live = np.arange(100) % 2 == 0
+        index.remap(live)
+        assert sorted(index.candidates(vectors[0], n_probe=5).tolist()) == list(range(50))
+
+
+class TestApproximateMatrix:
+    """Test suite for EmbeddingMatrix with an IVF index"""
+
+    @pytest.fixture
+    def matrix(self):
+        matrix = EmbeddingMatrix(ann_threshold=500, n_probe=8)
+        for i, vector in enumerate(clustered_vectors(2000)):
+            matrix.add(f"doc_{i}", vector)
+        return matrix
+
+    def test_exact_below_threshold(self):
+        """Test small matrices are searched exactly"""
+        matrix = EmbeddingMatrix(ann_threshold=500)
+        for i, vector in enumerate(clustered_vectors(100)):
+            matrix.add(f"doc_{i}", vector)
+
+        assert not matrix.uses_ann
+
+    def test_recall_against_exact_search(self, matrix):
+        """Test approximate hits mostly agree with exact hits"""
+        assert matrix.uses_ann
+        queries = clustered_vectors(50, seed=1)
+
+        approximate = matrix.search_batch(queries, k=10)
+        exact = matrix.search_batch(queries, k=10, exact=True)
+
+        found = sum(
+            len({doc_id for doc_id, _ in a} & {doc_id for doc_id, _ in e})
+            for a, e in zip(approximate, exact)
+        )
+        assert found / (10 * len(queries)) >= 0.9
+
+    def test_removed_documents_are_not_returned(self, matrix):
+        """Test tombstones and compaction keep the index consistent"""
+        for i in range(0, 2000, 2):
+            matrix.remove(f"doc_{i}")
+
+        for hits in matrix.search_batch(clustered_vectors(20, seed=2), k=10):
+            assert hits
+            assert all(int(doc_id.split("_")[1]) % 2 == 1 for doc_id, _ in hits)
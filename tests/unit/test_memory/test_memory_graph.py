@@ -0,0 +1,184 @@
+"""
+Unit Tests for Memory Graph Module
+Tests adjacency indexes, traversal and relationship maintenance
+"""
+
+from datetime import datetime
+
+import pytest
+
+from src.memory.memory_graph import MemoryGraph, MemoryNode, MemoryRelationship
+
+
+@pytest.fixture
+def graph():
+    """Chain a -> b -> c -> d plus a -> c, and e -> a"""
+    graph = MemoryGraph()
+    for node_id in "abcde":
+        graph.add_node(MemoryNode(node_id, "fact", f"node {node_id}"))
+    for from_node, to_node, rel_type in [
+        ("a", "b", "precedes"),
+        ("b", "c", "precedes"),
+        ("c", "d", "precedes"),
+        ("a", "c", "related_to"),
+        ("e", "a", "mentions"),
+    ]:
+        graph.add_relationship(MemoryRelationship(from_node, to_node, rel_type, strength=0.5))
+    return graph
+
+
+class TestMemoryGraph:
+    """Test suite for MemoryGraph class"""
+
+    def test_directional_relationships(self, graph):
+        """Test outgoing, incoming and combined lookups"""
+        assert [r.to_node for r in graph.get_relationships("a")] == ["b", "c"]
+        assert [r.from_node for r in graph.get_relationships("c", "incoming")] == ["b", "a"]
+        assert len(graph.get_relationships("a", "both")) == 3
+
+    def test_duplicate_edge_is_replaced(self, graph):
+        """Test re-adding an edge with the same key keeps one copy"""
+        graph.add_relationship(MemoryRelationship("a", "b", "precedes", strength=0.9))
+
+        assert len(graph.relationships) == 5
+        assert graph.get_relationship("a", "b", "precedes").strength == pytest.approx(0.9)
+
+    def test_strengthen_and_weaken(self, graph):
+        """Test strength changes are clamped and target the right edge"""
+        assert graph.strengthen_relationship("a", "c", 0.7, rel_type="related_to")
+        assert graph.get_relationship("a", "c").strength == 1.0
+        assert graph.weaken_relationship("b", "c", 0.2)
+        assert graph.get_relationship("b", "c").strength == pytest.approx(0.3)
+        assert not graph.weaken_relationship("d", "a")
+
+    def test_prune_updates_indexes(self, graph):
+        """Test pruned edges disappear from every index"""
+        graph.weaken_relationship("a", "c", 0.4)
+        graph.prune_weak_relationships(threshold=0.3)
+
+        assert graph.get_relationship("a", "c") is None
+        assert [r.from_node for r in graph.get_relationships("c", "incoming")] == ["b"]
+        assert graph.get_stats()["total_relationships"] == 4
+
+    def test_find_path(self, graph):
+        """Test shortest paths follow outgoing edges within max_depth"""
+        assert graph.find_path("a", "d") == ["a", "c", "d"]
+        assert graph.find_path("e", "d", max_depth=2) is None
+        assert graph.find_path("e", "d", max_depth=3) == ["e", "a", "c", "d"]
+        assert graph.find_path("d", "a") is None
+
+    def test_connected_subgraph(self, graph):
+        """Test subgraph walks edges in both directions"""
+        nodes, rels = graph.get_connected_subgraph("a", max_depth=1)
+
+        assert {n.node_id for n in nodes} == {"a", "b", "c", "e"}
+        assert len(rels) == 3
+
+    def test_export_import_round_trip(self, graph):
+        """Test indexes are rebuilt on import"""
+        restored = MemoryGraph()
+        restored.import_from_json(graph.export_to_json())
+
+        assert len(restored.relationships) == 5
+        assert [r.from_node for r in restored.get_relationships("a", "incoming")] == ["e"]
+
+
+class TestCompactStorage:
+    """Test suite for node and relationship views over compact storage"""
+
+    def test_node_fields_round_trip(self):
+        """Test timestamps, embedding and metadata behave like plain attributes"""
+        created = datetime(2024, 5, 1, 12, 30, 15, 250000)
+        node = MemoryNode("n", "fact", "content", embedding=[0.5, 0.25], created_at=created)
+
+        assert node.created_at == created
+        assert node.embedding == [0.5, 0.25]
+        assert node.last_accessed is None
+
+        node.metadata["source"] = "test"
+        assert node.to_dict()["metadata"] == {"source": "test"}
+
+    def test_relationship_writes_through_to_graph(self, graph):
+        """Test an added relationship object and later views share state"""
+        rel = MemoryRelationship("d", "e", "related_to", strength=0.4)
+        graph.add_relationship(rel)
+
+        rel.strength = 0.6
+        rel.properties["note"] = "x"
+        view = graph.get_relationship("d", "e")
+
+        assert view.strength == pytest.approx(0.6)
+        assert view.properties == {"note": "x"}
+
+    def test_removed_relationship_keeps_snapshot(self, graph):
+        """Test a view of a removed edge still reports its last values"""
+        view = graph.get_relationship("a", "b")
+        graph.remove_relationship(view)
+
+        assert view.strength == pytest.approx(0.5)
+        assert graph.get_relationship("a", "b") is None
+        assert graph.find_path("a", "b") is None
+
+
+class TestRelationshipDecay:
+    """Test suite for bulk relationship decay"""
+
+    @pytest.fixture
+    def graph(self):
+        graph = MemoryGraph()
+        for i in range(40):
+            graph.add_node(MemoryNode(f"n{i}", "fact", f"node {i}"))
+        created = datetime(2024, 1, 1)
+        for i in range(39):
+            rel = MemoryRelationship(f"n{i}", f"n{i + 1}", "precedes", strength=0.8)
+            rel.created_at = created
+            graph.add_relationship(rel)
+        return graph
+
+    def test_strength_halves_per_half_life(self, graph):
+        """Test decay follows the half-life and repeated calls compound"""
+        graph.decay_relationships(30, threshold=0.0, now=datetime(2024, 1, 31))
+        graph.decay_relationships(30, threshold=0.0, now=datetime(2024, 3, 1))
+
+        strengths = [rel.strength for rel in graph.relationships]
+        assert strengths == pytest.approx([0.2] * 39, abs=1e-5)
+
+    def test_recently_strengthened_edges_decay_less(self, graph):
+        """Test idle time starts at the last access"""
+        graph.strengthen_relationship("n0", "n1", 0.0)
+        graph.decay_relationships(30, threshold=0.0)
+
+        assert graph.get_relationship("n0", "n1").strength == pytest.approx(0.8, abs=1e-3)
+        assert graph.get_relationship("n1", "n2").strength < 0.1
+
+    def test_prunes_weak_edges_and_indexes(self, graph):
+        """Test edges below threshold are removed from every index"""
+        graph.strengthen_relationship("n5", "n6", 0.0)
+        stats = graph.decay_relationships(30, threshold=0.1)
+
+        assert stats == {"decayed": 39, "pruned": 38}
+        assert [r.key for r in graph.relationships] == [("n5", "n6", "precedes")]
+        assert graph.get_relationships("n6", "incoming")[0].from_node == "n5"
+        assert graph.get_relationships("n7", "incoming") == []
+
+    def test_shards_cover_every_edge_once(self, graph):
+        """Test running every shard decays each edge exactly once"""
+        now = datetime(2024, 1, 31)
+        decayed = sum(
+            graph.decay_relationships(30, 0.0, shard, 4, now=now)["decayed"] for shard in range(4)
+        )
+
+        assert decayed == 39
+        strengths = [rel.strength for rel in graph.relationships]
+        assert strengths == pytest.approx([0.4] * 39, abs=1e-5)
+
+    def test_decay_survives_export(self, graph):
+        """Test exported graphs do not decay the same idle time twice"""
+        now = datetime(2024, 1, 31)
+        graph.decay_relationships(30, threshold=0.0, now=now)
+
+        restored = MemoryGraph()
+        restored.import_from_json(graph.export_to_json())
+        restored.decay_relationships(30, threshold=0.0, now=now)
+
+        assert restored.get_relationship("n0", "n1").strength == pytest.approx(0.4, abs=1e-5)
@@ -0,0 +1,303 @@
+"""
+Unit Tests for Memory Persistence Module
+Tests incremental saves to the segment log, replay and compaction
+"""
+
+import json
+
+import pytest
+
+from src.memory import conversation_tracker, entity_mapper, memory_graph, vector_store
+from src.memory.conversation_tracker import get_conversation_tracker
+from src.memory.entity_mapper import get_entity_mapper
+from src.memory.memory_graph import get_memory_graph
+from src.memory.memory_persistence import MemoryPersistence
+from src.memory.segment_log import SegmentLog
+
+
+def reset_singletons():
+    """Drop global memory components, as a restart would"""
+    memory_graph._memory_graph = None
+    vector_store._memory_manager = None
+    conversation_tracker._conversation_tracker = None
+    entity_mapper._entity_mapper = None
+
+
+@pytest.fixture
+def persistence(tmp_path, monkeypatch):
+    """Persistence over fresh memory components in a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    reset_singletons()
+    yield MemoryPersistence(str(tmp_path / "memory"), background_compaction=False)
+    reset_singletons()
+
+
+def restart(persistence):
+    """Reload memory from disk into fresh components"""
+    reset_singletons()
+    reloaded = MemoryPersistence(str(persistence.data_dir), background_compaction=False)
+    assert reloaded.load_all()
+    return reloaded
+
+
+class TestMemoryPersistence:
+    """Test suite for MemoryPersistence class"""
+
+    def test_save_and_load_round_trip(self, persistence):
+        """Test graph, conversations and entities survive a restart"""
+        tracker = get_conversation_tracker()
+        tracker.start_session("s1", topic="planning")
+        tracker.add_turn("user", "John Smith works for Acme Corp")
+        tracker.add_turn("assistant", "Noted")
+        get_entity_mapper().analyze_text("John Smith met Jane Doe")
+        assert persistence.save_all()
+
+        restart(persistence)
+
+        session = get_conversation_tracker().sessions["s1"]
+        assert session.topic == "planning"
+        assert [turn.content for turn in session.turns] == [
+            "John Smith works for Acme Corp",
+            "Noted",
+        ]
+        assert get_conversation_tracker().current_session is session
+        assert get_entity_mapper().get_entity("Jane Doe") is not None
+        assert get_memory_graph().get_relationship(
+            session.turns[0].turn_id, session.turns[1].turn_id, "precedes"
+        )
+
+    def test_save_writes_only_changes(self, persistence):
+        """Test a second save appends just the changed records"""
+        mapper = get_entity_mapper()
+        mapper.analyze_text("John Smith met Jane Doe")
+        persistence.save_all()
+        records = persistence.log.records
+
+        mapper.analyze_text("Jane Doe")
+        persistence.save_all()
+
+        # Only the re-mentioned entity
+        assert persistence.log.records - records == 1
+        persistence.save_all()
+        assert persistence.log.records - records == 1
+
+    def test_removals_are_persisted(self, persistence):
+        """Test removed relationships and merged entities stay gone after a restart"""
+        mapper = get_entity_mapper()
+        mapper.analyze_text("John Smith met Jane Doe")
+        persistence.save_all()
+
+        john, jane = mapper.get_entity("John Smith"), mapper.get_entity("Jane Doe")
+        get_memory_graph().prune_weak_relationships(threshold=0.5)
+        mapper.merge_entities(john.entity_id, jane.entity_id)
+        persistence.save_all()
+
+        restart(persistence)
+
+        assert get_memory_graph().get_relationship(john.entity_id, jane.entity_id) is None
+        assert get_entity_mapper().get_entity_by_id(jane.entity_id) is None
+        assert get_entity_mapper().get_entity("John Smith").mention_count == 2
+
+    @pytest.mark.parametrize("failing", ["log", "turns"])
+    def test_failed_save_is_retried(self, persistence, monkeypatch, failing):
+        """Test changes popped by a failed save are written by the next one"""
+        tracker = get_conversation_tracker()
+        tracker.start_session("s1")
+        tracker.add_turn("user", "John Smith works for Acme Corp")
+        get_entity_mapper().analyze_text("John Smith met Jane Doe")
+
+        target, name = (
+            (persistence.log, "append") if failing == "log" else (persistence, "_turns_path")
+        )
+        original = getattr(target, name)
+
+        def fail_once(*args):
+            monkeypatch.setattr(target, name, original)
+            raise OSError("disk full")
+
+        monkeypatch.setattr(target, name, fail_once)
+        assert not persistence.save_all()
+        assert persistence.save_all()
+
+        restart(persistence)
+
+        turns = get_conversation_tracker().sessions["s1"].turns
+        assert [turn.content for turn in turns] == ["John Smith works for Acme Corp"]
+        assert get_entity_mapper().get_entity("Jane Doe") is not None
+        assert get_memory_graph().get_node(turns[0].turn_id) is not None
+
+    def test_compaction_keeps_latest_state(self, persistence):
+        """Test compaction drops superseded records without changing replayed state"""
+        graph = get_memory_graph()
+        mapper = get_entity_mapper()
+        mapper.analyze_text("John Smith met Jane Doe")
+        for _ in range(20):
+            graph.get_node(mapper.get_entity("John Smith").entity_id)
+            persistence.save_all()
+
+        records = persistence.log.records
+        persistence.compact()
+
+        assert persistence.log.records < records
+        assert len(persistence.log.segment_files()) == 2  # Base segment plus active one
+
+        restart(persistence)
+        node = get_memory_graph().nodes[get_entity_mapper().get_entity("John Smith").entity_id]
+        assert node.accessed_count == 20
+
+    def test_migrates_legacy_snapshots(self, persistence):
+        """Test full snapshot files from earlier versions are moved into the log"""
+        get_entity_mapper().analyze_text("John Smith met Jane Doe")
+        graph_json = get_memory_graph().export_to_json()
+        (persistence.data_dir / "memory_graph.json").write_text(graph_json)
+        (persistence.data_dir / "entities.json").write_text(
+            json.dumps(
+                {
+                    "entities": {
+                        e.entity_id: e.to_dict() for e in get_entity_mapper().entities.values()
+                    },
+                    "entity_name_index": get_entity_mapper().entity_name_index,
+                }
+            )
+        )
+
+        restart(persistence)
+        assert not (persistence.data_dir / "memory_graph.json").exists()
+        assert (persistence.data_dir / "memory_graph.json.migrated").exists()
+
+        restart(persistence)
+        assert get_entity_mapper().get_entity("John Smith") is not None
+        assert len(get_memory_graph().nodes) == 2
+
+
+class TestLazySessions:
+    """Test suite for on-demand loading of conversation turns"""
+
+    @pytest.fixture
+    def saved_sessions(self, persistence):
+        """Three saved sessions of two turns each, the last one current"""
+        tracker = get_conversation_tracker()
+        for i in range(3):
+            tracker.start_session(f"s{i}", topic=f"topic {i}")
+            tracker.add_turn("user", f"question {i}")
+            tracker.add_turn("assistant", f"answer {i}")
+        persistence.save_all()
+        return persistence
+
+    def test_turns_load_on_first_use(self, saved_sessions):
+        """Test only session details are loaded until a session is used"""
+        restart(saved_sessions)
+        tracker = get_conversation_tracker()
+
+        session = tracker.sessions["s0"]
+        assert not session.turns_loaded
+        assert session.turn_count == 2
+        assert tracker.get_statistics()["total_turns"] == 6
+        assert not session.turns_loaded
+
+        summary = tracker.get_session_summary("s0")
+        assert session.turns_loaded
+        assert [turn["content"] for turn in summary["turns"]] == ["question 0", "answer 0"]
+
+    def test_current_session_continues(self, saved_sessions):
+        """Test turns added to a restored session follow its saved turns"""
+        restart(saved_sessions)
+        tracker = get_conversation_tracker()
+        tracker.add_turn("user", "follow-up")
+        saved_sessions.save_all()
+
+        restart(saved_sessions)
+        session = get_conversation_tracker().get_session("s2")
+        assert [turn.content for turn in session.turns] == ["question 2", "answer 2", "follow-up"]
+
+    def test_least_recently_used_sessions_are_unloaded(self, saved_sessions):
+        """Test the loaded-session cap unloads old sessions but keeps the current one"""
+        restart(saved_sessions)
+        tracker = get_conversation_tracker()
+        tracker.max_loaded_sessions = 1
+
+        tracker.get_session("s2")
+        tracker.get_session("s0")
+        assert tracker.sessions["s2"].turns_loaded  # Current session
+        assert tracker.sessions["s0"].turns_loaded
+
+        tracker.get_session("s1")
+        assert not tracker.sessions["s0"].turns_loaded
+        assert tracker.get_session("s0").turns[0].content == "question 0"
+
+    def test_unsaved_turns_stay_loaded(self, persistence):
+        """Test a session is not unloaded before its new turns are saved"""
+        tracker = get_conversation_tracker()
+        tracker.max_loaded_sessions = 1
+        persistence.save_all()  # Sets the turn reader
+
+        tracker.start_session("s0")
+        tracker.add_turn("user", "unsaved")
+        tracker.end_current_session()
+        tracker.start_session("s1")
+
+        assert tracker.sessions["s0"].turns_loaded
+        persistence.save_all()
+        tracker.get_session("s1")
+        assert not tracker.sessions["s0"].turns_loaded
+        assert tracker.get_session("s0").turns[0].content == "unsaved"
+
+
+class TestSegmentLog:
+    """Test suite for SegmentLog class"""
+
+    def test_rolls_segments_and_replays_in_order(self, tmp_path):
+        """Test full segments are sealed and the last record for a key wins"""
+        log = SegmentLog(tmp_path, segment_size=64)
+        for i in range(10):
+            log.append([("item", "a", {"value": i}), ("item", f"k{i}", {"value": i})])
+        log.append([("item", "k3", None)])
+
+        assert len(log.segment_files()) > 1
+
+        state = SegmentLog(tmp_path).replay()
+        assert state["item"]["a"] == {"value": 9}
+        assert "k3" not in state["item"]
+        assert len(state["item"]) == 10
+
+    def test_torn_tail_is_truncated(self, tmp_path):
+        """Test an incomplete last record is dropped and later appends still replay"""
+        log = SegmentLog(tmp_path)
+        log.append([("item", ["a", "b"], {"value": 1})])
+        with open(log.segment_files()[-1], "a") as f:
+            f.write('{"kind":"item","key":"x"')
+
+        log = SegmentLog(tmp_path)
+        log.replay()
+        log.append([("item", "c", {"value": 2})])
+
+        state = SegmentLog(tmp_path).replay()
+        assert state["item"] == {("a", "b"): {"value": 1}, "c": {"value": 2}}
+
+    def test_interrupted_compaction_does_not_resurrect(self, tmp_path):
+        """Test segments left behind before a base segment are ignored"""
+        log = SegmentLog(tmp_path, segment_size=1)
+        log.append([("item", "a", {"value": 1})])
+        log.append([("item", "a", None)])
+        log.append([("item", "b", {"value": 2})])
+        stale = [path.read_bytes() for path in log.segment_files()[:-1]]
+
+        log.compact()
+        # Simulate a crash between replacing the last sealed segment and deleting the others
+        for number, content in enumerate(stale, start=1):
+            (tmp_path / f"segment_{number:08d}.jsonl").write_bytes(content)
+
+        assert SegmentLog(tmp_path).replay() == {"item": {"b": {"value": 2}}}
+
+    def test_needs_compaction(self, tmp_path):
+        """Test compaction is due once most records are superseded"""
+        log = SegmentLog(tmp_path, min_compact_records=10)
+        log.append([("item", "a", {"value": i}) for i in range(5)])
+        assert not log.needs_compaction()
+
+        log.append([("item", "a", {"value": i}) for i in range(5)])
+        assert log.needs_compaction()
+
+        log.compact()
+        assert log.records == 1
+        assert not log.needs_compaction()
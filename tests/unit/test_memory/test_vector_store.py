@@ -0,0 +1,244 @@
+"""
+Unit Tests for Vector Store Module
+Tests embedding matrix storage and cosine similarity search
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.memory.embedding_matrix import EmbeddingMatrix
+from src.memory.vector_store import VectorStore
+
+
+def brute_force_search(vectors, query, k, threshold):
+    """Reference cosine search over a dict of vectors"""
+    results = []
+    for doc_id, vector in vectors.items():
+        norm = np.linalg.norm(vector) * np.linalg.norm(query)
+        if norm == 0:
+            continue
+        similarity = float(np.dot(vector, query) / norm)
+        if similarity >= threshold:
+            results.append((doc_id, similarity))
+    results.sort(key=lambda r: r[1], reverse=True)
+    return results[:k]
+
+
+class TestEmbeddingMatrix:
+    """Test suite for EmbeddingMatrix class"""
+
+    @pytest.fixture
+    def vectors(self):
+        rng = np.random.default_rng(0)
+        return {f"doc_{i}": rng.normal(size=16).astype(np.float32) for i in range(500)}
+
+    @pytest.fixture
+    def matrix(self, vectors):
+        matrix = EmbeddingMatrix(capacity=8)
+        for doc_id, vector in vectors.items():
+            matrix.add(doc_id, vector)
+        return matrix
+
+    def test_search_matches_brute_force(self, matrix, vectors):
+        """Test vectorized top-k against per-document cosine similarity"""
+        query = np.random.default_rng(1).normal(size=16)
+
+        expected = brute_force_search(vectors, query, 10, 0.2)
+        results = matrix.search(query, 10, 0.2)
+
+        assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in expected]
+        assert np.allclose([s for _, s in results], [s for _, s in expected], atol=1e-5)
+
+    def test_tombstones_and_compaction(self, matrix, vectors):
+        """Test deleted rows are skipped and eventually reclaimed"""
+        for i in range(200):
+            matrix.remove(f"doc_{i}")
+            del vectors[f"doc_{i}"]
+
+        query = np.random.default_rng(2).normal(size=16)
+
+        assert len(matrix) == 300
+        assert matrix.size < 500  # compacted at least once
+        assert [d for d, _ in matrix.search(query, 5)] == [
+            d for d, _ in brute_force_search(vectors, query, 5, -1.0)
+        ]
+
+    def test_get_returns_original_vector(self, matrix, vectors):
+        """Test stored rows round-trip to the original embedding"""
+        assert np.allclose(matrix.get("doc_7"), vectors["doc_7"], atol=1e-5)
+
+    def test_zero_vectors_are_not_searchable(self):
+        """Test zero embeddings never match"""
+        matrix = EmbeddingMatrix()
+        matrix.add("zero", [0.0, 0.0])
+        matrix.add("one", [1.0, 0.0])
+
+        assert matrix.search([1.0, 0.0], 5) == [("one", pytest.approx(1.0))]
+
+    def test_dimension_mismatch(self, matrix):
+        """Test embeddings must match the matrix dimension"""
+        with pytest.raises(ValueError):
+            matrix.add("bad", [1.0, 2.0])
+
+
+class TestVectorStore:
+    """Test suite for VectorStore class"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return VectorStore(persist_dir=str(tmp_path / "vectors"))
+
+    def test_search_by_collection(self, store):
+        """Test searching one collection or all of them"""
+        store.add_document("fact_1", "the sky is blue", [1.0, 0.0, 0.0], collection="facts")
+        store.add_document("task_1", "paint the sky", [0.9, 0.1, 0.0], collection="tasks")
+
+        assert [r[0] for r in store.search([1.0, 0.0, 0.0], "facts")] == ["fact_1"]
+        assert [r[0] for r in store.search([1.0, 0.0, 0.0])] == ["fact_1", "task_1"]
+
+    def test_delete_and_move_documents(self, store):
+        """Test deleted and re-collected documents leave no stale rows"""
+        store.add_document("doc_1", "first", [1.0, 0.0], collection="facts")
+        store.add_document("doc_1", "first", [1.0, 0.0], collection="tasks")
+        store.add_document("doc_2", "second", [0.0, 1.0], collection="tasks")
+        store.delete_document("doc_2")
+
+        assert store.collections["facts"] == []
+        assert store.collections["tasks"] == ["doc_1"]
+        assert [r[0] for r in store.search([0.5, 0.5], threshold=0.0)] == ["doc_1"]
+
+    def test_reload_from_disk(self, store, tmp_path):
+        """Test matrices are rebuilt on load"""
+        store.add_document("doc_1", "first", [3.0, 4.0], collection="facts")
+
+        reloaded = VectorStore(persist_dir=str(tmp_path / "vectors"))
+
+        assert reloaded.get_document("doc_1")["embedding"] == pytest.approx([3.0, 4.0])
+        assert reloaded.search([3.0, 4.0])[0][0] == "doc_1"
+
+    def test_add_documents_in_one_group(self, store, tmp_path):
+        """Test a batch of documents is stored and reloaded like single adds"""
+        added = store.add_documents(
+            [("doc_1", "first", [1.0, 0.0], {"n": 1}), ("doc_2", "second", [0.0, 2.0], None)],
+            collection="facts",
+        )
+        store.add_documents([("doc_1", "first again", [1.0, 1.0], None)], collection="facts")
+
+        reloaded = VectorStore(persist_dir=str(tmp_path / "vectors"))
+        assert added == 2
+        assert reloaded.collections["facts"] == ["doc_1", "doc_2"]
+        assert reloaded.get_document("doc_1")["content"] == "first again"
+        assert reloaded.get_document("doc_2")["embedding"] == pytest.approx([0.0, 2.0])
+
+    def test_search_batch_matches_single_searches(self, store):
+        """Test batched queries return the same hits as one-by-one search"""
+        rng = np.random.default_rng(4)
+        for i in range(60):
+            collection = "facts" if i % 2 else "tasks"
+            store.add_document(f"doc_{i}", f"memory {i}", rng.normal(size=8), collection=collection)
+
+        queries = [rng.normal(size=8) for _ in range(5)] + [np.zeros(8)]
+        batch = store.search_batch(queries, limit=4, threshold=0.1)
+
+        for hits, query in zip(batch, queries):
+            expected = store.search(query, limit=4, threshold=0.1)
+            assert [h[0] for h in hits] == [e[0] for e in expected]
+            assert [h[1] for h in hits] == pytest.approx([e[1] for e in expected], abs=1e-5)
+        assert batch[-1] == []
+
+    def test_reload_replays_log(self, store, tmp_path):
+        """Test moves, metadata updates and deletes survive a reload"""
+        store.add_document("doc_1", "first", [1.0, 0.0], collection="facts")
+        store.add_document("doc_2", "second", [0.0, 2.0], collection="facts")
+        store.add_document("doc_1", "first", [1.0, 1.0], collection="tasks")
+        store.update_metadata("doc_2", {"source": "test"})
+        store.add_document("doc_3", "third", [2.0, 0.0], collection="tasks")
+        store.delete_document("doc_3")
+
+        reloaded = VectorStore(persist_dir=str(tmp_path / "vectors"))
+
+        assert set(reloaded.documents) == {"doc_1", "doc_2"}
+        assert reloaded.collections["facts"] == ["doc_2"]
+        assert reloaded.collections["tasks"] == ["doc_1"]
+        assert reloaded.metadata["doc_2"] == {"source": "test"}
+        assert reloaded.get_document("doc_1")["embedding"] == pytest.approx([1.0, 1.0])
+        assert [r[0] for r in reloaded.search([0.0, 1.0], threshold=0.0)] == ["doc_2", "doc_1"]
+
+    def test_compaction_drops_garbage(self, store, tmp_path):
+        """Test compaction rewrites storage with live documents only"""
+        store.storage.min_compact_records = 10
+        for i in range(20):
+            store.add_document(f"doc_{i}", f"memory {i}", [float(i), 1.0], collection="facts")
+        for i in range(15):
+            store.delete_document(f"doc_{i}")
+
+        vector_file = store.storage._vector_path("facts")
+        assert vector_file.stat().st_size < 20 * 2 * 4
+        assert not (tmp_path / "vectors" / "vectors").exists()
+
+        reloaded = VectorStore(persist_dir=str(tmp_path / "vectors"))
+        assert reloaded.collections["facts"] == [f"doc_{i}" for i in range(15, 20)]
+        assert reloaded.get_document("doc_19")["embedding"] == pytest.approx([19.0, 1.0])
+
+    @pytest.mark.parametrize("failing_step", ["_write_manifest", "_remove_other_generations"])
+    def test_interrupted_compaction_keeps_one_generation(
+        self, store, tmp_path, monkeypatch, failing_step
+    ):
+        """Test a crash before or after the generation switch loads consistent vectors"""
+        for i in range(4):
+            store.add_document(f"doc_{i}", f"memory {i}", [float(i), 1.0], collection="facts")
+        store.delete_document("doc_0")
+        store.delete_document("doc_1")
+
+        def crash(*args):
+            raise OSError("crash")
+
+        monkeypatch.setattr(store.storage, failing_step, crash)
+        store.save()
+        monkeypatch.undo()
+        store.add_document("doc_4", "memory 4", [4.0, 1.0], collection="facts")
+
+        reloaded = VectorStore(persist_dir=str(tmp_path / "vectors"))
+        assert reloaded.collections["facts"] == ["doc_2", "doc_3", "doc_4"]
+        assert reloaded.get_document("doc_3")["embedding"] == pytest.approx([3.0, 1.0])
+        assert reloaded.get_document("doc_4")["embedding"] == pytest.approx([4.0, 1.0])
+        assert len(list((tmp_path / "vectors").glob("log*.jsonl"))) == 1
+        assert len([p for p in (tmp_path / "vectors").glob("vectors*") if p.is_dir()]) == 1
+
+    def test_torn_log_tail_is_ignored(self, store, tmp_path):
+        """Test an interrupted append does not break loading or later appends"""
+        store.add_document("doc_1", "first", [1.0, 0.0], collection="facts")
+        with open(tmp_path / "vectors" / "log.jsonl", "a") as f:
+            f.write('{"op": "add", "id": "doc_')
+        with open(tmp_path / "vectors" / "vectors" / "facts.f32", "ab") as f:
+            f.write(b"\x00\x00")
+
+        reloaded = VectorStore(persist_dir=str(tmp_path / "vectors"))
+        assert list(reloaded.documents) == ["doc_1"]
+
+        reloaded.add_document("doc_2", "second", [0.0, 1.0], collection="facts")
+        again = VectorStore(persist_dir=str(tmp_path / "vectors"))
+        assert again.get_document("doc_2")["embedding"] == pytest.approx([0.0, 1.0])
+
+    def test_migrates_legacy_json(self, tmp_path):
+        """Test a vector_store.json file is converted on first load"""
+        persist_dir = tmp_path / "vectors"
+        persist_dir.mkdir()
+        legacy = {
+            "documents": {
+                "doc_1": {"content": "first", "collection": "facts", "created_at": "2024-01-01"}
+            },
+            "metadata": {"doc_1": {"source": "legacy"}},
+            "collections": {"facts": ["doc_1"]},
+            "embeddings": {"doc_1": [3.0, 4.0]},
+        }
+        (persist_dir / "vector_store.json").write_text(json.dumps(legacy))
+
+        VectorStore(persist_dir=str(persist_dir))
+        assert not (persist_dir / "vector_store.json").exists()
+
+        reloaded = VectorStore(persist_dir=str(persist_dir))
+        assert reloaded.metadata["doc_1"] == {"source": "legacy"}
+        assert reloaded.get_document("doc_1")["embedding"] == pytest.approx([3.0, 4.0])
@@ -0,0 +1,89 @@
+"""
+Unit Tests for Attribute Index Module
+Tests index lookups against SearchFilter.matches
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.search.attribute_index import HashIndex, SortedIndex
+from src.search.search_engine import SearchField, SearchFilter
+
+
+def random_items(count=300):
+    """Random items with equality, tag and date fields"""
+    rng = random.Random(5)
+    start = datetime(2024, 1, 1)
+    items = {}
+    for i in range(count):
+        items[f"item_{i}"] = {
+            "status": rng.choice(["pending", "in_progress", "done", None]),
+            "tags": rng.sample(["bug", "docs", "security", "team"], rng.randint(0, 3)),
+            "due_date": start + timedelta(days=rng.randint(0, 60)),
+        }
+    return items
+
+
+class TestAttributeIndexes:
+    """Test suite for HashIndex and SortedIndex"""
+
+    @pytest.fixture
+    def items(self):
+        return random_items()
+
+    @staticmethod
+    def build(index, items):
+        for item_id, item in items.items():
+            index.update(item_id, item.get(index.field))
+        return index
+
+    @staticmethod
+    def expected(items, search_filter):
+        return {item_id for item_id, item in items.items() if search_filter.matches(item)}
+
+    @pytest.mark.parametrize(
+        "operator,value",
+        [("eq", "done"), ("ne", "done"), ("in", ["pending", "done"]), ("contains", "prog")],
+    )
+    def test_hash_index_status(self, items, operator, value):
+        """Test equality style operators on a string field"""
+        index = self.build(HashIndex("status"), items)
+        search_filter = SearchFilter(SearchField.STATUS, operator, value)
+
+        assert index.lookup(operator, value) == self.expected(items, search_filter)
+        assert index.estimate(operator, value) >= len(index.lookup(operator, value))
+
+    def test_hash_index_tags(self, items):
+        """Test contains on list values"""
+        index = self.build(HashIndex("tags"), items)
+        search_filter = SearchFilter(SearchField.TAGS, "contains", "security")
+
+        assert index.lookup("contains", "security") == self.expected(items, search_filter)
+
+    @pytest.mark.parametrize("operator", ["lt", "le", "gt", "ge", "eq"])
+    def test_sorted_index_ranges(self, items, operator):
+        """Test range operators on dates"""
+        index = self.build(SortedIndex("due_date"), items)
+        value = datetime(2024, 1, 20)
+        search_filter = SearchFilter(SearchField.DUE_DATE, operator, value)
+
+        assert index.lookup(operator, value) == self.expected(items, search_filter)
+        assert index.estimate(operator, value) == len(index.lookup(operator, value))
+
+    def test_updates_and_removals(self, items):
+        """Test the index follows changed and removed items"""
+        index = self.build(HashIndex("tags"), items)
+
+        items["item_0"]["tags"].append("urgent")
+        index.update("item_0", items["item_0"]["tags"])
+        index.remove("item_1")
+
+        assert index.lookup("contains", "urgent") == {"item_0"}
+        assert "item_1" not in index.lookup("ne", "x")
+
+    def test_unsupported_lookups_fall_back(self, items):
+        """Test lookups the index cannot answer exactly"""
+        assert self.build(HashIndex("status"), items).lookup("lt", "done") is None
+        assert self.build(SortedIndex("due_date"), items).lookup("lt", "2024-01-20") is None
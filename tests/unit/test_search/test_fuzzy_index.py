@@ -0,0 +1,66 @@
+"""
+Unit Tests for Fuzzy Index Module
+Tests trigram candidate lookup against brute-force edit distance
+"""
+
+import random
+
+import pytest
+
+from src.search.fuzzy_index import TrigramIndex, bounded_levenshtein
+
+
+def levenshtein(s1, s2):
+    """Unbounded reference edit distance"""
+    return bounded_levenshtein(s1, s2, max(len(s1), len(s2)))
+
+
+class TestTrigramIndex:
+    """Test suite for TrigramIndex class"""
+
+    @pytest.fixture
+    def vocabulary(self):
+        """Fixture with a random vocabulary over a small alphabet"""
+        rng = random.Random(7)
+        return {"".join(rng.choice("abcde") for _ in range(rng.randint(2, 12))) for _ in range(800)}
+
+    @pytest.fixture
+    def index(self, vocabulary):
+        """Fixture to create an index over the vocabulary"""
+        index = TrigramIndex()
+        for term in vocabulary:
+            index.add_term(term)
+        return index
+
+    def test_bounded_levenshtein(self):
+        """Test distance and early exit"""
+        assert bounded_levenshtein("kitten", "sitting", 5) == 3
+        assert bounded_levenshtein("kitten", "sitting", 1) == 2
+        assert bounded_levenshtein("abc", "abc", 0) == 0
+
+    def test_similar_terms_matches_brute_force(self, index, vocabulary):
+        """Test the count filter never drops a similar term"""
+        rng = random.Random(11)
+        for _ in range(50):
+            token = "".join(rng.choice("abcde") for _ in range(rng.randint(2, 12)))
+            expected = {
+                term
+                for term in vocabulary
+                if 1.0 - levenshtein(token, term) / max(len(token), len(term)) > 0.6
+            }
+
+            assert set(index.similar_terms(token, 0.6)) == expected
+
+    def test_substring_terms(self, index, vocabulary):
+        """Test substring lookup for short and long tokens"""
+        for token in ["ab", "cde", "abca"]:
+            assert index.substring_terms(token) == {t for t in vocabulary if token in t}
+
+    def test_remove_term(self, index):
+        """Test removed terms are no longer found"""
+        index.add_term("documentation")
+        assert "documentation" in index.similar_terms("documantation")
+
+        index.remove_term("documentation")
+        assert "documentation" not in index.similar_terms("documantation")
+        assert "documentation" not in index.substring_terms("document")
@@ -0,0 +1,55 @@
+"""
+Unit Tests for Prefix Index Module
+Tests weighted top-k completions and incremental updates
+"""
+
+import random
+
+from src.search.prefix_index import PrefixIndex
+
+
+def brute_force_top_k(weights, prefix, k):
+    """Reference top-k over a term -> weight dict"""
+    matches = [(term, w) for term, w in weights.items() if w > 0 and term.startswith(prefix)]
+    return sorted(matches, key=lambda tw: (-tw[1], tw[0]))[:k]
+
+
+class TestPrefixIndex:
+    """Test suite for PrefixIndex class"""
+
+    def test_top_k_orders_by_weight(self):
+        """Test heavier completions come first, ties alphabetically"""
+        index = PrefixIndex()
+        for term, weight in [("doc", 1), ("docs", 4), ("document", 9), ("dog", 4), ("cat", 20)]:
+            index.set_weight(term, weight)
+
+        assert index.top_k("do", 3) == [("document", 9), ("docs", 4), ("dog", 4)]
+        assert index.top_k("x", 3) == []
+        assert len(index) == 5
+
+    def test_removal_updates_best_weights(self):
+        """Test removing the heaviest term exposes the next one"""
+        index = PrefixIndex()
+        index.set_weight("security", 10)
+        index.set_weight("secure", 3)
+
+        index.set_weight("security", 0)
+
+        assert index.top_k("sec", 5) == [("secure", 3)]
+        assert index.get_weight("security") == 0
+        assert len(index) == 1
+
+    def test_random_updates_match_brute_force(self):
+        """Test incremental updates against a reference dict"""
+        rng = random.Random(3)
+        index = PrefixIndex()
+        weights = {}
+
+        for _ in range(3000):
+            term = "".join(rng.choice("abc") for _ in range(rng.randint(1, 6)))
+            weight = rng.choice([0, 0, 1, 2, 3, 5, 8])
+            weights[term] = weight
+            index.set_weight(term, weight)
+
+        for prefix in ["", "a", "ab", "cab", "bbb"]:
+            assert index.top_k(prefix, 7) == brute_force_top_k(weights, prefix, 7)
@@ -0,0 +1,181 @@
+"""
+Unit Tests for Search Engine Module
+Tests indexing, ranking, and search modes
+"""
+
+import pytest
+
+from src.search.search_engine import (
+    SearchEngine,
+    SearchField,
+    SearchFilter,
+    SearchMode,
+    SearchQuery,
+)
+
+
+def sample_items():
+    """Small task corpus for search tests"""
+    return {
+        "task_1": {
+            "title": "Complete project documentation",
+            "description": "Write documentation including API references",
+            "priority": "high",
+            "status": "in_progress",
+            "tags": ["documentation", "project"],
+        },
+        "task_2": {
+            "title": "Fix critical bug in authentication",
+            "description": "Urgent bug causing authentication failures",
+            "priority": "critical",
+            "status": "in_progress",
+            "tags": ["bug", "security"],
+        },
+        "task_3": {
+            "title": "Update dependencies",
+            "description": "Update project dependencies to latest versions",
+            "priority": "low",
+            "status": "pending",
+            "tags": ["maintenance"],
+        },
+        "task_4": {
+            "title": "Security audit",
+            "description": "Conduct security audit of the application",
+            "priority": "critical",
+            "status": "not_started",
+            "tags": ["security", "audit"],
+        },
+    }
+
+
+class TestSearchEngine:
+    """Test suite for SearchEngine class"""
+
+    @pytest.fixture
+    def engine(self):
+        """Fixture to create an engine with the sample corpus indexed"""
+        engine = SearchEngine()
+        for item_id, item in sample_items().items():
+            engine.index_item(item_id, item)
+        return engine
+
+    @staticmethod
+    def titles(results):
+        return [r.item["title"] for r in results]
+
+    def test_partial_search_uses_substrings(self, engine):
+        """Test partial search matches inside indexed terms"""
+        results = engine.search(SearchQuery("auth", mode=SearchMode.PARTIAL))
+
+        assert self.titles(results) == ["Fix critical bug in authentication"]
+        assert results[0].highlights["title"] == ["auth"]
+
+    def test_partial_search_ranks_by_bm25(self, engine):
+        """Test items with more and denser matches rank first"""
+        results = engine.search(SearchQuery("security", mode=SearchMode.PARTIAL))
+
+        assert self.titles(results)[0] == "Security audit"
+        assert len(results) == 2
+        assert results[0].score > results[1].score
+
+    def test_exact_search_matches_phrase(self, engine):
+        """Test exact search only returns items containing the phrase"""
+        results = engine.search(SearchQuery("security audit", mode=SearchMode.EXACT))
+
+        assert self.titles(results) == ["Security audit"]
+
+    def test_semantic_search(self, engine):
+        """Test semantic search matches whole terms"""
+        results = engine.search(SearchQuery("bug audit", mode=SearchMode.SEMANTIC))
+
+        assert set(self.titles(results)) == {"Fix critical bug in authentication", "Security audit"}
+
+    def test_field_restriction(self, engine):
+        """Test searching a single field"""
+        query = SearchQuery("project", mode=SearchMode.PARTIAL, fields=[SearchField.TITLE])
+
+        assert self.titles(engine.search(query)) == ["Complete project documentation"]
+
+    def test_term_expansion_limited_to_fields(self, engine):
+        """Test substring expansion only yields terms of the searched fields"""
+        assert set(engine._expand_term("date", ["title", "description"])) == {"update"}
+        assert set(engine._expand_term("cation", ["title"])) == {"authentication"}
+        assert engine._expand_term("cation", ["tags"]) == {}
+
+    def test_filters_apply_to_text_matches(self, engine):
+        """Test filters narrow text search results"""
+        query = SearchQuery(
+            "security",
+            mode=SearchMode.PARTIAL,
+            filters=[SearchFilter(SearchField.STATUS, "eq", "in_progress")],
+        )
+
+        assert self.titles(engine.search(query)) == ["Fix critical bug in authentication"]
+
+    def test_remove_item(self, engine):
+        """Test removed items no longer match"""
+        engine.remove_item("task_4")
+
+        results = engine.search(SearchQuery("audit", mode=SearchMode.PARTIAL))
+        assert results == []
+        assert "audit" not in engine._index.vocabulary()
+
+    def test_reindex_replaces_terms(self, engine):
+        """Test re-indexing an item drops its old terms"""
+        engine.index_item("task_3", {"title": "Rotate credentials", "status": "pending"})
+
+        assert engine.search(SearchQuery("dependencies")) == []
+        assert self.titles(engine.search(SearchQuery("credentials"))) == ["Rotate credentials"]
+
+    def test_update_item_only_touches_changed_fields(self, engine):
+        """Test updating one field keeps postings of unchanged fields"""
+        title_postings = engine._index.postings("title", "security")
+        item = dict(sample_items()["task_4"], description="Review firewall rules")
+
+        engine.update_item("task_4", item)
+
+        assert engine._index.postings("title", "security") is title_postings
+        assert "conduct" not in engine._index.vocabulary()
+        assert self.titles(engine.search(SearchQuery("firewall"))) == ["Security audit"]
+
+    def test_update_item_keeps_lengths_consistent(self, engine):
+        """Test incremental updates match a fresh index"""
+        item = dict(sample_items()["task_1"], tags=["docs"], notes="Draft outline first")
+        engine.update_item("task_1", item)
+
+        fresh = SearchEngine()
+        for item_id, original in sample_items().items():
+            fresh.index_item(item_id, item if item_id == "task_1" else original)
+
+        assert engine._index._total_lengths == fresh._index._total_lengths
+        assert engine._index.document_terms("task_1") == fresh._index.document_terms("task_1")
+
+    def test_fuzzy_search_tolerates_typos(self, engine):
+        """Test fuzzy search finds terms within edit distance"""
+        results = engine.search(SearchQuery("documantation", mode=SearchMode.FUZZY))
+
+        assert self.titles(results) == ["Complete project documentation"]
+        assert 0.6 < results[0].score < 1.0
+
+    def test_suggestions_rank_by_document_frequency(self, engine):
+        """Test suggestions prefer terms found in more items"""
+        engine.index_item("task_5", {"title": "Author release notes", "tags": ["audit"]})
+
+        assert engine.get_suggestions("se", limit=2) == ["security"]
+        assert engine.get_suggestions("a", limit=3) == ["audit", "api", "application"]
+
+        engine.remove_item("task_4")
+        engine.remove_item("task_5")
+        assert engine.get_suggestions("au", limit=3) == ["authentication"]
+
+    def test_filter_only_query_uses_indexes(self, engine):
+        """Test combined index-backed and scanned filters"""
+        query = SearchQuery(
+            filters=[
+                SearchFilter(SearchField.PRIORITY, "in", ["critical", "high"]),
+                SearchFilter(SearchField.TAGS, "contains", "security"),
+                SearchFilter(SearchField.TITLE, "contains", "audit"),
+            ]
+        )
+
+        assert self.titles(engine.search(query)) == ["Security audit"]
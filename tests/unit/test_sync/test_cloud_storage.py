@@ -0,0 +1,245 @@
+"""
+Unit Tests for Cloud Storage Module
+Tests the local change log, encrypted envelopes and envelope encoding
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.sync.change_log import ChangeLog
+from src.sync.cloud_storage import EncryptedCloudProvider, LocalFileProvider
+from src.sync.envelope import ENVELOPE_ENTITY_TYPE, decode_changes, encode_changes
+from src.sync.sync_engine import ChangeType, SyncChange
+
+START = datetime(2024, 1, 1)
+
+
+def make_change(i, minutes=None, device_id="device_1"):
+    """Build a change to entity note_<i>"""
+    return SyncChange(
+        change_id=f"c{i}",
+        change_type=ChangeType.CREATE,
+        entity_type="note",
+        entity_id=f"note_{i}",
+        data={"text": f"note {i}"},
+        timestamp=START + timedelta(minutes=i if minutes is None else minutes),
+        device_id=device_id,
+    )
+
+
+class TestLocalFileProvider:
+    """Test suite for LocalFileProvider class"""
+
+    @pytest.fixture
+    def provider(self, tmp_path):
+        provider = LocalFileProvider(str(tmp_path / "sync"), background_compaction=False)
+        provider.connect()
+        return provider
+
+    def test_upload_and_download(self, provider, tmp_path):
+        """Test uploaded changes are visible to another provider on the same folder"""
+        provider.upload_changes([make_change(i) for i in range(3)])
+        provider.upload_changes([make_change(1), make_change(3)])
+
+        other = LocalFileProvider(str(tmp_path / "sync"))
+        other.connect()
+
+        assert [c.change_id for c in other.download_changes()] == ["c0", "c1", "c2", "c3"]
+        since = START + timedelta(minutes=1)
+        assert [c.change_id for c in other.download_changes(since=since)] == ["c2", "c3"]
+
+    def test_cursor_downloads(self, provider):
+        """Test each cursor download returns only changes uploaded since the last one"""
+        provider.upload_changes([make_change(0), make_change(1)])
+        changes, cursor = provider.download_changes_after()
+        assert [c.change_id for c in changes] == ["c0", "c1"]
+
+        provider.upload_changes([make_change(2)])
+        changes, cursor = provider.download_changes_after(cursor)
+        assert [c.change_id for c in changes] == ["c2"]
+        assert provider.download_changes_after(cursor) == ([], cursor)
+
+    def test_compaction_removes_duplicates(self, provider):
+        """Test compaction merges sealed segments and drops re-uploaded changes"""
+        log = provider.change_log
+        log.segment_size = 1  # One upload per segment
+        for i in range(6):
+            provider.upload_changes([make_change(i), make_change(0)])
+
+        # The first four uploads were compacted, leaving one copy of c0 among them
+        assert log.count == 8
+        assert not log.needs_compaction()
+        changes, _ = log.read()
+        assert [c["change_id"] for c in changes] == [f"c{i}" for i in range(6)]
+
+    def test_migrates_changes_file(self, tmp_path):
+        """Test a changes.json file from earlier versions is moved into the log"""
+        storage_path = tmp_path / "sync"
+        storage_path.mkdir()
+        legacy = {"changes": [make_change(i).to_dict() for i in range(2)]}
+        (storage_path / "changes.json").write_text(json.dumps(legacy))
+
+        provider = LocalFileProvider(str(storage_path))
+        provider.connect()
+
+        assert not (storage_path / "changes.json").exists()
+        assert [c.change_id for c in provider.download_changes()] == ["c0", "c1"]
+
+
+class TestEncryptedCloudProvider:
+    """Test suite for EncryptedCloudProvider class"""
+
+    @pytest.fixture
+    def base(self, tmp_path):
+        return LocalFileProvider(str(tmp_path / "sync"), background_compaction=False)
+
+    @pytest.fixture
+    def provider(self, base):
+        provider = EncryptedCloudProvider(base, encryption_key="secret")
+        provider.connect()
+        return provider
+
+    def test_upload_stores_one_envelope(self, provider, base):
+        """Test a batch is stored as a single encrypted change and decrypted on download"""
+        changes = [make_change(i) for i in range(20)]
+        assert provider.upload_changes(changes)
+
+        [stored] = base.download_changes()
+        assert stored.entity_type == ENVELOPE_ENTITY_TYPE
+        assert "note 1" not in stored.data["payload"]
+
+        downloaded = provider.download_changes()
+        assert [c.change_id for c in downloaded] == [c.change_id for c in changes]
+        assert [c.checksum for c in downloaded] == [c.checksum for c in changes]
+
+    def test_download_since_filters_inside_envelope(self, provider):
+        """Test changes older than since are dropped from a newer envelope"""
+        provider.upload_changes([make_change(i) for i in range(5)])
+
+        downloaded = provider.download_changes(since=START + timedelta(minutes=2))
+        assert [c.change_id for c in downloaded] == ["c3", "c4"]
+
+    def test_reads_field_encrypted_changes(self, provider, base):
+        """Test changes encrypted field by field before envelopes are still decrypted"""
+        key = b"secret"
+        encrypted = "".join(chr(ord(char) ^ key[i % len(key)]) for i, char in enumerate("note"))
+        legacy = make_change(0)
+        legacy.data = {"text": encrypted.encode("utf-8").hex(), "count": 3}
+        base.upload_changes([legacy])
+
+        [downloaded] = provider.download_changes()
+        assert downloaded.change_id == "c0"
+        assert downloaded.data == {"text": "note", "count": 3}
+
+
+class TestEnvelope:
+    """Test suite for change envelopes"""
+
+    @pytest.mark.parametrize("compress", [True, False])
+    def test_round_trip(self, compress):
+        """Test changes survive encoding with and without compression"""
+        changes = [make_change(i) for i in range(3)]
+
+        decoded = decode_changes(encode_changes(changes, compress=compress))
+
+        assert [c.to_dict() for c in decoded] == [c.to_dict() for c in changes]
+
+    def test_compression_shrinks_batches(self):
+        """Test compressed envelopes are smaller than raw ones for repetitive batches"""
+        changes = [make_change(i) for i in range(100)]
+
+        assert len(encode_changes(changes)) < len(encode_changes(changes, compress=False)) / 2
+
+    def test_unknown_encoding(self):
+        """Test envelopes with an unknown encoding are rejected"""
+        with pytest.raises(ValueError):
+            decode_changes(b"x{}")
+
+
+class TestChangeLog:
+    """Test suite for ChangeLog class"""
+
+    def test_reads_skip_earlier_segments(self, tmp_path, monkeypatch):
+        """Test only segments after the cursor or time are opened"""
+        log = ChangeLog(tmp_path, segment_size=1)
+        for i in range(5):
+            log.append([make_change(i).to_dict()])
+
+        opened = []
+        read_segment = log._read_segment
+        monkeypatch.setattr(
+            log, "_read_segment", lambda segment: opened.append(segment) or read_segment(segment)
+        )
+
+        changes, cursor = log.read(after_seq=4)
+        assert [c["change_id"] for c in changes] == ["c4"]
+        assert cursor == 5
+        assert len(opened) == 1
+
+        changes, _ = log.read(since=START + timedelta(minutes=2))
+        assert [c["change_id"] for c in changes] == ["c3", "c4"]
+        assert len(opened) == 3
+
+    def test_torn_write_is_ignored(self, tmp_path):
+        """Test bytes past the indexed length are not read and get overwritten"""
+        log = ChangeLog(tmp_path)
+        log.append([make_change(0).to_dict()])
+        with open(tmp_path / log.segments[-1]["file"], "a") as f:
+            f.write('{"seq":2,"change_id":')
+
+        log = ChangeLog(tmp_path)
+        assert [c["change_id"] for c in log.read()[0]] == ["c0"]
+
+        log.append([make_change(1).to_dict()])
+        assert [c["change_id"] for c in ChangeLog(tmp_path).read()[0]] == ["c0", "c1"]
+
+    def test_unindexed_segments_are_removed(self, tmp_path):
+        """Test old segment files left by an interrupted compaction are deleted"""
+        log = ChangeLog(tmp_path)
+        log.append([make_change(0).to_dict()])
+        old = tmp_path / "changes_orphan.jsonl"
+        old.write_text("{}\n")
+        os.utime(old, (0, 0))
+        recent = tmp_path / "changes_recent.jsonl"
+        recent.write_text("{}\n")
+
+        ChangeLog(tmp_path)
+        assert not old.exists()
+        assert recent.exists()  # May be another process's compaction output
+
+    def test_lock_file_is_waited_for(self, tmp_path):
+        """Test appends wait for a held lock file and break a stale one"""
+        log = ChangeLog(tmp_path, lock_timeout=0.05)
+        log.lock_file.write_text("other")
+
+        with pytest.raises(TimeoutError):
+            log.append([make_change(0).to_dict()])
+
+        os.utime(log.lock_file, (0, 0))
+        assert log.append([make_change(0).to_dict()]) == 1
+        assert not log.lock_file.exists()
+
+    def test_compaction_by_another_process_wins(self, tmp_path):
+        """Test a compaction whose segments were already compacted elsewhere is discarded"""
+        log = ChangeLog(tmp_path, segment_size=1)
+        for i in range(4):
+            log.append([make_change(i).to_dict()])
+        other = ChangeLog(tmp_path, segment_size=1)
+
+        # The other process compacts while this one is writing its output
+        write_segment = log._write_segment
+
+        def compact_elsewhere(changes):
+            if not other._compacting:
+                other.compact()
+            return write_segment(changes)
+
+        log._write_segment = compact_elsewhere
+        log.compact()
+
+        listed = {segment["file"] for segment in ChangeLog(tmp_path).segments}
+        assert {path.name for path in tmp_path.glob("changes_*.jsonl")} == listed
+        assert [c["change_id"] for c in log.read()[0]] == ["c0", "c1", "c2", "c3"]
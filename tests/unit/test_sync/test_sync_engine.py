@@ -0,0 +1,165 @@
+"""
+Unit Tests for Sync Engine Module
+Tests pending change indexing, conflict detection, coalescing and applied change tracking
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.sync.sync_engine import (
+    AppliedChangeLog,
+    ChangeType,
+    ConflictResolution,
+    SyncChange,
+    SyncEngine,
+    coalesce_changes,
+)
+
+START = datetime(2024, 1, 1)
+
+
+def remote_change(
+    change_id, entity_id, minutes, device_id="remote", data=None, change_type=ChangeType.UPDATE
+):
+    """Build a change from another device"""
+    return SyncChange(
+        change_id=change_id,
+        change_type=change_type,
+        entity_type="note",
+        entity_id=entity_id,
+        data=data if data is not None else {"text": change_id},
+        timestamp=START + timedelta(minutes=minutes),
+        device_id=device_id,
+    )
+
+
+class TestSyncEngine:
+    """Test suite for SyncEngine class"""
+
+    @pytest.fixture
+    def engine(self):
+        return SyncEngine("local")
+
+    def test_conflict_uses_latest_local_change(self, engine):
+        """Test a remote change is checked against the newest local change for its entity"""
+        engine.track_change(ChangeType.UPDATE, "note", "n1", {"text": "old"})
+        latest = engine.track_change(ChangeType.UPDATE, "note", "n1", {"text": "new"})
+        engine.track_change(ChangeType.UPDATE, "task", "n1", {"text": "other type"})
+
+        conflict = engine._detect_conflict(remote_change("r1", "n1", 0))
+
+        assert conflict.local_change is latest
+        assert engine._detect_conflict(remote_change("r2", "n2", 0)) is None
+
+    def test_echoed_changes_leave_pending(self, engine):
+        """Test local changes returned by the remote side are no longer pending"""
+        own = engine.track_change(ChangeType.CREATE, "note", "n1", {"text": "a"})
+        other = engine.track_change(ChangeType.CREATE, "note", "n2", {"text": "b"})
+        engine.conflict_strategy = ConflictResolution.LATEST_WINS
+
+        engine.apply_remote_changes([own])
+
+        assert engine.get_pending_changes() == [other]
+        assert engine._detect_conflict(remote_change("r1", "n1", 0)) is None
+        assert engine._detect_conflict(remote_change("r2", "n2", 0)).local_change is other
+
+    def test_applied_changes_are_skipped(self, engine):
+        """Test a remote change is applied once"""
+        change = remote_change("r1", "n1", 0)
+
+        assert len(engine.apply_remote_changes([change])["applied"]) == 1
+        assert engine.apply_remote_changes([change])["applied"] == []
+
+    def test_compact_applied_changes(self, engine):
+        """Test compacted change IDs are still recognised through device watermarks"""
+        changes = [remote_change(f"r{i}", f"n{i}", i) for i in range(10)]
+        engine.apply_remote_changes(changes)
+
+        assert engine.compact_applied_changes(START + timedelta(minutes=4)) == 5
+        assert len(engine.applied_changes) == 5
+        assert engine.apply_remote_changes(changes)["applied"] == []
+
+    def test_clear_pending_changes(self, engine):
+        """Test clearing pending changes also clears conflict lookups"""
+        engine.track_change(ChangeType.UPDATE, "note", "n1", {"text": "a"})
+        engine.clear_pending_changes()
+
+        assert engine.get_pending_changes() == []
+        assert engine._detect_conflict(remote_change("r1", "n1", 0)) is None
+
+
+class TestCoalesceChanges:
+    """Test suite for coalesce_changes"""
+
+    def test_create_and_updates_become_create(self):
+        """Test updates fold into the create with their fields laid over it"""
+        changes = [
+            remote_change("c1", "n1", 0, data={"a": 1, "b": 1}, change_type=ChangeType.CREATE),
+            remote_change("c2", "n1", 1, data={"b": 2}),
+            remote_change("c3", "n1", 2, data={"c": 3}),
+        ]
+
+        [net] = coalesce_changes(changes)
+
+        assert net.change_type == ChangeType.CREATE
+        assert net.data == {"a": 1, "b": 2, "c": 3}
+        assert net.change_id == "c3"
+        assert net.timestamp == changes[-1].timestamp
+
+    def test_deletes(self):
+        """Test update then delete is a delete and create then delete cancels out"""
+        changes = [
+            remote_change("c1", "n1", 0),
+            remote_change("c2", "n1", 1, change_type=ChangeType.DELETE),
+            remote_change("c3", "n2", 2, change_type=ChangeType.CREATE),
+            remote_change("c4", "n2", 3, change_type=ChangeType.DELETE),
+        ]
+
+        assert [c.change_id for c in coalesce_changes(changes)] == ["c2"]
+
+    def test_delete_then_create_keeps_create(self):
+        """Test a re-created entity keeps only the new data"""
+        changes = [
+            remote_change("c1", "n1", 0, change_type=ChangeType.DELETE),
+            remote_change("c2", "n1", 1, data={"a": 1}, change_type=ChangeType.CREATE),
+            remote_change("c3", "n1", 2, data={"b": 2}),
+        ]
+
+        [net] = coalesce_changes(changes)
+        assert net.change_type == ChangeType.CREATE
+        assert net.data == {"a": 1, "b": 2}
+
+    def test_order_follows_last_change(self):
+        """Test entities are ordered by their last change"""
+        changes = [
+            remote_change("c1", "n1", 0),
+            remote_change("c2", "n2", 1),
+            remote_change("c3", "n1", 2),
+        ]
+
+        assert [c.entity_id for c in coalesce_changes(changes)] == ["n2", "n1"]
+
+
+class TestAppliedChangeLog:
+    """Test suite for AppliedChangeLog class"""
+
+    def test_bounded_by_max_recent(self):
+        """Test the exact ID set stays bounded while every added change is recognised"""
+        log = AppliedChangeLog(max_recent=10)
+        changes = [remote_change(f"r{i}", "n1", i) for i in range(25)]
+        for change in changes:
+            log.add(change)
+
+        assert len(log) <= 10
+        assert all(change in log for change in changes)
+
+    def test_watermarks_are_per_device(self):
+        """Test one device's watermark does not cover another device's changes"""
+        log = AppliedChangeLog()
+        log.add(remote_change("a1", "n1", 10, device_id="a"))
+        log.compact(START + timedelta(minutes=10))
+
+        assert remote_change("a0", "n1", 5, device_id="a") in log
+        assert remote_change("b0", "n1", 5, device_id="b") not in log
+        assert remote_change("a2", "n1", 11, device_id="a") not in log
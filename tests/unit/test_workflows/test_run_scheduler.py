@@ -0,0 +1,290 @@
+"""
+Unit Tests for Workflow Run Scheduler Module
+Tests priorities, concurrency caps, overload handling, recovery, timers and metrics
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.workflows.run_scheduler import RunPriority, RunStatus, WorkflowRunScheduler
+from src.workflows.workflow_engine import Connection, Workflow, WorkflowManager
+from src.workflows.workflow_nodes import NodeCategory, PortType, WorkflowNode, create_node
+
+
+class GateNode(WorkflowNode):
+    """Action node that records its run and waits until its gate opens"""
+
+    def __init__(self, node_id: str, gate: threading.Event, record: list):
+        super().__init__(node_id, "test.gate", NodeCategory.ACTION, "Gate")
+        self.add_input_port("exec", "Execute", PortType.EXEC, required=True)
+        self.add_output_port("exec", "Execute", PortType.EXEC)
+        self.gate = gate
+        self.record = record
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def execute(self, context):
+        super().execute(context)
+        with self.lock:
+            self.record.append(context.get("label", self.node_id))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        self.gate.wait(5)
+        with self.lock:
+            self.active -= 1
+        return True
+
+
+@pytest.fixture
+def gate():
+    return threading.Event()
+
+
+@pytest.fixture
+def record():
+    return []
+
+
+@pytest.fixture
+def manager(tmp_path, gate, record):
+    """Manager with two workflows that each run one GateNode"""
+    manager = WorkflowManager(str(tmp_path / "workflows"))
+    for name in ["first", "second"]:
+        workflow = Workflow(name, name)
+        manager.workflows[name] = workflow
+        workflow.add_node(create_node("trigger.manual", "trigger"))
+        workflow.add_node(GateNode(f"gate_{name}", gate, record))
+        workflow.add_connection(Connection("c1", "trigger", "exec", f"gate_{name}", "exec"))
+    return manager
+
+
+def make_scheduler(manager, tmp_path, **kwargs):
+    """Create a scheduler journaling under tmp_path"""
+    return WorkflowRunScheduler(manager, state_dir=str(tmp_path / "runs"), **kwargs)
+
+
+class TestWorkflowRunScheduler:
+    """Test suite for WorkflowRunScheduler class"""
+
+    def test_runs_complete_with_metrics(self, manager, tmp_path, gate):
+        """Test runs finish on the workers and their timings are reported"""
+        gate.set()
+        scheduler = make_scheduler(manager, tmp_path, workers=2)
+
+        runs = [scheduler.submit("first"), scheduler.submit("second")]
+
+        assert scheduler.wait_idle(5)
+        assert [run.status for run in runs] == [RunStatus.COMPLETED] * 2
+        assert runs[0].report["status"] == "completed"
+
+        metrics = scheduler.get_metrics()
+        assert metrics["completed"] == 2
+        assert metrics["queued"] == metrics["running"] == 0
+        assert metrics["queue_seconds"]["count"] == metrics["run_seconds"]["count"] == 2
+        scheduler.stop()
+
+    def test_unknown_workflow_fails(self, manager, tmp_path):
+        """Test a run of a missing workflow is marked failed"""
+        scheduler = make_scheduler(manager, tmp_path)
+
+        run = scheduler.submit("missing")
+
+        assert run.wait(5)
+        assert run.status == RunStatus.FAILED
+        scheduler.stop()
+
+    def test_per_workflow_cap(self, manager, tmp_path, gate):
+        """Test runs of one workflow wait for each other while other workflows proceed"""
+        scheduler = make_scheduler(manager, tmp_path, workers=3, max_per_workflow=1)
+        first = manager.get_workflow("first").nodes["gate_first"]
+        second = manager.get_workflow("second").nodes["gate_second"]
+
+        scheduler.submit("first")
+        scheduler.submit("first")
+        scheduler.submit("second")
+
+        for _ in range(100):
+            if first.active and second.active:
+                break
+            threading.Event().wait(0.01)
+        assert scheduler.get_metrics()["running"] == 2
+
+        gate.set()
+        assert scheduler.wait_idle(5)
+        assert first.peak == 1
+        scheduler.stop()
+
+    def test_concurrent_runs_count_executions(self, manager, tmp_path, gate):
+        """Test runs of one workflow sharing its nodes count every execution"""
+        gate.set()
+        scheduler = make_scheduler(manager, tmp_path, workers=4, max_per_workflow=4)
+
+        for _ in range(20):
+            scheduler.submit("first")
+
+        assert scheduler.wait_idle(5)
+        workflow = manager.get_workflow("first")
+        assert workflow.execution_count == 20
+        assert workflow.nodes["gate_first"].execution_count == 20
+        scheduler.stop()
+
+    def test_priority_order(self, manager, tmp_path, gate, record):
+        """Test queued runs start highest priority first, oldest first within a priority"""
+        scheduler = make_scheduler(manager, tmp_path, workers=1, max_per_workflow=4)
+        blocker = scheduler.submit("first", {"label": "blocker"})
+        for _ in range(100):
+            if record:
+                break
+            threading.Event().wait(0.01)
+
+        scheduler.submit("first", {"label": "low"}, RunPriority.LOW)
+        scheduler.submit("first", {"label": "normal"})
+        scheduler.submit("first", {"label": "high_1"}, RunPriority.HIGH)
+        scheduler.submit("first", {"label": "high_2"}, RunPriority.HIGH)
+        gate.set()
+
+        assert blocker.wait(5)
+        assert scheduler.wait_idle(5)
+        assert record == ["blocker", "high_1", "high_2", "normal", "low"]
+        scheduler.stop()
+
+    def test_overload_rejects(self, manager, tmp_path):
+        """Test runs beyond max_queued are rejected"""
+        scheduler = make_scheduler(manager, tmp_path, workers=0, max_queued=2)
+
+        runs = [scheduler.submit("first") for _ in range(3)]
+
+        assert [run.status for run in runs] == [
+            RunStatus.QUEUED,
+            RunStatus.QUEUED,
+            RunStatus.REJECTED,
+        ]
+        assert scheduler.get_metrics()["rejected"] == 1
+
+    def test_overload_defers(self, manager, tmp_path, gate):
+        """Test deferred runs are queued once the queue drains"""
+        gate.set()
+        scheduler = make_scheduler(manager, tmp_path, workers=0, max_queued=1, overload="defer")
+
+        runs = [scheduler.submit("first") for _ in range(3)]
+        assert [run.status for run in runs[1:]] == [RunStatus.DEFERRED] * 2
+
+        scheduler.workers = 1
+        scheduler._ensure_workers()
+
+        assert scheduler.wait_idle(5)
+        assert [run.status for run in runs] == [RunStatus.COMPLETED] * 3
+        scheduler.stop()
+
+    def test_unfinished_runs_survive_restart(self, manager, tmp_path, gate, record):
+        """Test queued runs journaled by one scheduler are run by the next"""
+        gate.set()
+        scheduler = make_scheduler(manager, tmp_path, workers=0)
+        scheduler.submit("first", {"label": "one"})
+        scheduler.submit("second", {"label": "two"}, RunPriority.HIGH)
+
+        restarted = make_scheduler(manager, tmp_path, workers=1)
+
+        assert restarted.wait_idle(5)
+        assert record == ["two", "one"]
+        assert make_scheduler(manager, tmp_path, workers=0).get_metrics()["queued"] == 0
+        restarted.stop()
+
+
+def add_delayed_workflow(manager, workflow_id, seconds, record):
+    """Add a workflow that logs, waits on a Delay node and logs again"""
+    gate = threading.Event()
+    gate.set()
+    workflow = Workflow(workflow_id, workflow_id)
+    manager.workflows[workflow_id] = workflow
+    workflow.add_node(create_node("trigger.manual", "trigger"))
+    delay = create_node("utility.delay", "delay")
+    delay.input_ports[1].default_value = seconds
+    workflow.add_node(delay)
+    workflow.add_node(GateNode("before", gate, record))
+    workflow.add_node(GateNode("after", gate, record))
+    workflow.add_connection(Connection("c1", "trigger", "exec", "before", "exec"))
+    workflow.add_connection(Connection("c2", "before", "exec", "delay", "exec"))
+    workflow.add_connection(Connection("c3", "delay", "exec", "after", "exec"))
+    return workflow
+
+
+class TestTimers:
+    """Test suite for suspended runs and timer triggers"""
+
+    def test_delayed_runs_hold_no_worker(self, manager, tmp_path, record):
+        """Test one worker interleaves many runs parked on delays"""
+        add_delayed_workflow(manager, "delayed", 0.3, record)
+        scheduler = make_scheduler(manager, tmp_path, workers=1, max_per_workflow=10)
+
+        started = time.perf_counter()
+        runs = [scheduler.submit("delayed") for _ in range(5)]
+
+        assert scheduler.wait_idle(5)
+        assert time.perf_counter() - started < 1.0
+        assert [run.status for run in runs] == [RunStatus.COMPLETED] * 5
+        assert record[:5] == ["before"] * 5
+        assert runs[0].report["nodes_executed"] == 8
+        scheduler.stop()
+
+    def test_suspended_run_survives_restart(self, manager, tmp_path, record):
+        """Test a parked run is resumed from the journal by the next scheduler"""
+        add_delayed_workflow(manager, "delayed", 0.3, record)
+        scheduler = make_scheduler(manager, tmp_path, workers=1)
+        run = scheduler.submit("delayed")
+        for _ in range(100):
+            if scheduler.get_metrics()["suspended"]:
+                break
+            time.sleep(0.01)
+        scheduler.stop()
+        assert run.status == RunStatus.SUSPENDED
+
+        restarted = make_scheduler(manager, tmp_path, workers=1)
+        assert restarted.get_metrics()["suspended"] == 1
+
+        assert restarted.wait_idle(5)
+        assert record == ["before", "after"]
+        restarted.stop()
+
+    def test_timer_triggers_fire(self, manager, tmp_path, gate):
+        """Test armed timer triggers submit runs at their interval"""
+        gate.set()
+        workflow = Workflow("timed", "timed")
+        manager.workflows["timed"] = workflow
+        trigger = create_node("trigger.timer", "timer")
+        trigger.config["interval_seconds"] = 0.05
+        workflow.add_node(trigger)
+        workflow.add_node(GateNode("gate", gate, []))
+        workflow.add_connection(Connection("c1", "timer", "exec", "gate", "exec"))
+        scheduler = make_scheduler(manager, tmp_path, workers=1)
+
+        scheduler.schedule_timer_triggers()
+        scheduler.schedule_timer_triggers()
+        time.sleep(0.3)
+        scheduler.stop()
+
+        completed = scheduler.get_metrics()["completed"]
+        assert 3 <= completed <= 7
+        assert set(scheduler._trigger_due) == {"timed/timer"}
+
+    def test_run_once_trigger(self, manager, tmp_path, gate):
+        """Test a run-once trigger fires once, also across restarts"""
+        gate.set()
+        workflow = Workflow("timed", "timed")
+        manager.workflows["timed"] = workflow
+        trigger = create_node("trigger.timer", "timer")
+        trigger.config.update({"interval_seconds": 0.05, "run_once": True})
+        workflow.add_node(trigger)
+
+        scheduler = make_scheduler(manager, tmp_path, workers=1)
+        scheduler.schedule_timer_triggers()
+        time.sleep(0.2)
+        scheduler.stop()
+        assert scheduler.get_metrics()["completed"] == 1
+
+        restarted = make_scheduler(manager, tmp_path, workers=1)
+        restarted.schedule_timer_triggers()
+        assert restarted.get_metrics()["timers"] == 0
@@ -0,0 +1,421 @@
+"""
+Unit Tests for Workflow Engine Module
+Tests execution plans, execution order, parallel branches, delays and loops
+"""
+
+import json
+import time
+
+import pytest
+
+from src.workflows.workflow_engine import Connection, Workflow, WorkflowExecutor, WorkflowStatus
+from src.workflows.workflow_nodes import NodeCategory, PortType, WorkflowNode, create_node
+
+
+class SleepNode(WorkflowNode):
+    """Action node that waits, standing in for an I/O-bound call"""
+
+    def __init__(self, node_id: str, seconds: float = 0.0):
+        super().__init__(node_id, "test.sleep", NodeCategory.ACTION, "Sleep")
+        self.add_input_port("exec", "Execute", PortType.EXEC, required=True)
+        self.add_output_port("exec", "Execute", PortType.EXEC)
+        self.add_output_port("done", "Done", PortType.BOOLEAN)
+        self.seconds = seconds
+
+    def execute(self, context):
+        super().execute(context)
+        time.sleep(self.seconds)
+        self.set_output_value("done", True, context)
+        return True
+
+
+class FailNode(WorkflowNode):
+    """Action node that always fails"""
+
+    def __init__(self, node_id: str):
+        super().__init__(node_id, "test.fail", NodeCategory.ACTION, "Fail")
+        self.add_input_port("exec", "Execute", PortType.EXEC, required=True)
+        self.add_output_port("exec", "Execute", PortType.EXEC)
+
+    def execute(self, context):
+        super().execute(context)
+        return False
+
+
+def add_log_node(workflow, node_id, message="message"):
+    """Add a Log node with a fixed message"""
+    node = create_node("utility.log", node_id)
+    node.input_ports[1].default_value = message
+    node.config["log_level"] = "debug"
+    workflow.add_node(node)
+    return node
+
+
+def connect(workflow, from_node, to_node, from_port="exec", to_port="exec"):
+    """Connect two nodes"""
+    connection_id = f"{from_node}.{from_port}->{to_node}.{to_port}"
+    return workflow.add_connection(
+        Connection(connection_id, from_node, from_port, to_node, to_port)
+    )
+
+
+def executed(executor):
+    """Get the IDs of nodes that completed, in order"""
+    return [e["node_id"] for e in executor.execution_log if e["status"] == "completed"]
+
+
+@pytest.fixture
+def workflow():
+    """Manual trigger fanning out to two Log chains"""
+    workflow = Workflow("workflow_1", "Test Workflow")
+    workflow.add_node(create_node("trigger.manual", "trigger"))
+    for node_id in ["a", "a1", "b"]:
+        add_log_node(workflow, node_id)
+
+    connect(workflow, "trigger", "a")
+    connect(workflow, "a", "a1")
+    connect(workflow, "trigger", "b")
+    return workflow
+
+
+class TestExecutionPlan:
+    """Test suite for compiled execution plans"""
+
+    def test_plan_contents(self, workflow):
+        """Test triggers, adjacency, bindings and topological order"""
+        plan = workflow.get_execution_plan()
+
+        assert plan.triggers == ["trigger"]
+        assert plan.next_nodes("trigger") == ["a", "b"]
+        assert plan.next_nodes("trigger", "exec") == ["a", "b"]
+        assert plan.next_nodes("trigger", "missing") == []
+        assert plan.predecessors["a1"] == ["a"]
+        assert plan.bindings["a1"] == {"exec": "a.exec"}
+        assert plan.order.index("a") < plan.order.index("a1")
+        assert not plan.has_cycle
+
+    def test_plan_is_cached_until_graph_changes(self, workflow):
+        """Test the plan is reused and recompiled after nodes or connections change"""
+        plan = workflow.get_execution_plan()
+        assert workflow.get_execution_plan() is plan
+
+        add_log_node(workflow, "c")
+        connect(workflow, "b", "c")
+
+        plan = workflow.get_execution_plan()
+        assert plan.next_nodes("b") == ["c"]
+
+        workflow.remove_node("c")
+        assert workflow.get_execution_plan().next_nodes("b") == []
+
+
+class TestWorkflowExecutor:
+    """Test suite for WorkflowExecutor class"""
+
+    @pytest.fixture
+    def executor(self):
+        return WorkflowExecutor()
+
+    def test_depth_first_order(self, workflow, executor):
+        """Test each branch runs to its end before the next one starts"""
+        assert executor.execute(workflow)
+        assert executed(executor) == ["trigger", "a", "a1", "b"]
+
+    def test_if_follows_taken_branch(self, executor):
+        """Test only the port chosen by an If node is followed"""
+        workflow = Workflow("workflow_if", "If Workflow")
+        workflow.add_node(create_node("trigger.manual", "trigger"))
+        if_node = create_node("logic.if", "if")
+        if_node.input_ports[1].default_value = False
+        workflow.add_node(if_node)
+        add_log_node(workflow, "yes")
+        add_log_node(workflow, "no")
+
+        connect(workflow, "trigger", "if")
+        connect(workflow, "if", "yes", from_port="true")
+        connect(workflow, "if", "no", from_port="false")
+
+        assert executor.execute(workflow)
+        assert executed(executor) == ["trigger", "if", "no"]
+        assert "__next_port__" not in executor.context
+
+    def test_long_chain_does_not_recurse(self, executor):
+        """Test chains deeper than the recursion limit run"""
+        workflow = Workflow("workflow_chain", "Chain Workflow")
+        workflow.add_node(create_node("trigger.manual", "trigger"))
+        previous = "trigger"
+        for i in range(3000):
+            add_log_node(workflow, f"log_{i}")
+            connect(workflow, previous, f"log_{i}")
+            previous = f"log_{i}"
+
+        assert executor.execute(workflow)
+        assert len(executed(executor)) == 3001
+
+    def test_cycle_fails(self, workflow, executor):
+        """Test a workflow with a cycle is rejected before running"""
+        connect(workflow, "a1", "a")
+
+        assert not executor.execute(workflow)
+        assert executor.status == WorkflowStatus.FAILED
+        assert executor.execution_log == []
+
+
+class TestDelays:
+    """Test suite for Delay nodes and suspended runs"""
+
+    @pytest.fixture
+    def delayed(self, workflow):
+        """Workflow with a Delay node between a and a1"""
+        delay = create_node("utility.delay", "delay")
+        delay.input_ports[1].default_value = 0.1
+        workflow.add_node(delay)
+        workflow.connections = [c for c in workflow.connections if c.to_node != "a1"]
+        workflow.invalidate_plan()
+        connect(workflow, "a", "delay")
+        connect(workflow, "delay", "a1")
+        return workflow
+
+    def test_delay_blocks_by_default(self, delayed):
+        """Test a plain executor waits out the delay"""
+        executor = WorkflowExecutor()
+
+        started = time.perf_counter()
+        assert executor.execute(delayed)
+
+        assert time.perf_counter() - started >= 0.1
+        assert executed(executor) == ["trigger", "a", "delay", "a1", "b"]
+
+    def test_suspend_and_continue(self, delayed):
+        """Test a suspended run stops at the delay and finishes on another executor"""
+        executor = WorkflowExecutor(suspend_delays=True)
+
+        assert executor.execute(delayed, {"input": 1})
+        assert executor.status == WorkflowStatus.PAUSED
+        assert executed(executor) == ["trigger", "a", "delay"]
+        continuation = json.loads(json.dumps(executor.continuation))
+        assert continuation["resume_at"] > time.time()
+
+        resumed = WorkflowExecutor(suspend_delays=True)
+        assert resumed.execute_continuation(delayed, continuation)
+
+        assert resumed.status == WorkflowStatus.COMPLETED
+        assert executed(resumed) == ["trigger", "a", "delay", "a1", "b"]
+        assert resumed.context["input"] == 1
+        assert "__delay__" not in resumed.context
+
+
+def build_loop(items, mode="sequential", body_node=None):
+    """For Each over items whose body formats each item into the "last" variable"""
+    workflow = Workflow("workflow_loop", "Loop Workflow")
+    workflow.add_node(create_node("trigger.manual", "trigger"))
+    loop = create_node("logic.for_each", "loop")
+    loop.input_ports[1].default_value = items
+    loop.config.update({"mode": mode, "batch_size": 4, "max_workers": 4})
+    workflow.add_node(loop)
+
+    text = create_node("data.format_string", "text")
+    text.input_ports[0].default_value = "item {var1}"
+    workflow.add_node(text)
+    setter = create_node("data.set_variable", "set")
+    setter.config["variable_name"] = "last"
+    workflow.add_node(setter)
+    add_log_node(workflow, "done")
+
+    connect(workflow, "trigger", "loop")
+    connect(workflow, "loop", "text", from_port="item", to_port="var1")
+    connect(workflow, "text", "set", from_port="result", to_port="value")
+    if body_node:
+        workflow.add_node(body_node)
+        connect(workflow, "loop", body_node.node_id, from_port="loop_body")
+        connect(workflow, body_node.node_id, "set")
+    else:
+        connect(workflow, "loop", "set", from_port="loop_body")
+    connect(workflow, "loop", "done", from_port="completed")
+    return workflow
+
+
+class TestLoops:
+    """Test suite for For Each loops and expression nodes"""
+
+    @pytest.fixture
+    def executor(self):
+        return WorkflowExecutor()
+
+    def test_expressions_are_evaluated_on_read(self, executor):
+        """Test Get Variable and Compare feeding an If node run before it"""
+        workflow = Workflow("workflow_expr", "Expression Workflow")
+        workflow.add_node(create_node("trigger.manual", "trigger"))
+        get_count = create_node("data.get_variable", "count")
+        get_count.config["variable_name"] = "task_count"
+        workflow.add_node(get_count)
+        compare = create_node("logic.compare", "compare")
+        compare.config["operator"] = ">"
+        compare.input_ports[1].default_value = 10
+        workflow.add_node(compare)
+        workflow.add_node(create_node("logic.if", "if"))
+        add_log_node(workflow, "many")
+        add_log_node(workflow, "few")
+
+        connect(workflow, "trigger", "if")
+        connect(workflow, "count", "compare", from_port="value", to_port="value_a")
+        connect(workflow, "compare", "if", from_port="result", to_port="condition")
+        connect(workflow, "if", "many", from_port="true")
+        connect(workflow, "if", "few", from_port="false")
+
+        assert executor.execute(workflow, {"task_count": 12})
+        assert executed(executor) == ["trigger", "if", "many"]
+
+    def test_sequential_loop(self, executor):
+        """Test the body runs once per item before the completed port"""
+        assert executor.execute(build_loop([1, 2, 3]))
+
+        assert executed(executor) == ["trigger", "loop", "set", "set", "set", "done"]
+        assert executor.context["last"] == "item 3"
+        assert executor.context["loop.index"] == 2
+
+    def test_batch_loop(self, executor):
+        """Test a batchable body runs in one pass with the same result"""
+        items = list(range(10000))
+
+        assert executor.execute(build_loop(items, mode="batch"))
+
+        assert executed(executor) == ["trigger", "loop", "text", "set", "done"]
+        assert [e["items"] for e in executor.execution_log if "items" in e] == [10000, 10000]
+        assert executor.context["last"] == "item 9999"
+
+    def test_batch_loop_accepts_generators(self, executor):
+        """Test items are consumed lazily from any iterable"""
+        workflow = build_loop(None, mode="batch")
+        workflow.nodes["loop"].input_ports[1].default_value = (i for i in range(5))
+
+        assert executor.execute(workflow)
+        assert executor.context["last"] == "item 4"
+
+    def test_side_effect_body_maps_in_parallel(self, executor):
+        """Test a body with an action node runs items concurrently, merged in item order"""
+        sequential = WorkflowExecutor()
+        assert sequential.execute(build_loop(list(range(8)), body_node=SleepNode("sleep", 0.05)))
+
+        started = time.perf_counter()
+        assert executor.execute(
+            build_loop(list(range(8)), mode="batch", body_node=SleepNode("sleep", 0.05))
+        )
+
+        assert time.perf_counter() - started < 0.3
+        assert executed(executor) == executed(sequential)
+        assert executor.context["last"] == sequential.context["last"] == "item 7"
+
+
+class TestParallelExecution:
+    """Test suite for running independent branches concurrently"""
+
+    @pytest.fixture
+    def executor(self):
+        return WorkflowExecutor()
+
+    def test_branches_overlap(self, executor):
+        """Test fan-out branches take about as long as the slowest one"""
+        workflow = Workflow("workflow_fan_out", "Fan-out Workflow")
+        workflow.max_concurrency = 3
+        workflow.add_node(create_node("trigger.manual", "trigger"))
+        for i in range(3):
+            workflow.add_node(SleepNode(f"sleep_{i}", seconds=0.2))
+            connect(workflow, "trigger", f"sleep_{i}")
+
+        started = time.perf_counter()
+        assert executor.execute(workflow)
+
+        assert time.perf_counter() - started < 0.5
+        assert executed(executor) == ["trigger", "sleep_0", "sleep_1", "sleep_2"]
+        assert all(executor.context[f"sleep_{i}.done"] for i in range(3))
+
+    def test_matches_sequential_run(self, executor):
+        """Test log order and conflicting writes resolve as in a sequential run"""
+
+        def build(max_concurrency):
+            workflow = Workflow("workflow_vars", "Variable Workflow")
+            workflow.max_concurrency = max_concurrency
+            workflow.add_node(create_node("trigger.manual", "trigger"))
+            for i, seconds in enumerate([0.05, 0.0]):
+                workflow.add_node(SleepNode(f"sleep_{i}", seconds=seconds))
+                setter = create_node("data.set_variable", f"set_{i}")
+                setter.config["variable_name"] = "winner"
+                setter.input_ports[1].default_value = i
+                workflow.add_node(setter)
+                connect(workflow, "trigger", f"sleep_{i}")
+                connect(workflow, f"sleep_{i}", f"set_{i}")
+            return workflow
+
+        sequential = WorkflowExecutor()
+        assert sequential.execute(build(1))
+        assert executor.execute(build(2))
+
+        assert executed(executor) == executed(sequential)
+        assert executor.context["winner"] == sequential.context["winner"] == 1
+
+    def test_branch_ports_are_isolated(self, executor):
+        """Test If nodes in parallel branches each follow their own port"""
+        workflow = Workflow("workflow_ifs", "If Workflow")
+        workflow.max_concurrency = 4
+        workflow.add_node(create_node("trigger.manual", "trigger"))
+        for name, condition in [("left", True), ("right", False)]:
+            if_node = create_node("logic.if", f"if_{name}")
+            if_node.input_ports[1].default_value = condition
+            workflow.add_node(if_node)
+            add_log_node(workflow, f"{name}_true")
+            add_log_node(workflow, f"{name}_false")
+            connect(workflow, "trigger", f"if_{name}")
+            connect(workflow, f"if_{name}", f"{name}_true", from_port="true")
+            connect(workflow, f"if_{name}", f"{name}_false", from_port="false")
+
+        assert executor.execute(workflow)
+        assert executed(executor) == ["trigger", "if_left", "left_true", "if_right", "right_false"]
+        assert "__next_port__" not in executor.context
+
+    def test_reader_waits_for_earlier_writer(self):
+        """Test a node reading an output waits for a writer earlier in depth-first order"""
+
+        def build(max_concurrency):
+            workflow = Workflow("workflow_reader", "Reader Workflow")
+            workflow.max_concurrency = max_concurrency
+            workflow.add_node(create_node("trigger.manual", "trigger"))
+            workflow.add_node(SleepNode("slow", seconds=0.2))
+            workflow.add_node(SleepNode("writer"))
+            workflow.add_node(create_node("logic.if", "reader"))
+            add_log_node(workflow, "saw_true")
+            add_log_node(workflow, "saw_false")
+
+            connect(workflow, "trigger", "slow")
+            connect(workflow, "slow", "writer")
+            connect(workflow, "trigger", "reader")
+            connect(workflow, "writer", "reader", from_port="done", to_port="condition")
+            connect(workflow, "reader", "saw_true", from_port="true")
+            connect(workflow, "reader", "saw_false", from_port="false")
+            return workflow
+
+        sequential = WorkflowExecutor()
+        parallel = WorkflowExecutor()
+        assert sequential.execute(build(1))
+        assert parallel.execute(build(4))
+
+        assert executed(parallel) == executed(sequential)
+        assert "saw_true" in executed(parallel)
+
+    def test_failed_loop_body_fails_for_each(self):
+        """Test a failing loop body stops the completed port in both modes"""
+        sequential = WorkflowExecutor()
+        parallel = WorkflowExecutor()
+        assert sequential.execute(build_loop([1, 2], body_node=FailNode("fail")))
+        workflow = build_loop([1, 2], body_node=FailNode("fail"))
+        workflow.max_concurrency = 2
+        assert parallel.execute(workflow)
+
+        assert "done" not in executed(sequential)
+        assert executed(parallel) == executed(sequential)
+
+    def test_max_concurrency_round_trip(self, workflow):
+        """Test the concurrency limit is saved with the workflow"""
+        workflow.max_concurrency = 4
+
+        assert Workflow.from_json(workflow.to_json()).max_concurrency == 4